@@ -33,24 +33,104 @@ RATE_LIMIT_PER_HOUR = int(os.getenv("RATE_LIMIT_PER_HOUR", "100"))
 
 # API Configuration
 CLINICAL_TRIALS_API = {
+    'backend': os.getenv("CLINICAL_TRIALS_BACKEND", "classic"),  # 'classic' or 'v2'
     'endpoint': "https://classic.clinicaltrials.gov/api/query/study_fields",
+    'v2_endpoint': "https://clinicaltrials.gov/api/v2/studies",
+    'v2_page_size': 1000,  # v2 maximum
     'default_params': {
         'expr': 'clinical trial compliance',  # Removed deceptive HIPAA search
-        'fields': 'NCTId,BriefTitle,OverallStatus,CentralContactEMail,OverallOfficialAffiliation,StudyFirstSubmitDate',
+        # Fallback only: assessments request REPORTING_FIELDS plus the fields
+        # read by the enabled validator rules
+        'fields': 'NCTId,BriefTitle,OverallStatus,CentralContactEMail,OverallOfficialAffiliation,StudyFirstSubmitDate,LastUpdatePostDate',
         'fmt': 'json'
     },
     'timeout': 15,
-    'max_retries': 3
+    'max_retries': 3,
+    'retry_backoff_factor': 0.5,  # Per-page retries back off ~0.5s, 1s, 2s... with jitter
+    'retry_backoff_max': 30,
+    'pool_maxsize': 10,
+    'rate_limit': {
+        'requests_per_second': float(os.getenv("CLINICAL_TRIALS_RATE_LIMIT", "2")),
+        'burst': int(os.getenv("CLINICAL_TRIALS_RATE_BURST", "4")),
+        'min_requests_per_second': 0.2  # Floor when backing off on 429/503
+    }
 }
 
+# On-disk cache for ClinicalTrials.gov responses
+RESPONSE_CACHE = {
+    'enabled': os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true",
+    'path': os.getenv("RESPONSE_CACHE_PATH", str(BASE_DIR / "cache" / "responses.db")),
+    'ttl_seconds': int(os.getenv("RESPONSE_CACHE_TTL", "21600")),  # 6 hours
+    'max_bytes': int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+}
+
+# Compliance reports reused across runs for unchanged studies
+REPORT_CACHE = {
+    'enabled': os.getenv("REPORT_CACHE_ENABLED", "true").lower() == "true",
+    'path': os.getenv("REPORT_CACHE_PATH", str(BASE_DIR / "cache" / "reports.db")),
+    'max_bytes': int(os.getenv("REPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+}
+
+# History of every run's results, for run-over-run diffs
+RESULTS_STORE = {
+    'enabled': os.getenv("RESULTS_STORE_ENABLED", "true").lower() == "true",
+    'path': os.getenv("RESULTS_STORE_PATH", str(BASE_DIR / "results" / "results.db"))
+}
+
+# Per-study results file written while the assessment runs: 'csv' or
+# 'ndjson', optionally gzip-compressed, flushed every flush_rows rows; or
+# 'parquet' (needs pyarrow): results and issues datasets partitioned by run
+# date under directory, written in row groups of row_group_rows
+RESULTS_OUTPUT = {
+    'format': os.getenv("RESULTS_OUTPUT_FORMAT", "csv"),
+    'compress': os.getenv("RESULTS_OUTPUT_GZIP", "false").lower() == "true",
+    'directory': os.getenv("RESULTS_OUTPUT_DIR", "."),
+    'flush_rows': int(os.getenv("RESULTS_OUTPUT_FLUSH_ROWS", "5000")),
+    'row_group_rows': int(os.getenv("RESULTS_OUTPUT_ROW_GROUP_ROWS", "65536"))
+}
+
+# Fields needed for results, contact counts and incremental sync,
+# independent of which compliance rules are enabled
+REPORTING_FIELDS = [
+    'NCTId',
+    'BriefTitle',
+    'OverallStatus',
+    'LastUpdatePostDate',
+    'CentralContactEMail',
+    'OverallOfficialAffiliation'
+]
+
+# Declarative compliance ruleset (.json, or .yaml with PyYAML installed).
+# The file is re-read when it changes, checked at most every N seconds
+# (0 disables hot reload).
+COMPLIANCE_RULESET_PATH = os.getenv("COMPLIANCE_RULESET_PATH", str(BASE_DIR / "config" / "compliance_rules.json"))
+COMPLIANCE_RULESET_RELOAD_SECONDS = float(os.getenv("COMPLIANCE_RULESET_RELOAD_SECONDS", "5"))
+
+# Comma-separated rule ids to run; empty runs every rule
+ENABLED_COMPLIANCE_RULES = [
+    rule.strip() for rule in os.getenv("ENABLED_COMPLIANCE_RULES", "").split(",") if rule.strip()
+]
+
 # Campaign Settings
 MAX_RESULTS = 50
 BATCH_SIZE = 5
-DELAY_BETWEEN_BATCHES = 2
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "4"))  # 1 = sequential fetch
+ASSESSMENT_WORKERS = int(os.getenv("ASSESSMENT_WORKERS", "1"))  # 1 = validate in-process
+ASSESSMENT_CHUNK_SIZE = 256  # Studies per process-pool task
+# Assessment pipeline: items buffered between stages, and threads for the
+# per-study stages (validation concurrency is ASSESSMENT_WORKERS)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "1000"))
+PIPELINE_BATCH_SIZE = 64  # Items handed between stages at once
+PIPELINE_BATCH_WAIT = 0.25  # Seconds the source holds a partial batch
+PIPELINE_WORKERS = {
+    'normalize': int(os.getenv("PIPELINE_NORMALIZE_WORKERS", "1"))
+}
 
 # Monitoring Configuration
 SENTRY_DSN = os.getenv("SENTRY_DSN")
 METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Fraction of studies whose rules are individually timed (0 = off)
+RULE_PROFILE_SAMPLE_RATE = float(os.getenv("RULE_PROFILE_SAMPLE_RATE", "0"))
 
 # Localization
 DEFAULT_LOCALE = "en_US"
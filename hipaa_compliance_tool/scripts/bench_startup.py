@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+CLI startup cost: import time of scripts/main.py, measured with -X importtime
+Usage: python scripts/bench_startup.py [--repeat R] [--budget-ms MS] [--top N] [-- ARGS...]
+
+Runs `main.py --help` (or main.py with ARGS) in fresh interpreters and
+exits non-zero when the best run's imports exceed the budget or pull in a
+dependency that only some commands need.
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+MAIN_SCRIPT = PROJECT_ROOT / 'scripts' / 'main.py'
+
+# Loaded on demand by the commands that need them, never at startup
+HEAVY_MODULES = ('pandas', 'numpy', 'requests', 'cryptography', 'jwt', 'bcrypt', 'pyarrow')
+
+DEFAULT_BUDGET_MS = 300
+
+# "import time: self [us] | cumulative | imported package"
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+
+def parse_importtime(stderr: str) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Cumulative import milliseconds of the top-level imports and of every module
+
+    `site` is left out of the top level: it runs for every interpreter,
+    whatever the script imports.
+    """
+    top_level: Dict[str, float] = {}
+    modules: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative_ms = int(match.group(2)) / 1000
+        name = match.group(4)
+        modules[name] = cumulative_ms
+        if len(match.group(3)) == 1 and name != 'site':
+            top_level[name] = cumulative_ms
+    return top_level, modules
+
+def measure_startup(args: List[str] = None) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Import profile of one `main.py` start, run from a scratch directory
+
+    The scratch working directory also catches import-time side effects:
+    nothing should be written there just by starting the CLI.
+    """
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', str(MAIN_SCRIPT)] + (args or ['--help']),
+            cwd=cwd, capture_output=True, text=True, env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"main.py exited with {result.returncode}: {result.stderr[-500:]}")
+        leftovers = os.listdir(cwd)
+    if leftovers:
+        raise RuntimeError(f"Starting the CLI created files: {', '.join(sorted(leftovers))}")
+    return parse_importtime(result.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description='CLI startup import-time benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters to start (best is reported)')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'Fail above this many import milliseconds (default {DEFAULT_BUDGET_MS})')
+    parser.add_argument('--top', type=int, default=10, help='Slowest top-level imports to list')
+    parser.add_argument('main_args', nargs='*', help='Arguments for main.py (default: --help)')
+    args = parser.parse_args()
+
+    runs = [measure_startup(args.main_args or None) for _ in range(args.repeat)]
+    top_level, modules = min(runs, key=lambda run: sum(run[0].values()))
+    total = sum(top_level.values())
+
+    print(f"Command:              main.py {' '.join(args.main_args or ['--help'])}")
+    print(f"Best of {args.repeat}:            {total:8.1f} ms imports (budget {args.budget_ms:g} ms)")
+    print("Slowest top-level imports (cumulative):")
+    for name, ms in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"   {name:<40} {ms:8.1f} ms")
+
+    heavy = sorted(name for name in modules if name in HEAVY_MODULES)
+    if heavy:
+        print(f"❌ Imported at startup: {', '.join(heavy)}")
+    if total > args.budget_ms:
+        print(f"❌ Over budget by {total - args.budget_ms:.1f} ms")
+    if heavy or total > args.budget_ms:
+        sys.exit(1)
+    print("✅ Within budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Per-study memory: raw registry dicts vs normalized Study records
+Usage: python scripts/bench_study_memory.py [--studies N]
+"""
+
+import sys
+import json
+import random
+import argparse
+import tracemalloc
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from src.data.study import Study
+
+STATUSES = ['Recruiting', 'Completed', 'Active, not recruiting', 'Terminated', 'Withdrawn']
+AFFILIATIONS = [f'University Hospital {i}' for i in range(200)]
+FIELDS = ['NCTId', 'BriefTitle', 'OverallStatus', 'LastUpdatePostDate', 'CentralContactEMail',
+          'OverallOfficialAffiliation', 'OverallOfficialName', 'LocationContactName',
+          'LocationContactPhone', 'LocationContactEMail', 'LargeDocHasICF', 'StudyFirstSubmitDate']
+
+def synthetic_records(count: int, seed: int = 7):
+    """Yield classic-API shaped records, decoded from JSON like real responses"""
+    rng = random.Random(seed)
+    for i in range(count):
+        record = {field: [] for field in FIELDS}
+        record.update({
+            'NCTId': [f'NCT{i:08d}'],
+            'BriefTitle': [f'Synthetic study {i} of an investigational treatment'],
+            'OverallStatus': [rng.choice(STATUSES)],
+            'LastUpdatePostDate': [f'{rng.choice(["January", "June"])} {rng.randint(1, 28)}, 2024'],
+            'StudyFirstSubmitDate': [f'March {rng.randint(1, 28)}, {rng.randint(2005, 2023)}'],
+            'CentralContactEMail': [f'contact{i}@example.org'],
+            'OverallOfficialAffiliation': [rng.choice(AFFILIATIONS)],
+        })
+        if rng.random() < 0.3:
+            record['LocationContactPhone'] = [f'555-{rng.randint(1000, 9999)}']
+        # Decoding gives every string its own object, as the API client does
+        yield json.loads(json.dumps(record))
+
+def measure(count: int, normalize: bool) -> int:
+    """Bytes retained by `count` studies in the chosen representation"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    if normalize:
+        studies = [Study.from_record(record) for record in synthetic_records(count)]
+    else:
+        studies = list(synthetic_records(count))
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del studies
+    return retained
+
+def main():
+    parser = argparse.ArgumentParser(description='Study record memory benchmark')
+    parser.add_argument('--studies', type=int, default=100_000, help='Number of synthetic studies')
+    args = parser.parse_args()
+
+    raw = measure(args.studies, normalize=False)
+    typed = measure(args.studies, normalize=True)
+
+    print(f"Studies:              {args.studies}")
+    print(f"dict-of-lists:        {raw / 2**20:8.1f} MiB  ({raw / args.studies:6.0f} B/study)")
+    print(f"Study (slotted):      {typed / 2**20:8.1f} MiB  ({typed / args.studies:6.0f} B/study)")
+    print(f"Reduction:            {100 * (1 - typed / raw):8.1f} %")
+
+if __name__ == "__main__":
+    main()
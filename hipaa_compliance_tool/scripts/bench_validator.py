@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Validator throughput: studies/second per study or as one vectorized batch
+Usage: python scripts/bench_validator.py [--studies N] [--repeat R] [--batch] [--profile RATE]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from src.data.study import Study, to_columns
+from src.compliance.validator import HIPAAComplianceValidator
+from src.monitoring.profiling import rule_profile_summary, format_rule_profile
+from bench_study_memory import synthetic_records
+
+def main():
+    parser = argparse.ArgumentParser(description='Compliance validator throughput benchmark')
+    parser.add_argument('--studies', type=int, default=20_000, help='Number of synthetic studies')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed passes (best is reported)')
+    parser.add_argument('--batch', action='store_true', help='Time validate_batch over a column table')
+    parser.add_argument('--profile', type=float, default=0.0, metavar='RATE',
+                        help='Per-rule profiling sample rate (0 = off)')
+    args = parser.parse_args()
+
+    studies = [Study.from_record(record) for record in synthetic_records(args.studies)]
+    validator = HIPAAComplianceValidator(profile_sample_rate=args.profile)
+    columns = to_columns(studies) if args.batch else None
+
+    best = float('inf')
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        if args.batch:
+            validator.validate_batch(columns)
+        else:
+            for study in studies:
+                validator.validate_study_compliance(study)
+        best = min(best, time.perf_counter() - started)
+
+    print(f"Mode:                 {'batch' if args.batch else 'per study'}")
+    print(f"Studies:              {args.studies}")
+    print(f"Best of {args.repeat}:            {best:8.3f} s")
+    print(f"Throughput:           {args.studies / best:8.0f} studies/s")
+    print(f"Per study:            {best / args.studies * 1e6:8.1f} µs")
+
+    if args.profile:
+        validator.flush_profile()
+        print()
+        print(format_rule_profile(rule_profile_summary()))
+
+if __name__ == "__main__":
+    main()
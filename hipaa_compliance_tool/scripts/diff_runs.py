@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+What changed between two assessment runs, from the results store
+Usage: python scripts/diff_runs.py [--since RUN] [--run RUN] [--list] [--json] [--store PATH]
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from config import settings
+from src.compliance.results_store import ResultsStore
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff compliance results between assessment runs')
+    parser.add_argument('--since', type=int, help='Baseline run id (default: the run before --run)')
+    parser.add_argument('--run', type=int, help='Run to compare (default: latest finished run)')
+    parser.add_argument('--list', action='store_true', help='List recent runs instead of diffing')
+    parser.add_argument('--json', action='store_true', help='Print changes as JSON')
+    parser.add_argument('--store', default=settings.RESULTS_STORE['path'], help='Results database path')
+    args = parser.parse_args()
+
+    if not Path(args.store).exists():
+        print(f"No results store at {args.store}; run an assessment first")
+        sys.exit(1)
+
+    store = ResultsStore(args.store)
+    try:
+        if args.list:
+            for run in store.runs():
+                print(f"{run['run_id']:>6}  {run['started_at']}  {run['studies']:>7} studies  "
+                      f"{'incremental' if run['incremental'] else 'full':<11}  {run['source'] or ''}")
+            return
+
+        changes = store.diff(args.since, args.run)
+        if args.json:
+            print(json.dumps([change.to_dict() for change in changes], indent=2))
+            return
+
+        if not changes:
+            print("No changes")
+            return
+        for change in changes:
+            if change.is_new:
+                print(f"+ {change.study_id}: new, {change.new_status} ({change.new_score:g})")
+                continue
+            line = f"~ {change.study_id}: {change.old_status} ({change.old_score:g}) -> " \
+                   f"{change.new_status} ({change.new_score:g})"
+            if change.added_issues:
+                line += f"  added: {', '.join(change.added_issues)}"
+            if change.resolved_issues:
+                line += f"  resolved: {', '.join(change.resolved_issues)}"
+            print(line)
+        print(f"\n{len(changes)} studies changed")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -7,25 +7,38 @@ Legitimate compliance assessment tool for clinical trials
 import sys
 import argparse
 import logging
+from collections import deque
+from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, TYPE_CHECKING
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.append(str(PROJECT_ROOT))
 
-from src.api import clinical_trials_client
-from src.data import processor
+from src.data import bulk_import
+from src.data.study import as_study
+from src.data.result_sink import open_result_sink, FORMATS
 from src.email.sender import EmailSender
 from src.utils import state_manager
 from src.compliance.validator import HIPAAComplianceValidator
+from src.compliance.assessment import StudyAssessor
+from src.compliance.report_cache import ReportCache
+from src.compliance.results_store import ResultsStore
+from src.compliance.run_stats import RunStatistics, format_histogram
+from src.utils.pipeline import Pipeline, format_pipeline_stats
 from src.security.encryption import PHIProtection
 from src.monitoring.logger import hipaa_logger
-from src.monitoring.metrics import metrics_collector
+from src.monitoring.profiling import rule_profile_summary, format_rule_profile
 from src.users.models import UserManager, UserRole
 from src.localization.i18n import i18n
 from config import settings
-import pandas as pd
+
+# The API client pulls in requests; it is imported only by runs that use it
+# (see scripts/bench_startup.py for the startup budget)
+if TYPE_CHECKING:
+    from src.api import clinical_trials_client
 
 # Setup logging
 logging.basicConfig(
@@ -39,10 +52,12 @@ class HIPAAComplianceTool:
 
     def __init__(self):
         self.state_manager = state_manager.CampaignState()
-        self.compliance_validator = HIPAAComplianceValidator()
+        self.compliance_validator = HIPAAComplianceValidator(settings.ENABLED_COMPLIANCE_RULES)
         self.email_sender = EmailSender()
         self.phi_protection = PHIProtection()
         self.user_manager = UserManager()
+        self.report_cache = ReportCache.from_settings()
+        self.results_store = ResultsStore.from_settings()
 
         # Initialize default admin user if none exists
         self._initialize_default_user()
@@ -65,8 +80,54 @@ class HIPAAComplianceTool:
             except Exception as e:
                 logger.error(f"Failed to create default admin user: {e}")
 
-    def run_compliance_assessment(self, user_id: str = None, max_studies: int = None) -> Dict[str, Any]:
-        """Run legitimate HIPAA compliance assessment"""
+    def _open_api_source(self, max_studies: int, updated_since, resume: bool,
+                         fetch_stats: 'clinical_trials_client.FetchStats', fields: List[str]):
+        """Stream (index, study) pairs from ClinicalTrials.gov, resuming an interrupted fetch
+
+        Returns the records and the FetchProgress that saves the cursor
+        as the collect stage finishes each page.
+        """
+        from src.api import clinical_trials_client
+        query_id = clinical_trials_client.client.query_fingerprint(updated_since, fields)
+        cursor = self.state_manager.get_fetch_cursor(query_id) if resume else None
+        start_rank = cursor['last_completed_rank'] + 1 if cursor else 1
+        if cursor:
+            logger.info(f"Resuming interrupted fetch from rank {start_rank}")
+
+        progress = state_manager.FetchProgress(
+            lambda rank, token: self.state_manager.save_fetch_cursor(query_id, rank, token)
+        )
+        records = clinical_trials_client.iter_clinical_trials(
+            max_results=max_studies,
+            updated_since=updated_since,
+            start_rank=start_rank,
+            page_token=cursor.get('page_token') if cursor else None,
+            stats=fetch_stats,
+            checkpoint=progress.page_read,
+            fields=fields
+        )
+        return progress.tag(records), progress
+
+    def run_compliance_assessment(self, user_id: str = None, max_studies: int = None,
+                                  incremental: bool = False, resume: bool = True,
+                                  source: str = 'api', workers: int = None,
+                                  use_report_cache: bool = True, output_format: str = None,
+                                  compress_output: bool = None) -> Dict[str, Any]:
+        """Run legitimate HIPAA compliance assessment
+
+        `source` is 'api' to query ClinicalTrials.gov, or the path of a local
+        .json/.ndjson(.gz) registry dump to import instead. In incremental
+        mode only studies that are new or changed since the last recorded run
+        are assessed. An interrupted API fetch of the same query resumes
+        after its last completed rank unless resume is False. With workers
+        > 1, validation runs across that many processes (results keep the
+        input order). Studies whose rule inputs are unchanged since an earlier
+        run reuse the cached report unless use_report_cache is False. Every
+        result is also recorded under a new run id in the results store
+        (see scripts/diff_runs.py) and streamed to a csv, ndjson or parquet
+        results file (settings.RESULTS_OUTPUT unless output_format/compress_output
+        are given); the summary holds only aggregates, never the rows.
+        """
         logger.info("Starting HIPAA compliance assessment")
 
         # Check user permissions
@@ -74,60 +135,137 @@ class HIPAAComplianceTool:
             raise PermissionError("User does not have permission to run compliance checks")
 
         try:
-            # Fetch clinical trials data
-            trials_data = clinical_trials_client.fetch_clinical_trials()
-            if max_studies:
-                trials_data = trials_data[:max_studies]
-
-            logger.info(f"Retrieved {len(trials_data)} clinical trials for assessment")
-
-            assessment_results = []
-            compliant_studies = 0
-            non_compliant_studies = 0
-
-            for trial in trials_data:
-                try:
-                    # Protect PHI in trial data
-                    sanitized_trial = self.phi_protection.sanitize_trial_data(trial)
-
-                    # Run compliance validation
-                    compliance_report = self.compliance_validator.validate_study_compliance(trial)
-
-                    # Extract contact information securely
-                    contacts = processor.extract_contact_info(trial)
-
-                    # Store results
-                    result = {
-                        'study_id': trial.get('NCTId', ['Unknown'])[0],
-                        'title': trial.get('BriefTitle', ['Unknown'])[0],
-                        'compliance_status': compliance_report.overall_status.value,
-                        'compliance_score': compliance_report.score,
-                        'issues_count': len(compliance_report.issues),
-                        'contacts': len(contacts['pi_emails'] + contacts['central_contacts']),
-                        'assessment_date': compliance_report.assessment_date.isoformat()
-                    }
-
-                    assessment_results.append(result)
-
+            run_started = datetime.utcnow()
+            from_api = source in (None, 'api')
+            fetch_stats = progress = None
+            # Only fetch what the enabled rules and the results need
+            fields = self.compliance_validator.required_fields(settings.REPORTING_FIELDS)
+
+            # Stream clinical trials so assessment overlaps with download
+            if from_api:
+                from src.api import clinical_trials_client
+                fetch_stats = clinical_trials_client.FetchStats()
+                updated_since = self.state_manager.updated_since() if incremental else None
+                if updated_since:
+                    logger.info(f"Incremental run: fetching studies updated since {updated_since}")
+                trials_data, progress = self._open_api_source(max_studies, updated_since, resume,
+                                                              fetch_stats, fields)
+            else:
+                trials_data = bulk_import.iter_registry_dump(source, fields)
+                if max_studies:
+                    trials_data = islice(trials_data, max_studies)
+                trials_data = enumerate(trials_data)
+
+            counts = {'compliant': 0, 'non_compliant': 0, 'failed': 0}
+
+            # Records travel with their read index so the fetch cursor only
+            # moves past studies that reached collect (stages keep input order)
+            def normalize(item):
+                # Normalize once; everything downstream works on typed Study records
+                index, record = item
+                trial = as_study(record)
+                if incremental and not self.state_manager.is_new_or_changed(
+                        trial.nct_id or 'Unknown', trial.last_update_date):
+                    return None
+                return index, trial
+
+            def validate(items):
+                indexes = deque()
+
+                def studies():
+                    for index, trial in items:
+                        indexes.append(index)
+                        yield trial
+
+                # The assessor reads ahead in chunks but yields one result per
+                # study, in input order
+                for trial, result in assessor.assess(studies()):
+                    yield indexes.popleft(), trial, result
+
+            def collect(assessment):
+                index, trial, result = assessment
+                if result is None:
+                    counts['failed'] += 1
+                else:
                     # Update counters
-                    if compliance_report.overall_status.value == 'compliant':
-                        compliant_studies += 1
+                    if result['compliance_status'] == 'compliant':
+                        counts['compliant'] += 1
                     else:
-                        non_compliant_studies += 1
-
-                    # Record metrics
-                    metrics_collector.increment_counter('studies_assessed')
-                    metrics_collector.set_gauge('compliance_score', compliance_report.score)
-
-                except Exception as e:
-                    logger.error(f"Error assessing study {trial.get('NCTId', ['Unknown'])[0]}: {e}")
-                    continue
-
-            # Save results to CSV
-            if assessment_results:
-                df = pd.DataFrame(assessment_results)
-                output_file = f"compliance_assessment_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                df.to_csv(output_file, index=False)
+                        counts['non_compliant'] += 1
+
+                    self.state_manager.record_assessed(result['study_id'], trial.last_update_date)
+
+                if progress:
+                    progress.done_through(index)
+
+            # source -> normalize -> validate -> collect, connected by bounded
+            # queues so download, normalization and validation overlap. Results
+            # carry no PHI, so nothing here is sanitized; EmailSender takes a
+            # sanitized view of each study it sends about.
+            report_cache = self.report_cache if use_report_cache else None
+            results_run = self.results_store.start_run(
+                source='api' if from_api else str(source), incremental=incremental, started_at=run_started
+            ) if self.results_store else None
+            output = settings.RESULTS_OUTPUT
+            result_sink = open_result_sink(
+                output_format or output['format'],
+                compress=output['compress'] if compress_output is None else compress_output,
+                directory=output['directory'],
+                flush_rows=output['flush_rows'],
+                started_at=run_started,
+                run_id=results_run.run_id if results_run else None,
+                row_group_rows=output['row_group_rows']
+            )
+            with result_sink, StudyAssessor(self.compliance_validator, settings.ENABLED_COMPLIANCE_RULES,
+                                            workers=workers, report_cache=report_cache,
+                                            results_run=results_run, result_sink=result_sink) as assessor:
+                pipeline = Pipeline(settings.PIPELINE_QUEUE_SIZE, settings.PIPELINE_BATCH_SIZE,
+                                    settings.PIPELINE_BATCH_WAIT) \
+                    .source('fetch' if from_api else 'import', trials_data) \
+                    .stage('normalize', normalize, workers=settings.PIPELINE_WORKERS['normalize']) \
+                    .transform('validate', validate, workers=assessor.workers) \
+                    .sink('collect', collect)
+                pipeline_stats = pipeline.run()
+            pipeline.publish()
+            if progress:
+                # Studies dropped after the last collected one are done too
+                progress.finish()
+
+            if results_run:
+                results_run.finish()
+
+            compliant_studies = counts['compliant']
+            non_compliant_studies = counts['non_compliant']
+            failed_studies = counts['failed']
+            normalize_stats = pipeline_stats[1]
+            unchanged_studies = normalize_stats.dropped
+            logger.info(f"Retrieved {normalize_stats.items_in} clinical trials for assessment "
+                        f"({unchanged_studies} unchanged since last run)")
+
+            fetch_complete = fetch_stats is None or fetch_stats.pages_failed == 0
+            if not fetch_complete:
+                logger.warning(f"Fetch incomplete: {fetch_stats.pages_failed} page(s) failed "
+                               f"after retries: {fetch_stats.failed_windows}")
+            elif from_api:
+                self.state_manager.clear_fetch_cursor()
+            # A fetch cut off by max results has not seen every change since the
+            # watermark, and a dump's snapshot date is unknown: neither advances
+            # the watermark date (assessed studies are still recorded). Nor does
+            # a run where studies failed to assess: they are not recorded, so
+            # keeping the date lets the next run fetch them again.
+            fetch_exhausted = fetch_stats is not None and fetch_stats.exhausted
+            if fetch_complete and from_api and not fetch_exhausted:
+                logger.warning("Fetch stopped at the result limit; the incremental watermark is not advanced")
+            if failed_studies:
+                logger.warning(f"{failed_studies} studies failed assessment; "
+                               f"the incremental watermark is not advanced")
+            self.state_manager.record_run(run_started,
+                                          complete=fetch_complete and from_api and not failed_studies,
+                                          exhausted=fetch_exhausted)
+
+            studies_assessed = result_sink.rows
+            output_file = str(result_sink.path) if studies_assessed else None
+            if output_file:
                 logger.info(f"Assessment results saved to {output_file}")
 
             # Log audit event
@@ -135,18 +273,25 @@ class HIPAAComplianceTool:
                 'compliance_assessment_completed',
                 user_id=user_id,
                 details={
-                    'studies_assessed': len(assessment_results),
+                    'studies_assessed': studies_assessed,
                     'compliant_studies': compliant_studies,
-                    'non_compliant_studies': non_compliant_studies
+                    'non_compliant_studies': non_compliant_studies,
+                    'failed_studies': failed_studies,
+                    'pages_failed': fetch_stats.pages_failed if fetch_stats else 0
                 }
             )
 
             summary = {
-                'total_studies': len(assessment_results),
+                'total_studies': studies_assessed,
                 'compliant_studies': compliant_studies,
                 'non_compliant_studies': non_compliant_studies,
-                'output_file': output_file if assessment_results else None,
-                'results': assessment_results
+                'failed_studies': failed_studies,
+                'unchanged_studies': unchanged_studies,
+                'fetch_stats': fetch_stats.to_dict() if fetch_stats else None,
+                'output_file': output_file,
+                'run_id': results_run.run_id if results_run else None,
+                'score_statistics': assessor.stats.to_dict(),
+                'pipeline': [stats.to_dict() for stats in pipeline_stats]
             }
 
             logger.info(f"Compliance assessment completed: {summary}")
@@ -195,12 +340,41 @@ def main(test_mode=False):
             max_studies = 1
             user_id = None  # Skip permission check in test mode
             locale = "en_US"
+            incremental = False
+            no_resume = False
+            source = 'api'
+            workers = 1
+            no_report_cache = True
+            profile_rules = 0.0
+            output_format = None
+            gzip = False
         args = Args()
     else:
         parser = argparse.ArgumentParser(description='HIPAA Compliance Assessment Tool')
         parser.add_argument('--max-studies', type=int, help='Maximum number of studies to assess')
         parser.add_argument('--user-id', help='User ID for audit logging')
         parser.add_argument('--locale', default='en_US', help='Locale for messages')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only assess studies new or changed since the last run')
+        parser.add_argument('--no-resume', action='store_true',
+                            help='Start from the first rank even if a previous fetch was interrupted')
+        parser.add_argument('--source', default='api',
+                            help="'api' to query ClinicalTrials.gov, or path to a local "
+                                 ".json/.ndjson registry dump (optionally .gz)")
+        parser.add_argument('--workers', type=int, default=settings.ASSESSMENT_WORKERS,
+                            help='Processes to validate studies with (1 = in-process)')
+        parser.add_argument('--no-report-cache', action='store_true',
+                            help='Revalidate every study instead of reusing cached reports')
+        parser.add_argument('--profile-rules', type=float, nargs='?', const=1.0,
+                            default=settings.RULE_PROFILE_SAMPLE_RATE, metavar='RATE',
+                            help='Time each compliance rule on this fraction of studies '
+                                 '(default 1.0 when given) and print a per-rule summary')
+
+        parser.add_argument('--output-format', choices=FORMATS,
+                            help=f"Results file format; parquet needs pyarrow "
+                                 f"(default: {settings.RESULTS_OUTPUT['format']})")
+        parser.add_argument('--gzip', action='store_true',
+                            help='Gzip-compress the results file')
 
         args = parser.parse_args()
 
@@ -209,6 +383,8 @@ def main(test_mode=False):
 
     try:
         tool = HIPAAComplianceTool()
+        if args.profile_rules:
+            tool.compliance_validator.enable_profiling(args.profile_rules)
 
         print(f"🏥 {i18n.translate('app_name')}")
         print("=" * 50)
@@ -216,16 +392,57 @@ def main(test_mode=False):
         # Run compliance assessment
         results = tool.run_compliance_assessment(
             user_id=args.user_id,
-            max_studies=args.max_studies
+            max_studies=args.max_studies,
+            incremental=args.incremental,
+            resume=not args.no_resume,
+            source=args.source,
+            workers=args.workers,
+            use_report_cache=not args.no_report_cache,
+            output_format=args.output_format,
+            compress_output=args.gzip or None
         )
 
         print(f"\n📊 Assessment Results:")
         print(f"   Total Studies: {results['total_studies']}")
         print(f"   Compliant: {results['compliant_studies']}")
         print(f"   Non-Compliant: {results['non_compliant_studies']}")
+        if results['failed_studies']:
+            print(f"   Failed (retried next run): {results['failed_studies']}")
+        if args.incremental:
+            print(f"   Unchanged (skipped): {results['unchanged_studies']}")
+
+        fetch_stats = results['fetch_stats'] or {}
+        if fetch_stats.get('pages_failed') or fetch_stats.get('retries'):
+            print(f"   Fetch retries: {fetch_stats['retries']}, "
+                  f"failed pages: {fetch_stats['pages_failed']}")
+        if fetch_stats.get('resumed_from_rank', 1) > 1:
+            print(f"   Resumed from rank: {fetch_stats['resumed_from_rank']}")
 
         if results['output_file']:
             print(f"   Results saved to: {results['output_file']}")
+        if results['run_id']:
+            print(f"   Run ID: {results['run_id']} (compare with scripts/diff_runs.py)")
+
+        stats = RunStatistics.from_dict(results['score_statistics'])
+        if stats.count:
+            print(f"\n📈 Score Distribution (mean {stats.mean_score:.1f}, "
+                  f"median ~{stats.score_quantile(0.5):.1f}):")
+            for line in format_histogram(stats):
+                print(f"   {line}")
+            print("   Most frequent issues:")
+            for rule_id, share in list(stats.rule_frequencies().items())[:5]:
+                print(f"   {rule_id:<24} {share * 100:5.1f}% of studies")
+
+        if results['pipeline']:
+            print("\n🚦 Pipeline Stages:")
+            for line in format_pipeline_stats(results['pipeline']).splitlines():
+                print(f"   {line}")
+
+        if args.profile_rules:
+            rows = rule_profile_summary()
+            if rows:
+                print(f"\n⏱️  Rule Profile (sample rate {args.profile_rules:g}):")
+                print(format_rule_profile(rows))
 
         print(f"\n✅ {i18n.translate('success')}: Assessment completed successfully")
 
@@ -1,36 +1,399 @@
-import requests
+import json
 import time
+import random
+import requests
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import date
+from threading import Lock
+from typing import Dict, List, Any, Iterator, Iterable, Tuple, Optional, Callable
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config import settings
+from src.api.rate_limiter import TokenBucketLimiter
+from src.api.response_cache import ResponseCache
+from src.api.v2_adapter import adapt_v2_study, split_fields
+from src.utils.lazy import LazyInstance
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUS_CODES = (429, 503)
+
+class ThrottledError(requests.HTTPError):
+    """Raised when the API answers 429/503"""
+
+@dataclass
+class FetchStats:
+    """Progress and partial-failure counters for one fetch"""
+    pages_completed: int = 0
+    pages_failed: int = 0
+    retries: int = 0
+    resumed_from_rank: int = 1
+    last_completed_rank: int = 0
+    next_page_token: Optional[str] = None
+    # The last page reached the end of the result set (it was short, or had
+    # no next token), rather than stopping at max_results
+    exhausted: bool = False
+    failed_windows: List[Tuple[int, int]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._lock = Lock()
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def _rank_windows(max_results: int = None, start_rank: int = 1) -> Iterator[Tuple[int, int]]:
+    """Yield (min_rnk, max_rnk) windows from start_rank up to max_results (default MAX_RESULTS)"""
+    max_results = max_results or settings.MAX_RESULTS
+    for min_rnk in range(start_rank, max_results + 1, settings.BATCH_SIZE):
+        yield min_rnk, min(min_rnk + settings.BATCH_SIZE - 1, max_results)
+
+def _is_retryable(error: Exception) -> bool:
+    """Client errors other than throttling will not succeed on retry"""
+    response = getattr(error, 'response', None)
+    if isinstance(error, ThrottledError) or response is None:
+        return True
+    return not 400 <= response.status_code < 500
+
+def _retry_after(response) -> Optional[float]:
+    """Parse a Retry-After header given in seconds"""
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+class ClinicalTrialsClient:
+    """Pooled, rate-limited HTTP client for the ClinicalTrials.gov API"""
+
+    def __init__(self, config: Dict[str, Any] = None, cache: ResponseCache = None):
+        self.config = config or settings.CLINICAL_TRIALS_API
+        self.backend = self.config.get('backend', 'classic')
+        self.timeout = self.config['timeout']
+        self.max_retries = self.config['max_retries']
+        # Shared by every worker so the API sees one polite client
+        self.rate_limiter = TokenBucketLimiter.from_settings(self.config.get('rate_limit', {}))
+        self.session = self._create_session()
+        self.cache = cache
+
+    def _create_session(self) -> requests.Session:
+        """Create a keep-alive session with a connection pool sized for the workers"""
+        # Retries are owned by _with_retries, per page: it covers connection
+        # errors, timeouts, throttling, bad statuses and malformed pages with
+        # one backoff schedule. The adapter itself never retries, so a page is
+        # tried at most max_retries + 1 times.
+        retry_policy = Retry(total=0, read=False, raise_on_status=False)
+        pool_size = max(self.config.get('pool_maxsize', 10), settings.FETCH_WORKERS)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=retry_policy)
+
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0',
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        })
+        return session
+
+    @property
+    def endpoint(self) -> str:
+        """Endpoint of the configured backend"""
+        return self.config['v2_endpoint'] if self.backend == 'v2' else self.config['endpoint']
+
+    def get_json(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET the endpoint, serving from or revalidating against the response cache"""
+        endpoint = self.endpoint
+        key = entry = None
+        headers = {}
+
+        if self.cache is not None:
+            key = ResponseCache.make_key(endpoint, params)
+            entry = self.cache.get(key)
+            if entry is not None and self.cache.is_fresh(entry):
+                self.cache.record_hit(entry)
+                return json.loads(entry.body)
+            if entry is not None and entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry is not None and entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        self.rate_limiter.acquire()
+        response = self.session.get(
+            endpoint,
+            params=params,
+            headers=headers,
+            timeout=self.timeout
+        )
+
+        if response.status_code in THROTTLE_STATUS_CODES:
+            self.rate_limiter.backoff(_retry_after(response))
+            raise ThrottledError(f"API throttled request ({response.status_code})", response=response)
+
+        if response.status_code == 304 and entry is not None:
+            self.rate_limiter.record_success()
+            self.cache.refresh(key)
+            self.cache.record_hit(entry, revalidated=True)
+            return json.loads(entry.body)
+
+        response.raise_for_status()
+        self.rate_limiter.record_success()
+
+        if self.cache is None:
+            return response.json()
+
+        self.cache.record_miss()
+        self.cache.put(key, response.content,
+                       etag=response.headers.get('ETag'),
+                       last_modified=response.headers.get('Last-Modified'))
+        return json.loads(response.content)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter for the given retry attempt (0-based)"""
+        factor = self.config.get('retry_backoff_factor', 0.5)
+        ceiling = min(self.config.get('retry_backoff_max', 30), factor * (2 ** attempt))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def query_params(self, updated_since: date = None, fields: Iterable[str] = None) -> Dict[str, Any]:
+        """Build query params, restricted to studies updated on/after updated_since
+
+        `fields` overrides the configured field list, so callers can request
+        exactly the fields they read.
+        """
+        default_params = dict(self.config['default_params'])
+        if fields:
+            default_params['fields'] = ','.join(fields)
+
+        if self.backend == 'v2':
+            params = {
+                'format': 'json',
+                'query.term': default_params['expr'],
+                'fields': default_params['fields']
+            }
+            if updated_since:
+                params['filter.advanced'] = (
+                    f"AREA[LastUpdatePostDate]RANGE[{updated_since.isoformat()},MAX]"
+                )
+            return params
+
+        params = default_params
+        if updated_since:
+            params['expr'] = (
+                f"{params['expr']} AND "
+                f"AREA[LastUpdatePostDate]RANGE[{updated_since.strftime('%m/%d/%Y')}, MAX]"
+            )
+        return params
 
-def fetch_clinical_trials():
-    """Fetch trials from ClinicalTrials.gov API"""
-    studies = []
-    current_rank = 1
-    
-    while current_rank <= settings.MAX_RESULTS:
+    def _with_retries(self, request: Callable[[], Any], description: str,
+                      stats: FetchStats = None) -> Any:
+        """Run a page request, retrying failures with exponential backoff
+
+        This is the only retry layer: the session's adapter does not retry.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return request()
+            except (requests.RequestException, ValueError, KeyError) as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    raise
+
+                delay = self.backoff_delay(attempt)
+                logger.warning(f"{description} failed ({e}), retrying in {delay:.1f}s")
+                if stats is not None:
+                    stats.record_retry()
+                time.sleep(delay)
+
+    def fetch_window(self, min_rnk: int, max_rnk: int, params: Dict[str, Any] = None,
+                     stats: FetchStats = None) -> List[Dict[str, Any]]:
+        """Fetch one rank window of studies from the classic API"""
         params = {
-            **settings.CLINICAL_TRIALS_API['default_params'],
-            'min_rnk': current_rank,
-            'max_rnk': min(current_rank + settings.BATCH_SIZE - 1, settings.MAX_RESULTS)
+            **(params or self.config['default_params']),
+            'min_rnk': min_rnk,
+            'max_rnk': max_rnk
         }
-        
+        return self._with_retries(
+            lambda: self.get_json(params)['StudyFieldsResponse']['StudyFields'],
+            f"Rank window {min_rnk}-{max_rnk}", stats
+        )
+
+    def fetch_v2_page(self, params: Dict[str, Any], page_size: int, page_token: str = None,
+                      stats: FetchStats = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Fetch one cursor page from the v2 API as classic-shaped studies"""
+        params = {**params, 'pageSize': page_size}
+        if page_token:
+            params['pageToken'] = page_token
+
+        payload = self._with_retries(lambda: self.get_json(params), "v2 page", stats)
+        fields = split_fields(params['fields'])
+        studies = [adapt_v2_study(record, fields) for record in payload.get('studies', [])]
+        return studies, payload.get('nextPageToken')
+
+    def _fetch_page(self, window: Tuple[int, int], params: Dict[str, Any],
+                    stats: FetchStats) -> Tuple:
+        """Fetch a window as (window, studies, next_token, error) without raising"""
         try:
-            response = requests.get(
-                settings.CLINICAL_TRIALS_API['endpoint'],
-                params=params,
-                headers={'User-Agent': 'Mozilla/5.0'},
-                timeout=15
-            )
-            response.raise_for_status()
-            
-            batch_data = response.json()['StudyFieldsResponse']['StudyFields']
-            studies.extend(batch_data)
-            
-            current_rank += settings.BATCH_SIZE
-            time.sleep(settings.DELAY_BETWEEN_BATCHES)
-            
+            return window, self.fetch_window(*window, params, stats), None, None
         except Exception as e:
-            print(f"API Error: {str(e)}")
-            break
-            
-    return studies
+            return window, None, None, e
+
+    def fetch_windows_concurrently(self, windows: Iterator[Tuple[int, int]], workers: int,
+                                   prefetch: int = None, params: Dict[str, Any] = None,
+                                   stats: FetchStats = None) -> Iterator[Tuple]:
+        """Fetch windows on a bounded worker pool, yielding pages in rank order
+
+        At most `prefetch` windows (default: twice the worker count) are in
+        flight or buffered ahead of the consumer.
+        """
+        prefetch = max(1, prefetch or workers * 2)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ctgov') as executor:
+            pending = deque()
+            try:
+                for window in windows:
+                    pending.append(executor.submit(self._fetch_page, window, params, stats))
+                    if len(pending) >= prefetch:
+                        yield pending.popleft().result()
+
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def iter_v2_pages(self, params: Dict[str, Any], max_results: int = None, start_rank: int = 1,
+                      page_token: str = None, stats: FetchStats = None) -> Iterator[Tuple]:
+        """Follow v2 pageToken cursors, yielding (window, studies, next_token, error)
+
+        The next page is requested in the background as soon as its token is
+        known, so it downloads while the caller processes the current page.
+        Cursor pages cannot be skipped, so the first failure ends the fetch.
+        """
+        max_results = max_results or settings.MAX_RESULTS
+        page_size = self.config.get('v2_page_size', 1000)
+        rank = start_rank
+        if rank > max_results:
+            return
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='ctgov-v2') as executor:
+            future = executor.submit(self.fetch_v2_page, params,
+                                     min(page_size, max_results - rank + 1), page_token, stats)
+            while future is not None:
+                try:
+                    studies, next_token = future.result()
+                except Exception as e:
+                    yield (rank, rank + page_size - 1), None, None, e
+                    return
+
+                studies = studies[:max_results - rank + 1]
+                window = (rank, rank + len(studies) - 1)
+                rank += len(studies)
+
+                future = None
+                if next_token and studies and rank <= max_results:
+                    future = executor.submit(self.fetch_v2_page, params,
+                                             min(page_size, max_results - rank + 1), next_token, stats)
+                yield window, studies, next_token, None
+
+    def iter_clinical_trials(self, max_results: int = None, workers: int = None,
+                             prefetch: int = None, updated_since: date = None,
+                             start_rank: int = 1, page_token: str = None, stats: FetchStats = None,
+                             checkpoint: Callable[[int, Optional[str]], None] = None,
+                             fields: Iterable[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield studies in rank order as each page arrives
+
+        With more than one worker, upcoming rank windows are fetched while the
+        caller processes the current page; workers=1 falls back to fetching
+        windows one at a time. The v2 backend follows pageToken cursors
+        instead of rank windows. updated_since limits the query to studies
+        whose LastUpdatePostDate is on or after that date, and `fields`
+        replaces the configured field list.
+
+        Pages that still fail after retries are skipped and recorded in
+        `stats`, and stats.exhausted tells whether the last page ended the
+        result set or the fetch stopped at max_results.
+
+        `checkpoint` is called with the last rank of every page (and, for
+        v2, the token of the next page) once the caller has read all of its
+        studies, as long as no earlier page failed. A caller that queues
+        studies for later processing should persist the cursor (passed back
+        as start_rank/page_token) only once they are processed; see
+        state_manager.FetchProgress.
+        """
+        workers = settings.FETCH_WORKERS if workers is None else workers
+        stats = stats if stats is not None else FetchStats()
+        stats.resumed_from_rank = start_rank
+        stats.last_completed_rank = start_rank - 1
+        params = self.query_params(updated_since, fields)
+
+        if self.backend == 'v2':
+            pages = self.iter_v2_pages(params, max_results, start_rank, page_token, stats)
+        elif workers > 1:
+            pages = self.fetch_windows_concurrently(_rank_windows(max_results, start_rank),
+                                                    workers, prefetch, params, stats)
+        else:
+            pages = (self._fetch_page(window, params, stats)
+                     for window in _rank_windows(max_results, start_rank))
+
+        contiguous = True
+        try:
+            for (min_rnk, max_rnk), batch_data, next_token, error in pages:
+                if error is not None:
+                    logger.error(f"API Error: rank window {min_rnk}-{max_rnk} skipped: {error}")
+                    stats.pages_failed += 1
+                    stats.failed_windows.append((min_rnk, max_rnk))
+                    contiguous = False
+                    continue
+
+                yield from batch_data
+                stats.pages_completed += 1
+                if self.backend == 'v2':
+                    stats.exhausted = not next_token
+                else:
+                    stats.exhausted = len(batch_data) < max_rnk - min_rnk + 1
+
+                if contiguous:
+                    stats.last_completed_rank = max_rnk
+                    stats.next_page_token = next_token
+                    if checkpoint:
+                        checkpoint(max_rnk, next_token)
+        finally:
+            pages.close()
+
+    def fetch_clinical_trials(self, workers: int = None) -> List[Dict[str, Any]]:
+        """Fetch trials from ClinicalTrials.gov API into a list"""
+        return list(self.iter_clinical_trials(workers=workers))
+
+    def query_fingerprint(self, updated_since: date = None, fields: Iterable[str] = None) -> str:
+        """Identify a query so a saved cursor is only reused for the same query"""
+        return ResponseCache.make_key(self.endpoint, self.query_params(updated_since, fields))
+
+    def close(self):
+        """Release pooled connections"""
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+# Module-level client so every caller reuses the same connection pool;
+# the session and cache are set up by the first request
+client: ClinicalTrialsClient = LazyInstance(lambda: ClinicalTrialsClient(cache=ResponseCache.from_settings()))
+
+def fetch_clinical_trials(workers: int = None) -> List[Dict[str, Any]]:
+    """Fetch trials from ClinicalTrials.gov API using the shared client"""
+    return client.fetch_clinical_trials(workers=workers)
+
+def iter_clinical_trials(max_results: int = None, workers: int = None, prefetch: int = None,
+                         updated_since: date = None, start_rank: int = 1, page_token: str = None,
+                         stats: FetchStats = None,
+                         checkpoint: Callable[[int, Optional[str]], None] = None,
+                         fields: Iterable[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream trials from ClinicalTrials.gov API using the shared client"""
+    return client.iter_clinical_trials(max_results=max_results, workers=workers,
+                                       prefetch=prefetch, updated_since=updated_since,
+                                       start_rank=start_rank, page_token=page_token,
+                                       stats=stats, checkpoint=checkpoint, fields=fields)
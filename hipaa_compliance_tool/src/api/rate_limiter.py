@@ -0,0 +1,67 @@
+# src/api/rate_limiter.py
+import time
+from threading import Lock
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenBucketLimiter:
+    """Thread-safe token bucket shared by all workers talking to one API"""
+
+    def __init__(self, rate: float, burst: int = 1, min_rate: float = None):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = float(min_rate) if min_rate else self.max_rate / 10
+        self.capacity = max(1, int(burst))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = Lock()
+
+    def acquire(self):
+        """Block until a request token is available"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+
+            time.sleep(wait)
+
+    def backoff(self, retry_after: Optional[float] = None):
+        """Halve the request rate after a throttling response (429/503)"""
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+            logger.warning(f"API throttled, reducing request rate to {self.rate:.2f}/s")
+
+    def record_success(self):
+        """Recover the request rate gradually after successful responses"""
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+
+    def _refill(self, now: float):
+        """Add tokens accrued since the last update"""
+        elapsed = now - self.updated
+        self.updated = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+
+    @classmethod
+    def from_settings(cls, config: dict) -> 'TokenBucketLimiter':
+        """Build a limiter from a CLINICAL_TRIALS_API style 'rate_limit' dict"""
+        return cls(
+            rate=config.get('requests_per_second', 2),
+            burst=config.get('burst', 1),
+            min_rate=config.get('min_requests_per_second')
+        )
@@ -0,0 +1,177 @@
+# src/api/response_cache.py
+import json
+import time
+import sqlite3
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Any, Optional
+import logging
+
+from config import settings
+from src.monitoring.metrics import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CacheEntry:
+    """Cached API response body with its revalidation headers"""
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+class ResponseCache:
+    """SQLite-backed response cache with TTL, LRU eviction and HTTP revalidation
+
+    Lookups only note their access time in memory; the times are written
+    with the next put, refresh or close, so a warm run does not commit
+    once per cached page. Eviction sees every lookup made before it.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int = 21600, max_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.lock = Lock()
+        self._conn = None
+        self._accessed: Dict[str, float] = {}
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Open the cache database on first use"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    stored_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> str:
+        """Build a stable key from the endpoint and normalized query params"""
+        normalized = {}
+        for name, value in params.items():
+            if name == 'fields':
+                value = ','.join(sorted(field.strip() for field in str(value).split(',') if field.strip()))
+            elif name == 'expr':
+                value = ' '.join(str(value).split())
+            normalized[name] = str(value)
+
+        raw = json.dumps({'endpoint': endpoint.rstrip('/'), 'params': normalized}, sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Look up an entry, marking it as recently used"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._accessed[key] = time.time()
+            return CacheEntry(body=row[0], etag=row[1], last_modified=row[2], stored_at=row[3])
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Check whether an entry can be served without contacting the server"""
+        return time.time() - entry.stored_at < self.ttl_seconds
+
+    def put(self, key: str, body: bytes, etag: str = None, last_modified: str = None):
+        """Store a response body and evict least recently used entries over budget"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(body), etag, last_modified, now, now, len(body))
+            )
+            self._accessed.pop(key, None)
+            self._write_access_times()
+            self._evict()
+            self.conn.commit()
+
+        metrics_collector.increment_counter('api_cache_bytes_written', len(body))
+
+    def refresh(self, key: str):
+        """Restart the TTL of an entry the server confirmed unchanged (304)"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key)
+            )
+            self._accessed.pop(key, None)
+            self._write_access_times()
+            self.conn.commit()
+
+    def record_hit(self, entry: CacheEntry, revalidated: bool = False):
+        """Record a response served from cache"""
+        metrics_collector.increment_counter('api_cache_hits')
+        metrics_collector.increment_counter('api_cache_bytes_read', len(entry.body))
+        if revalidated:
+            metrics_collector.increment_counter('api_cache_revalidated')
+
+    def record_miss(self):
+        """Record a response that had to be downloaded"""
+        metrics_collector.increment_counter('api_cache_misses')
+
+    def clear(self):
+        """Remove every cached response"""
+        with self.lock:
+            self._accessed.clear()
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            if self._conn is not None:
+                self._write_access_times()
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+    def _write_access_times(self):
+        """Apply the access times noted by get(); the caller commits"""
+        if self._accessed:
+            self.conn.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._accessed.items()]
+            )
+            self._accessed.clear()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        logger.debug(f"Evicted {len(evicted)} cached responses")
+
+    @classmethod
+    def from_settings(cls, config: Dict[str, Any] = None) -> Optional['ResponseCache']:
+        """Build the cache from settings.RESPONSE_CACHE, or None when disabled"""
+        config = config or settings.RESPONSE_CACHE
+        if not config.get('enabled', True):
+            return None
+        return cls(config['path'], ttl_seconds=config['ttl_seconds'], max_bytes=config['max_bytes'])
@@ -0,0 +1,54 @@
+# src/api/v2_adapter.py
+from typing import Dict, List, Any, Iterable, Tuple
+
+# Classic study_fields names -> location in a v2 study record. Lists met on
+# the way (officials, locations, contacts) are flattened in order, matching
+# the classic API which returns every field as a list of strings.
+V2_FIELD_PATHS: Dict[str, Tuple[str, ...]] = {
+    'NCTId': ('protocolSection', 'identificationModule', 'nctId'),
+    'BriefTitle': ('protocolSection', 'identificationModule', 'briefTitle'),
+    'OfficialTitle': ('protocolSection', 'identificationModule', 'officialTitle'),
+    'OverallStatus': ('protocolSection', 'statusModule', 'overallStatus'),
+    'StudyFirstSubmitDate': ('protocolSection', 'statusModule', 'studyFirstSubmitDate'),
+    'LastUpdatePostDate': ('protocolSection', 'statusModule', 'lastUpdatePostDateStruct', 'date'),
+    'CompletionDate': ('protocolSection', 'statusModule', 'completionDateStruct', 'date'),
+    'CentralContactName': ('protocolSection', 'contactsLocationsModule', 'centralContacts', 'name'),
+    'CentralContactPhone': ('protocolSection', 'contactsLocationsModule', 'centralContacts', 'phone'),
+    'CentralContactEMail': ('protocolSection', 'contactsLocationsModule', 'centralContacts', 'email'),
+    'OverallOfficialName': ('protocolSection', 'contactsLocationsModule', 'overallOfficials', 'name'),
+    'OverallOfficialAffiliation': ('protocolSection', 'contactsLocationsModule', 'overallOfficials', 'affiliation'),
+    'LocationContactName': ('protocolSection', 'contactsLocationsModule', 'locations', 'contacts', 'name'),
+    'LocationContactPhone': ('protocolSection', 'contactsLocationsModule', 'locations', 'contacts', 'phone'),
+    'LocationContactEMail': ('protocolSection', 'contactsLocationsModule', 'locations', 'contacts', 'email'),
+    'LargeDocHasICF': ('documentSection', 'largeDocumentModule', 'largeDocs', 'hasIcf'),
+}
+
+def _extract(node: Any, path: Tuple[str, ...]) -> List[str]:
+    """Collect the values at path, flattening any lists along the way"""
+    if isinstance(node, list):
+        return [value for item in node for value in _extract(item, path)]
+    if not path:
+        if isinstance(node, bool):
+            # Classic API spells booleans as Yes/No
+            return ['Yes' if node else 'No']
+        return [] if node is None else [str(node)]
+    if not isinstance(node, dict) or path[0] not in node:
+        return []
+    return _extract(node[path[0]], path[1:])
+
+def adapt_v2_study(record: Dict[str, Any], fields: Iterable[str] = None) -> Dict[str, List[str]]:
+    """Map a v2 study record into the classic dict-of-lists shape
+
+    Like the classic API, every requested field is present, with an empty
+    list when the study has no value for it.
+    """
+    fields = fields or V2_FIELD_PATHS.keys()
+    return {
+        name: _extract(record, V2_FIELD_PATHS[name])
+        for name in fields
+        if name in V2_FIELD_PATHS
+    }
+
+def split_fields(fields: str) -> List[str]:
+    """Split a comma-separated field list"""
+    return [name.strip() for name in fields.split(',') if name.strip()]
@@ -0,0 +1,194 @@
+# src/compliance/assessment.py
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
+import logging
+
+from config import settings
+from src.compliance.validator import HIPAAComplianceValidator, ComplianceReport
+from src.compliance.report_cache import ReportCache
+from src.compliance.results_store import ResultsRun
+from src.compliance.run_stats import RunStatistics
+from src.data import processor
+from src.data.result_sink import ResultSink
+from src.data.study import Study
+from src.monitoring.metrics import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+Assessment = Tuple[Dict[str, Any], ComplianceReport]
+
+def assess_study(validator: HIPAAComplianceValidator, study: Study,
+                 report: ComplianceReport = None) -> Optional[Assessment]:
+    """Validate one study (unless a cached report is given) and count its contacts
+
+    Returns the results row and its report, or None if assessment failed.
+    """
+    study_id = study.nct_id or 'Unknown'
+    try:
+        compliance_report = report or validator.validate_study_compliance(study)
+        contacts = processor.extract_contact_info(study)
+    except Exception as e:
+        logger.error(f"Error assessing study {study_id}: {e}")
+        return None
+
+    # Score distribution, statuses and rule frequencies: see RunStatistics
+    metrics_collector.increment_counter('studies_assessed')
+
+    result = {
+        'study_id': study_id,
+        'title': study.brief_title or 'Unknown',
+        'compliance_status': compliance_report.overall_status.value,
+        'compliance_score': compliance_report.score,
+        'issues_count': len(compliance_report.issues),
+        'contacts': len(contacts['pi_emails'] + contacts['central_contacts']),
+        'assessment_date': compliance_report.assessment_date.isoformat()
+    }
+    return result, compliance_report
+
+# Per-process validator, built once by the pool initializer
+_worker_validator: Optional[HIPAAComplianceValidator] = None
+
+def _init_worker(enabled_rules: List[str], ruleset_path: str, profile_sample_rate: float):
+    global _worker_validator
+    _worker_validator = HIPAAComplianceValidator(enabled_rules, ruleset_path=ruleset_path,
+                                                 profile_sample_rate=profile_sample_rate)
+    # Forked workers inherit the parent's metrics; start from zero
+    metrics_collector.drain()
+
+def _assess_chunk(studies: List[Study]) -> Tuple[List[Optional[Assessment]], Dict[str, Any], Dict[str, Any]]:
+    """Worker task: assessments in input order, the metrics they recorded
+    and their run statistics"""
+    assessments = [assess_study(_worker_validator, study) for study in studies]
+    stats = RunStatistics()
+    for assessment in assessments:
+        if assessment:
+            stats.add(assessment[1])
+    _worker_validator.flush_profile()
+    return assessments, metrics_collector.drain(), stats.to_dict()
+
+class StudyAssessor:
+    """Assess a stream of studies in-process or across a process pool
+
+    With workers > 1, studies are dispatched in chunks to amortize IPC and
+    at most two chunks per worker are in flight, so the input stream is
+    still consumed incrementally. Results come back in input order and
+    worker metrics are merged into the parent's metrics_collector.
+
+    With a report cache, studies whose rule inputs are unchanged since a
+    previous run reuse their stored report and are never dispatched.
+
+    With a results_run, every assessment is also recorded in the results
+    store for run-over-run diffs, and with a result_sink it is written to
+    the run's output file together with its report's issues.
+
+    `stats` aggregates every successful assessment (score histogram,
+    statuses, rule frequencies); pool workers aggregate their chunks and
+    the parent merges them. The aggregates and any per-rule profiles are
+    published to metrics_collector when the assessor exits.
+    """
+
+    def __init__(self, validator: HIPAAComplianceValidator, enabled_rules: List[str] = None,
+                 workers: int = None, chunk_size: int = None, report_cache: ReportCache = None,
+                 results_run: ResultsRun = None, result_sink: ResultSink = None):
+        self.validator = validator
+        self.enabled_rules = enabled_rules
+        self.workers = max(1, workers or settings.ASSESSMENT_WORKERS)
+        self.chunk_size = chunk_size or settings.ASSESSMENT_CHUNK_SIZE
+        self.report_cache = report_cache
+        self.results_run = results_run
+        self.result_sink = result_sink
+        self.stats = RunStatistics()
+        self.pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> 'StudyAssessor':
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.enabled_rules, self.validator.ruleset_path,
+                          self.validator.profile_sample_rate)
+            )
+            logger.info(f"Assessing studies across {self.workers} worker processes")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.pool:
+            self.pool.shutdown(cancel_futures=exc_type is not None)
+            self.pool = None
+        self.validator.flush_profile()
+        self.stats.publish()
+        if self.report_cache:
+            self.report_cache.flush()
+
+    def assess(self, studies: Iterable[Study]) -> Iterator[Tuple[Study, Optional[Dict[str, Any]]]]:
+        """Yield (study, result) pairs in input order; result is None on failure
+
+        Studies are read ahead in chunks (up to workers * 2 chunks with a
+        pool), so reading a study does not mean it is done: callers that
+        track progress, like the fetch cursor, must count yielded pairs.
+        """
+        studies = iter(studies)
+        if not self.pool:
+            # Chunk only to batch cache lookups
+            while chunk := list(islice(studies, self.chunk_size if self.report_cache else 1)):
+                for study, (key, cached) in zip(chunk, self._lookup(chunk)):
+                    assessment = assess_study(self.validator, study, cached)
+                    self._store(study, key, cached, assessment)
+                    if assessment:
+                        self.stats.add(assessment[1])
+                    yield study, assessment[0] if assessment else None
+            return
+
+        pending = deque()
+        max_pending = self.workers * 2
+
+        while True:
+            while len(pending) < max_pending:
+                chunk = list(islice(studies, self.chunk_size))
+                if not chunk:
+                    break
+                lookups = self._lookup(chunk)
+                misses = [study for study, (_, cached) in zip(chunk, lookups) if cached is None]
+                future = self.pool.submit(_assess_chunk, misses) if misses else None
+                pending.append((chunk, lookups, future))
+
+            if not pending:
+                return
+
+            chunk, lookups, future = pending.popleft()
+            computed = iter(())
+            if future is not None:
+                assessments, worker_metrics, worker_stats = future.result()
+                metrics_collector.merge(worker_metrics)
+                self.stats.merge(worker_stats)
+                computed = iter(assessments)
+
+            for study, (key, cached) in zip(chunk, lookups):
+                if cached:
+                    assessment = assess_study(self.validator, study, cached)
+                    if assessment:
+                        self.stats.add(cached)
+                else:
+                    assessment = next(computed)
+                self._store(study, key, cached, assessment)
+                yield study, assessment[0] if assessment else None
+
+    def _lookup(self, chunk: List[Study]) -> List[Tuple[Optional[str], Optional[ComplianceReport]]]:
+        """Cache key and stored report for each study, if caching is on"""
+        if not self.report_cache:
+            return [(None, None)] * len(chunk)
+        keys = [self.report_cache.make_key(self.validator, study) for study in chunk]
+        cached = self.report_cache.get_many(keys)
+        return [(key, cached.get(key)) for key in keys]
+
+    def _store(self, study: Study, key: Optional[str], cached: Optional[ComplianceReport],
+               assessment: Optional[Assessment]):
+        """Persist a freshly computed report and record the assessment"""
+        if key and cached is None and assessment:
+            self.report_cache.put(key, assessment[1], self.validator.report_valid_until(study))
+        if self.results_run and assessment:
+            self.results_run.add(*assessment)
+        if self.result_sink and assessment:
+            self.result_sink.write(*assessment)
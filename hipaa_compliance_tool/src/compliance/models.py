@@ -0,0 +1,56 @@
+# src/compliance/models.py
+from datetime import datetime
+from typing import Tuple, Any, Mapping
+from dataclasses import dataclass
+from enum import Enum
+
+class ComplianceLevel(Enum):
+    """HIPAA compliance levels"""
+    COMPLIANT = "compliant"
+    WARNING = "warning"
+    NON_COMPLIANT = "non_compliant"
+    UNKNOWN = "unknown"
+
+class FrozenDetails(dict):
+    """Read-only issue details, safe to share between reports
+
+    Still a dict, so json.dumps and equality with plain dicts work. Hashable
+    (list values hash as tuples), so issues holding them are too.
+    """
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("ComplianceIssue details are read-only")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __hash__(self):
+        return hash(frozenset((name, tuple(value) if isinstance(value, list) else value)
+                              for name, value in self.items()))
+
+    def __reduce__(self):
+        return (FrozenDetails, (dict(self),))
+
+@dataclass(frozen=True, slots=True)
+class ComplianceIssue:
+    """Represents a compliance issue
+
+    Issues are immutable; rules without per-study details return one shared
+    instance for every study they flag.
+    """
+    rule_id: str
+    severity: ComplianceLevel
+    description: str
+    recommendation: str
+    affected_field: str = None
+    details: Mapping[str, Any] = None
+
+@dataclass(frozen=True, slots=True)
+class ComplianceReport:
+    """Compliance assessment report"""
+    study_id: str
+    overall_status: ComplianceLevel
+    issues: Tuple[ComplianceIssue, ...]
+    assessment_date: datetime
+    recommendations: Tuple[str, ...]  # interned; identical across reports with the same findings
+    score: float  # 0-100 compliance score
@@ -0,0 +1,222 @@
+# src/compliance/report_cache.py
+import json
+import time
+import sqlite3
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+
+from config import settings
+from src.compliance.validator import (
+    HIPAAComplianceValidator, ComplianceReport, ComplianceIssue, ComplianceLevel
+)
+from src.compliance.models import FrozenDetails
+from src.data.study import Study, FIELD_MAP
+from src.monitoring.metrics import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+# Writes and recency updates are applied in batches; a run assesses
+# thousands of studies
+COMMIT_EVERY = 500
+
+# Value -> member without going through Enum.__call__ for every issue
+_LEVELS = {level.value: level for level in ComplianceLevel}
+
+def _encode_report(report: ComplianceReport) -> str:
+    """Compact positional JSON; decoding arrays is much cheaper than dicts"""
+    return json.dumps([
+        report.study_id,
+        report.overall_status.value,
+        report.assessment_date.isoformat(),
+        report.score,
+        report.recommendations,
+        [[issue.rule_id, issue.severity.value, issue.description, issue.recommendation,
+          issue.affected_field, issue.details] for issue in report.issues]
+    ], separators=(',', ':'))
+
+# Decoded recommendation lists and issues with only scalar details, shared
+# between reports like the validator's own
+_interned: Dict[Any, Any] = {}
+MAX_INTERNED = 4096
+
+def _intern(key, value=None):
+    """Shared instance for key, storing value (or key itself) on first sight"""
+    shared = _interned.get(key)
+    if shared is None:
+        if len(_interned) >= MAX_INTERNED:
+            _interned.clear()
+        shared = _interned[key] = key if value is None else value
+    return shared
+
+def _decode_issue(rule_id, severity, description, recommendation, affected_field, details) -> ComplianceIssue:
+    key = (rule_id, severity, description, recommendation, affected_field,
+           tuple(details.items()) if details else None)
+    try:
+        hash(key)
+    except TypeError:
+        # List-valued details are study-specific
+        return ComplianceIssue(rule_id, _LEVELS[severity], description, recommendation, affected_field,
+                               FrozenDetails(details))
+    return _intern(key, ComplianceIssue(rule_id, _LEVELS[severity], description, recommendation, affected_field,
+                                        FrozenDetails(details) if details else details))
+
+def _decode_report(body: str) -> ComplianceReport:
+    study_id, status, assessment_date, score, recommendations, issues = json.loads(body)
+    return ComplianceReport(
+        study_id=study_id,
+        overall_status=_LEVELS[status],
+        issues=tuple(_decode_issue(*issue) for issue in issues),
+        assessment_date=datetime.fromisoformat(assessment_date),
+        recommendations=_intern(tuple(recommendations)),
+        score=score
+    )
+
+class ReportCache:
+    """SQLite-backed ComplianceReport cache with LRU eviction
+
+    Entries are content-addressed: the key hashes the ruleset version with
+    the values of every field the enabled rules read, so a changed study
+    or a changed rule definition simply misses. Reused reports keep the
+    assessment_date of the evaluation that produced them. Entries whose
+    verdict depends on the current date carry a valid_until and miss once
+    it passes. The size budget is enforced when the cache is flushed at the
+    end of a run.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.lock = Lock()
+        self._conn = None
+        self._uncommitted = 0
+        self._touched: List[Tuple[float, str]] = []
+        self._key_fields: Dict[str, list] = {}
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Open the cache database on first use"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    key TEXT PRIMARY KEY,
+                    report TEXT NOT NULL,
+                    valid_until REAL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reports_accessed ON reports (accessed_at)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def make_key(self, validator: HIPAAComplianceValidator, study: Study) -> str:
+        """Hash of the ruleset version and the study fields the rules read"""
+        key_fields = self._key_fields.get(validator.ruleset_version)
+        if key_fields is None:
+            key_fields = [(field, FIELD_MAP[field][0]) for field in validator.required_fields(['NCTId'])]
+            self._key_fields[validator.ruleset_version] = key_fields
+
+        # Values are strings, None or tuples of strings, so repr is stable
+        values = tuple(getattr(study, attribute) for _, attribute in key_fields)
+        raw = repr((validator.ruleset_version, tuple(field for field, _ in key_fields), values))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[ComplianceReport]:
+        """Look up a still-valid report, marking it as recently used"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, ComplianceReport]:
+        """Look up many keys in one query; missing or expired keys are absent"""
+        now = time.time()
+        with self.lock:
+            placeholders = ','.join('?' * len(keys))
+            rows = self.conn.execute(
+                f"SELECT key, report FROM reports WHERE key IN ({placeholders}) "
+                f"AND (valid_until IS NULL OR valid_until > ?)",
+                (*keys, now)
+            ).fetchall()
+            self._touched.extend((now, key) for key, _ in rows)
+            self._maybe_commit(len(rows))
+
+        metrics_collector.increment_counter('report_cache_hits', len(rows))
+        metrics_collector.increment_counter('report_cache_misses', len(keys) - len(rows))
+        return {key: _decode_report(body) for key, body in rows}
+
+    def put(self, key: str, report: ComplianceReport, valid_until: datetime = None):
+        """Store a report; the size budget is enforced on flush"""
+        body = _encode_report(report)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?)",
+                (key, body, valid_until.timestamp() if valid_until else None, time.time(), len(body))
+            )
+            self._maybe_commit()
+
+    def flush(self):
+        """Commit pending writes and enforce the size budget (once per run)"""
+        with self.lock:
+            if self._conn is not None:
+                self._commit()
+                self._evict()
+                self._conn.commit()
+
+    def clear(self):
+        """Remove every cached report"""
+        with self.lock:
+            self.conn.execute("DELETE FROM reports")
+            self.conn.commit()
+
+    def close(self):
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _maybe_commit(self, writes: int = 1):
+        self._uncommitted += writes
+        if self._uncommitted >= COMMIT_EVERY:
+            self._commit()
+
+    def _commit(self):
+        """Apply batched recency updates and commit"""
+        if self._touched:
+            self.conn.executemany("UPDATE reports SET accessed_at = ? WHERE key = ?", self._touched)
+            self._touched = []
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        self.conn.execute("DELETE FROM reports WHERE valid_until IS NOT NULL AND valid_until <= ?",
+                          (time.time(),))
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM reports").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in self.conn.execute("SELECT key, size FROM reports ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+
+        self.conn.executemany("DELETE FROM reports WHERE key = ?", evicted)
+        logger.debug(f"Evicted {len(evicted)} cached reports")
+
+    @classmethod
+    def from_settings(cls, config: Dict[str, Any] = None) -> Optional['ReportCache']:
+        """Build the cache from settings.REPORT_CACHE, or None when disabled"""
+        config = config or settings.REPORT_CACHE
+        if not config.get('enabled', True):
+            return None
+        return cls(config['path'], max_bytes=config['max_bytes'])
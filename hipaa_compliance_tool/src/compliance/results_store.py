@@ -0,0 +1,261 @@
+# src/compliance/results_store.py
+import sqlite3
+from datetime import datetime
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+
+from config import settings
+from src.compliance.models import ComplianceReport
+
+logger = logging.getLogger(__name__)
+
+# Inserts are committed in batches; a run records thousands of studies
+COMMIT_EVERY = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    source TEXT,
+    incremental INTEGER NOT NULL DEFAULT 0,
+    studies INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS results (
+    study_id TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    score REAL NOT NULL,
+    issues_count INTEGER NOT NULL,
+    PRIMARY KEY (study_id, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_results_run ON results (run_id, study_id);
+CREATE TABLE IF NOT EXISTS result_issues (
+    study_id TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    rule_id TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    PRIMARY KEY (study_id, run_id, rule_id)
+) WITHOUT ROWID;
+"""
+
+# For every study assessed after run `since` up to run `until`: the run of
+# its latest result as of `since` and as of `until`. Incremental runs only
+# record changed studies, so "as of" is the latest run at or before the
+# bound, found by a (study_id, run_id) primary key seek per study.
+PAIRS = """
+WITH touched AS (
+    SELECT DISTINCT study_id FROM results WHERE run_id > :since AND run_id <= :until
+), pairs AS (
+    SELECT study_id,
+           (SELECT run_id FROM results r WHERE r.study_id = t.study_id AND r.run_id <= :since
+            ORDER BY run_id DESC LIMIT 1) AS old_run,
+           (SELECT run_id FROM results r WHERE r.study_id = t.study_id AND r.run_id <= :until
+            ORDER BY run_id DESC LIMIT 1) AS new_run
+    FROM touched t
+)
+"""
+
+CHANGED_STUDIES = PAIRS + """
+SELECT p.study_id, p.old_run, p.new_run, o.status, n.status, o.score, n.score
+FROM pairs p
+JOIN results n ON n.study_id = p.study_id AND n.run_id = p.new_run
+LEFT JOIN results o ON o.study_id = p.study_id AND o.run_id = p.old_run
+"""
+
+CHANGED_ISSUES = PAIRS + """
+SELECT p.study_id, i.run_id, i.rule_id
+FROM pairs p
+JOIN result_issues i ON i.study_id = p.study_id AND i.run_id IN (p.old_run, p.new_run)
+"""
+
+@dataclass
+class StudyChange:
+    """How one study's assessment differs between two runs"""
+    study_id: str
+    old_status: Optional[str]  # None for a study first assessed after the baseline run
+    new_status: str
+    old_score: Optional[float]
+    new_score: float
+    added_issues: List[str]
+    resolved_issues: List[str]
+
+    @property
+    def is_new(self) -> bool:
+        return self.old_status is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'study_id': self.study_id,
+            'old_status': self.old_status,
+            'new_status': self.new_status,
+            'old_score': self.old_score,
+            'new_score': self.new_score,
+            'added_issues': self.added_issues,
+            'resolved_issues': self.resolved_issues
+        }
+
+class ResultsRun:
+    """Writer for one run's results; get one from ResultsStore.start_run()"""
+
+    def __init__(self, store: 'ResultsStore', run_id: int):
+        self.store = store
+        self.run_id = run_id
+        self.studies = 0
+
+    def add(self, result: Dict[str, Any], report: ComplianceReport):
+        """Record one study's result row and the rules it failed"""
+        self.store._add(self.run_id, result, report)
+        self.studies += 1
+
+    def finish(self):
+        """Mark the run finished and commit its results"""
+        self.store._finish(self.run_id, self.studies)
+
+class ResultsStore:
+    """SQLite history of assessment results across runs
+
+    Every run records each assessed study's status, score and failed rule
+    ids, keyed by (study_id, run_id). diff() reports what changed between
+    two runs by index lookups over the studies assessed in between, so its
+    cost does not grow with the length of the history.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.lock = Lock()
+        self._conn = None
+        self._uncommitted = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Open the results database on first use"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+        return self._conn
+
+    def start_run(self, source: str = None, incremental: bool = False,
+                  started_at: datetime = None) -> ResultsRun:
+        """Register a new run and return a writer for its results"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (started_at, source, incremental) VALUES (?, ?, ?)",
+                ((started_at or datetime.utcnow()).isoformat(), source, int(incremental))
+            )
+            self.conn.commit()
+        return ResultsRun(self, cursor.lastrowid)
+
+    def _add(self, run_id: int, result: Dict[str, Any], report: ComplianceReport):
+        study_id = result['study_id']
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (study_id, run_id, result['compliance_status'], result['compliance_score'],
+                 result['issues_count'])
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO result_issues VALUES (?, ?, ?, ?)",
+                [(study_id, run_id, issue.rule_id, issue.severity.value) for issue in report.issues]
+            )
+            self._uncommitted += 1
+            if self._uncommitted >= COMMIT_EVERY:
+                self.conn.commit()
+                self._uncommitted = 0
+
+    def _finish(self, run_id: int, studies: int):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE runs SET finished_at = ?, studies = ? WHERE run_id = ?",
+                (datetime.utcnow().isoformat(), studies, run_id)
+            )
+            self.conn.commit()
+            self._uncommitted = 0
+
+    def runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent runs first"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT run_id, started_at, finished_at, source, incremental, studies "
+                "FROM runs ORDER BY run_id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {'run_id': run_id, 'started_at': started_at, 'finished_at': finished_at,
+             'source': source, 'incremental': bool(incremental), 'studies': studies}
+            for run_id, started_at, finished_at, source, incremental, studies in rows
+        ]
+
+    def latest_runs(self, count: int = 2) -> List[int]:
+        """Ids of the most recent finished runs, newest first"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT run_id FROM runs WHERE finished_at IS NOT NULL ORDER BY run_id DESC LIMIT ?",
+                (count,)
+            ).fetchall()
+        return [run_id for run_id, in rows]
+
+    def previous_run(self, run_id: int) -> Optional[int]:
+        """The finished run before run_id, if any"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MAX(run_id) FROM runs WHERE run_id < ? AND finished_at IS NOT NULL", (run_id,)
+            ).fetchone()
+        return row[0]
+
+    def diff(self, since_run: int = None, until_run: int = None) -> List[StudyChange]:
+        """Studies whose status, score or failed rules changed between two runs
+
+        Defaults to the latest finished run against the one before it.
+        Studies first assessed after since_run are included as new
+        (old_status None).
+        """
+        if until_run is None:
+            latest = self.latest_runs(1)
+            if not latest:
+                return []
+            until_run = latest[0]
+        if since_run is None:
+            since_run = self.previous_run(until_run) or 0
+
+        params = {'since': since_run, 'until': until_run}
+        with self.lock:
+            studies = self.conn.execute(CHANGED_STUDIES, params).fetchall()
+            issues = self.conn.execute(CHANGED_ISSUES, params).fetchall() if studies else []
+
+        rules: Dict[Tuple[str, int], List[str]] = {}
+        for study_id, run_id, rule_id in issues:
+            rules.setdefault((study_id, run_id), []).append(rule_id)
+
+        changes = []
+        for study_id, old_run, new_run, old_status, new_status, old_score, new_score in studies:
+            old_rules = rules.get((study_id, old_run), [])
+            new_rules = rules.get((study_id, new_run), [])
+            added = sorted(set(new_rules) - set(old_rules))
+            resolved = sorted(set(old_rules) - set(new_rules))
+            if old_run is None or old_status != new_status or old_score != new_score or added or resolved:
+                changes.append(StudyChange(study_id, old_status, new_status, old_score, new_score,
+                                           added, resolved))
+        changes.sort(key=lambda change: change.study_id)
+        return changes
+
+    def close(self):
+        if self._conn is not None:
+            with self.lock:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+    @classmethod
+    def from_settings(cls, config: Dict[str, Any] = None) -> Optional['ResultsStore']:
+        """Build the store from settings.RESULTS_STORE, or None when disabled"""
+        config = config or settings.RESULTS_STORE
+        if not config.get('enabled', True):
+            return None
+        return cls(config['path'])
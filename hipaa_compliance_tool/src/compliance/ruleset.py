@@ -0,0 +1,397 @@
+# src/compliance/ruleset.py
+import re
+import json
+import math
+import hashlib
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from operator import attrgetter
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple, Callable, Union, TYPE_CHECKING
+import logging
+import importlib
+
+from src.compliance.models import ComplianceLevel, ComplianceIssue, FrozenDetails
+from src.data.dates import parse_registry_date, today
+from src.data.study import Study, FIELD_MAP, DATE_ATTRIBUTES
+from src.utils.lazy import LazyInstance
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    # Only batch() needs numpy; see src/compliance/validator.py
+    np = LazyInstance(lambda: importlib.import_module('numpy'))
+
+logger = logging.getLogger(__name__)
+
+# Score penalty per issue severity when a ruleset does not set its own
+DEFAULT_PENALTIES = {
+    ComplianceLevel.NON_COMPLIANT: 30,
+    ComplianceLevel.WARNING: 10,
+    ComplianceLevel.UNKNOWN: 5
+}
+
+class RulesetError(ValueError):
+    """Raised for a malformed ruleset definition"""
+
+@lru_cache(maxsize=16384)
+def parse_date(value: str, date_format: str) -> Optional[datetime]:
+    """Parse a date with an explicit strptime format; None when malformed
+
+    Dates repeat heavily across studies, so parses are memoized.
+    """
+    try:
+        return datetime.strptime(value, date_format)
+    except (TypeError, ValueError):
+        return None
+
+def _as_date(value: Optional[datetime]) -> Optional[date]:
+    return value.date() if value is not None else None
+
+def _attribute(field: str) -> str:
+    if field not in FIELD_MAP:
+        raise RulesetError(f"Unknown registry field: {field}")
+    return FIELD_MAP[field][0]
+
+def _values(study: Study, attribute: str) -> tuple:
+    """A field's values as a tuple, whether Study stores it as scalar or tuple"""
+    value = getattr(study, attribute)
+    if type(value) is tuple:
+        return value
+    return (value,) if value else ()
+
+class Predicate:
+    """A compiled condition over a Study; batch() is its column version"""
+
+    fields: Tuple[str, ...] = ()
+
+    def __call__(self, study: Study) -> bool:
+        raise NotImplementedError
+
+    def batch(self, columns) -> 'np.ndarray':
+        raise NotImplementedError
+
+    def valid_until(self, study: Study) -> Optional[datetime]:
+        """When the result could change for an unchanged study (None: never)"""
+        return None
+
+class Always(Predicate):
+    def __call__(self, study: Study) -> bool:
+        return True
+
+    def batch(self, columns) -> 'np.ndarray':
+        return np.ones(len(columns), dtype=bool)
+
+class Present(Predicate):
+    """Any of the fields has a value"""
+
+    def __init__(self, fields: List[str]):
+        self.fields = tuple(fields)
+        attributes = [_attribute(field) for field in self.fields]
+        if len(attributes) == 1:
+            self._get = attrgetter(attributes[0])
+        else:
+            get_all = attrgetter(*attributes)
+            self._get = lambda study: any(get_all(study))
+
+    def __call__(self, study: Study) -> bool:
+        return bool(self._get(study))
+
+    def batch(self, columns) -> 'np.ndarray':
+        mask = np.zeros(len(columns), dtype=bool)
+        for field in self.fields:
+            mask |= columns.present(field)
+        return mask
+
+class Empty(Present):
+    """None of the fields has a value"""
+
+    def __call__(self, study: Study) -> bool:
+        return not self._get(study)
+
+    def batch(self, columns) -> 'np.ndarray':
+        return ~super().batch(columns)
+
+class Matches(Predicate):
+    """Any value of the field matches the regex (anchored at the start)"""
+
+    def __init__(self, field: str, pattern: str):
+        self.fields = (field,)
+        self._attribute = _attribute(field)
+        try:
+            self.pattern = re.compile(pattern)
+        except re.error as e:
+            raise RulesetError(f"Invalid pattern for {field}: {e}")
+
+    def __call__(self, study: Study) -> bool:
+        match = self.pattern.match
+        return any(match(value) for value in _values(study, self._attribute))
+
+    def batch(self, columns) -> 'np.ndarray':
+        return columns.any_match(self.fields[0], self.pattern)
+
+class OlderThan(Predicate):
+    """The field's date is more than `years` years ago (365.25-day years)
+
+    Dates are read in any registry format (see src.data.dates) unless an
+    explicit strptime `date_format` is given.
+    """
+
+    def __init__(self, field: str, years: float, date_format: str = None):
+        self.fields = (field,)
+        self._attribute = _attribute(field)
+        self.date_format = date_format
+        if date_format is not None:
+            self._parse = lambda value: _as_date(parse_date(value, date_format))
+        else:
+            self._parse = parse_registry_date
+        # Study keeps date fields parsed; use that unless a format overrides it
+        parsed = DATE_ATTRIBUTES.get(self._attribute) if date_format is None else None
+        self._parsed = attrgetter(parsed) if parsed else None
+        # days / 365.25 > years first holds at this many whole days
+        self.threshold_days = math.floor(years * 365.25) + 1
+
+    def _date(self, study: Study) -> Optional[date]:
+        if self._parsed is not None:
+            return self._parsed(study)
+        values = _values(study, self._attribute)
+        return self._parse(values[0]) if values else None
+
+    def __call__(self, study: Study) -> bool:
+        day = self._date(study)
+        return day is not None and (today() - day).days >= self.threshold_days
+
+    def batch(self, columns) -> 'np.ndarray':
+        days = columns.dates(self.fields[0], self._parse, self.date_format)
+        # NaT compares False
+        return (np.datetime64(today(), 'D') - days) >= np.timedelta64(self.threshold_days, 'D')
+
+    def valid_until(self, study: Study) -> Optional[datetime]:
+        day = self._date(study)
+        if day is None:
+            return None
+        flips_at = datetime.combine(day + timedelta(days=self.threshold_days), datetime.min.time())
+        return flips_at if flips_at > datetime.now() else None
+
+class _Combinator(Predicate):
+    def __init__(self, children: List[Predicate]):
+        self.children = children
+        self.fields = tuple(dict.fromkeys(field for child in children for field in child.fields))
+
+    def valid_until(self, study: Study) -> Optional[datetime]:
+        times = [until for until in (child.valid_until(study) for child in self.children) if until]
+        return min(times) if times else None
+
+class AllOf(_Combinator):
+    def __call__(self, study: Study) -> bool:
+        return all(child(study) for child in self.children)
+
+    def batch(self, columns) -> 'np.ndarray':
+        mask = np.ones(len(columns), dtype=bool)
+        for child in self.children:
+            mask &= child.batch(columns)
+        return mask
+
+class AnyOf(_Combinator):
+    def __call__(self, study: Study) -> bool:
+        return any(child(study) for child in self.children)
+
+    def batch(self, columns) -> 'np.ndarray':
+        mask = np.zeros(len(columns), dtype=bool)
+        for child in self.children:
+            mask |= child.batch(columns)
+        return mask
+
+class Not(_Combinator):
+    def __call__(self, study: Study) -> bool:
+        return not self.children[0](study)
+
+    def batch(self, columns) -> 'np.ndarray':
+        return ~self.children[0].batch(columns)
+
+def compile_predicate(spec: Dict[str, Any]) -> Predicate:
+    """Compile a predicate spec, e.g. {"matches": {"field": ..., "pattern": ...}}"""
+    if not isinstance(spec, dict) or len(spec) != 1:
+        raise RulesetError(f"A predicate is an object with exactly one key, got {spec!r}")
+    (kind, args), = spec.items()
+    try:
+        return _compile_predicate(kind, args)
+    except (KeyError, TypeError) as e:
+        raise RulesetError(f"Malformed '{kind}' predicate {args!r}: {e}")
+
+def _compile_predicate(kind: str, args: Any) -> Predicate:
+    if kind == 'always':
+        return Always()
+    if kind == 'present':
+        return Present(args if isinstance(args, list) else [args])
+    if kind == 'empty':
+        return Empty(args if isinstance(args, list) else [args])
+    if kind == 'matches':
+        return Matches(args['field'], args['pattern'])
+    if kind == 'older_than':
+        return OlderThan(args['field'], args['years'], args.get('format'))
+    if kind == 'all':
+        return AllOf([compile_predicate(child) for child in args])
+    if kind == 'any':
+        return AnyOf([compile_predicate(child) for child in args])
+    if kind == 'not':
+        return Not([compile_predicate(args)])
+    raise RulesetError(f"Unknown predicate: {kind}")
+
+def compile_detail(spec: Any) -> Tuple[Optional[Callable[[Study], Any]], Tuple[str, ...]]:
+    """Compile an issue detail into (function of the study, fields it reads)
+
+    Computed details are {"count": field}, {"present_fields": [fields]} and
+    {"years_since": field}; anything else is a literal value, for which the
+    function is None.
+    """
+    if isinstance(spec, dict) and len(spec) == 1:
+        (kind, args), = spec.items()
+        if kind == 'count':
+            attribute = _attribute(args)
+            return (lambda study: len(_values(study, attribute))), (args,)
+        if kind == 'present_fields':
+            pairs = [(field, _attribute(field)) for field in args]
+            return (lambda study: [field for field, attribute in pairs if getattr(study, attribute)]), tuple(args)
+        if kind == 'years_since':
+            date_of = OlderThan(args, 0)._date
+            def years_since(study):
+                day = date_of(study)
+                return (today() - day).days / 365.25 if day else None
+            return years_since, (args,)
+    return None, ()
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """A rule resolved for fast per-study evaluation"""
+    rule_id: str
+    description: str
+    check: Callable[[Study], Tuple[ComplianceIssue, ...]]
+    # Truthy when the study has any of the rule's fields; None runs always
+    present: Optional[Callable[[Study], Any]]
+    # Column version of check: (issue mask, issue severity)
+    batch_check: Optional[Callable[[Any], Tuple['np.ndarray', ComplianceLevel]]] = None
+    fields: Tuple[str, ...] = ()
+    severity: ComplianceLevel = ComplianceLevel.WARNING
+    valid_until: Optional[Callable[[Study], Optional[datetime]]] = None
+    definition: Optional[Dict[str, Any]] = None
+
+def compile_rule(definition: Dict[str, Any]) -> CompiledRule:
+    """Compile one rule definition into predicate-backed check functions"""
+    try:
+        rule_id = definition['id']
+        severity = ComplianceLevel(definition['severity'])
+        issue_spec = definition['issue']
+    except KeyError as e:
+        raise RulesetError(f"Rule {definition.get('id', '?')} is missing {e}")
+    except ValueError as e:
+        raise RulesetError(f"Rule {definition.get('id', '?')}: {e}")
+    if severity is ComplianceLevel.COMPLIANT:
+        raise RulesetError(f"Rule {rule_id}: an issue cannot have severity 'compliant'")
+
+    predicate = compile_predicate(definition.get('when', {'always': True}))
+    detail_specs = issue_spec.get('details') or {}
+    details = {name: compile_detail(spec) for name, spec in detail_specs.items()}
+    static_details = {name: detail_specs[name] for name, (detail, _) in details.items() if detail is None}
+    computed_details = [(name, detail) for name, (detail, _) in details.items() if detail is not None]
+
+    # Declared fields, else everything the predicate and details read
+    fields = definition.get('fields')
+    if fields is None:
+        fields = list(dict.fromkeys(
+            predicate.fields + tuple(field for _, detail_fields in details.values() for field in detail_fields)
+        ))
+    for field in fields:
+        _attribute(field)
+
+    gate = Present(fields) if fields and definition.get('skip_when_absent', True) else None
+    description = issue_spec.get('description', definition.get('description', rule_id))
+    recommendation = issue_spec.get('recommendation', 'Manual review required')
+    affected_field = issue_spec.get('affected_field')
+
+    if computed_details:
+        def check(study: Study) -> Tuple[ComplianceIssue, ...]:
+            if not predicate(study):
+                return ()
+            issue_details = dict(static_details)
+            for name, detail in computed_details:
+                issue_details[name] = detail(study)
+            return (ComplianceIssue(rule_id, severity, description, recommendation, affected_field,
+                                    FrozenDetails(issue_details)),)
+    else:
+        # Nothing study-specific: every flagged study shares one issue
+        static_issue = (ComplianceIssue(rule_id, severity, description, recommendation, affected_field,
+                                        FrozenDetails(static_details) if static_details else None),)
+
+        def check(study: Study) -> Tuple[ComplianceIssue, ...]:
+            return static_issue if predicate(study) else ()
+
+    def batch_check(columns) -> Tuple['np.ndarray', ComplianceLevel]:
+        mask = predicate.batch(columns)
+        if gate is not None:
+            mask &= gate.batch(columns)
+        return mask, severity
+
+    return CompiledRule(
+        rule_id=rule_id,
+        description=definition.get('description', rule_id),
+        check=check,
+        present=gate._get if gate is not None else None,
+        batch_check=batch_check,
+        fields=tuple(fields),
+        severity=severity,
+        valid_until=predicate.valid_until,
+        definition=definition
+    )
+
+@dataclass
+class Ruleset:
+    """A compiled ruleset and the version it declares"""
+    version: str
+    penalties: Dict[ComplianceLevel, int]
+    rules: List[CompiledRule]
+    source: Optional[Path] = None
+
+    def fingerprint(self, rule_ids: List[str] = None) -> str:
+        """Declared version plus a hash of the (selected) rule definitions and weights"""
+        definitions = [rule.definition for rule in self.rules if rule_ids is None or rule.rule_id in rule_ids]
+        penalties = {level.value: penalty for level, penalty in self.penalties.items()}
+        raw = json.dumps({'rules': definitions, 'penalties': penalties}, sort_keys=True)
+        return f"{self.version}:{hashlib.sha256(raw.encode()).hexdigest()[:12]}"
+
+def compile_ruleset(data: Dict[str, Any], source: Path = None) -> Ruleset:
+    """Compile a parsed ruleset document"""
+    if not isinstance(data, dict) or not isinstance(data.get('rules'), list):
+        raise RulesetError("A ruleset is an object with a 'rules' list")
+
+    penalties = dict(DEFAULT_PENALTIES)
+    for level, penalty in (data.get('penalties') or {}).items():
+        try:
+            penalties[ComplianceLevel(level)] = penalty
+        except ValueError:
+            raise RulesetError(f"Unknown severity in penalties: {level}")
+
+    rules = [compile_rule(definition) for definition in data['rules']]
+    rule_ids = [rule.rule_id for rule in rules]
+    if len(rule_ids) != len(set(rule_ids)):
+        raise RulesetError("Rule ids must be unique")
+
+    return Ruleset(version=str(data.get('version', '0')), penalties=penalties, rules=rules, source=source)
+
+def load_ruleset(path: Union[str, Path]) -> Ruleset:
+    """Load and compile a .json or .yaml/.yml ruleset file"""
+    path = Path(path)
+    text = path.read_text(encoding='utf-8')
+    if path.suffix in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise RulesetError("PyYAML is required for YAML rulesets (pip install PyYAML)")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+
+    ruleset = compile_ruleset(data, source=path)
+    logger.info(f"Loaded ruleset {ruleset.version} ({len(ruleset.rules)} rules) from {path}")
+    return ruleset
@@ -0,0 +1,135 @@
+# src/compliance/run_stats.py
+from typing import Dict, List, Any, Optional, Union
+
+from src.compliance.models import ComplianceReport
+from src.monitoring.metrics import MetricsCollector, metrics_collector
+
+# Upper bounds of the score histogram buckets: [0, 10), [10, 20), ... [90, 100]
+SCORE_BUCKETS = (10, 20, 30, 40, 50, 60, 70, 80, 90, 100)
+
+class RunStatistics:
+    """One-pass aggregates over a run's compliance reports
+
+    Keeps a fixed-bucket score histogram, counts per overall status and
+    the number of studies each rule flagged, so nothing grows with the
+    number of studies. Statistics built in worker processes merge() into
+    the parent's.
+    """
+
+    __slots__ = ('count', 'score_sum', 'score_min', 'score_max', 'histogram',
+                 'status_counts', 'rule_counts')
+
+    def __init__(self):
+        self.count = 0
+        self.score_sum = 0.0
+        self.score_min: Optional[float] = None
+        self.score_max: Optional[float] = None
+        self.histogram = [0] * len(SCORE_BUCKETS)
+        self.status_counts: Dict[str, int] = {}
+        self.rule_counts: Dict[str, int] = {}
+
+    def add(self, report: ComplianceReport):
+        """Fold one report into the aggregates"""
+        score = report.score
+        self.count += 1
+        self.score_sum += score
+        if self.score_min is None or score < self.score_min:
+            self.score_min = score
+        if self.score_max is None or score > self.score_max:
+            self.score_max = score
+        # Scores are 0-100 in 10-point buckets; 100 joins the last one
+        self.histogram[min(max(int(score // 10), 0), len(SCORE_BUCKETS) - 1)] += 1
+
+        status = report.overall_status.value
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        rule_counts = self.rule_counts
+        for issue in report.issues:
+            rule_counts[issue.rule_id] = rule_counts.get(issue.rule_id, 0) + 1
+
+    def merge(self, other: Union['RunStatistics', Dict[str, Any]]):
+        """Add another run's aggregates (or their to_dict() form) into these"""
+        if isinstance(other, dict):
+            other = RunStatistics.from_dict(other)
+        if not other.count:
+            return
+        self.count += other.count
+        self.score_sum += other.score_sum
+        self.score_min = other.score_min if self.score_min is None else min(self.score_min, other.score_min)
+        self.score_max = other.score_max if self.score_max is None else max(self.score_max, other.score_max)
+        self.histogram = [mine + theirs for mine, theirs in zip(self.histogram, other.histogram)]
+        for status, count in other.status_counts.items():
+            self.status_counts[status] = self.status_counts.get(status, 0) + count
+        for rule_id, count in other.rule_counts.items():
+            self.rule_counts[rule_id] = self.rule_counts.get(rule_id, 0) + count
+
+    @property
+    def mean_score(self) -> Optional[float]:
+        return self.score_sum / self.count if self.count else None
+
+    def score_quantile(self, quantile: float) -> Optional[float]:
+        """Approximate score quantile, interpolated within its histogram bucket"""
+        if not self.count:
+            return None
+        target = quantile * self.count
+        seen = 0
+        lower = 0
+        for upper, bucket_count in zip(SCORE_BUCKETS, self.histogram):
+            if bucket_count and seen + bucket_count >= target:
+                estimate = lower + (upper - lower) * (target - seen) / bucket_count
+                return min(max(estimate, self.score_min), self.score_max)
+            seen += bucket_count
+            lower = upper
+        return self.score_max
+
+    def rule_frequencies(self) -> Dict[str, float]:
+        """Share of studies each rule flagged, most frequent first"""
+        if not self.count:
+            return {}
+        ranked = sorted(self.rule_counts.items(), key=lambda item: item[1], reverse=True)
+        return {rule_id: count / self.count for rule_id, count in ranked}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'score_sum': self.score_sum,
+            'score_min': self.score_min,
+            'score_max': self.score_max,
+            'score_mean': self.mean_score,
+            'score_median': self.score_quantile(0.5),
+            'score_buckets': list(SCORE_BUCKETS),
+            'score_histogram': list(self.histogram),
+            'status_counts': dict(self.status_counts),
+            'rule_counts': dict(self.rule_counts)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RunStatistics':
+        stats = cls()
+        stats.count = data['count']
+        stats.score_sum = data['score_sum']
+        stats.score_min = data['score_min']
+        stats.score_max = data['score_max']
+        stats.histogram = list(data['score_histogram'])
+        stats.status_counts = dict(data['status_counts'])
+        stats.rule_counts = dict(data['rule_counts'])
+        return stats
+
+    def publish(self, collector: MetricsCollector = None):
+        """Add these aggregates to the metrics collector's snapshot"""
+        collector = collector or metrics_collector
+        collector.observe_histogram('compliance_score', SCORE_BUCKETS, self.histogram)
+        for status, count in self.status_counts.items():
+            collector.increment_counter('studies_by_status', count, tags={'status': status})
+        for rule_id, count in self.rule_counts.items():
+            collector.increment_counter('rule_issues', count, tags={'rule': rule_id})
+
+def format_histogram(stats: RunStatistics, width: int = 40) -> List[str]:
+    """Text bars for the score histogram, one line per bucket"""
+    peak = max(stats.histogram) or 1
+    lines = []
+    lower = 0
+    for upper, count in zip(SCORE_BUCKETS, stats.histogram):
+        bar = '█' * round(width * count / peak)
+        lines.append(f"{lower:>3}-{upper:<3} {count:>7}  {bar}")
+        lower = upper
+    return lines
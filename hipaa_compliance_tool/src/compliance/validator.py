@@ -1,107 +1,289 @@
 # src/compliance/validator.py
 import re
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
-from enum import Enum
+import os
+import sys
+import time
+from time import perf_counter_ns
+from datetime import datetime
+from pathlib import Path
+from typing import (Dict, List, Any, Optional, Tuple, Callable, Iterable, Iterator, Mapping, Sequence, Union,
+                    TYPE_CHECKING)
 import logging
+import importlib
+
+from config import settings
+from src.compliance.models import ComplianceLevel, ComplianceIssue, ComplianceReport, FrozenDetails
+from src.compliance.ruleset import CompiledRule, Ruleset, load_ruleset
+from src.data.dates import parse_registry_date, parse_date_column
+from src.data.study import Study, FIELD_MAP, as_study
+from src.monitoring.metrics import metrics_collector
+from src.monitoring.profiling import RuleProfiler, RULE_ERRORS
+from src.utils.lazy import LazyInstance
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    # numpy is only needed once a batch is validated, not to start the CLI
+    np = LazyInstance(lambda: importlib.import_module('numpy'))
 
 logger = logging.getLogger(__name__)
 
-class ComplianceLevel(Enum):
-    """HIPAA compliance levels"""
-    COMPLIANT = "compliant"
-    WARNING = "warning"
-    NON_COMPLIANT = "non_compliant"
-    UNKNOWN = "unknown"
-
-@dataclass
-class ComplianceIssue:
-    """Represents a compliance issue"""
-    rule_id: str
-    severity: ComplianceLevel
-    description: str
-    recommendation: str
-    affected_field: str = None
-    details: Dict[str, Any] = None
-
-@dataclass
-class ComplianceReport:
-    """Compliance assessment report"""
-    study_id: str
-    overall_status: ComplianceLevel
-    issues: List[ComplianceIssue]
-    assessment_date: datetime
-    recommendations: List[str]
-    score: float  # 0-100 compliance score
+# Distinct recommendation lists kept for sharing between reports
+MAX_INTERNED_RECOMMENDATIONS = 1024
+
+class StudyColumns:
+    """Column access over a study table
+
+    Accepts a DataFrame or a mapping of registry field -> sequence, with
+    cells in either the registry's list shape or Study's scalar/tuple shape.
+    Cells are normalized to tuples once per field and derived columns are
+    cached, so rules sharing a field pay for it once.
+    """
+
+    def __init__(self, table: Union['pd.DataFrame', Mapping[str, Sequence]]):
+        self.table = table
+        self.length = len(table) if _is_frame(table) else \
+            max((len(column) for column in table.values()), default=0)
+        self._cache: Dict[Tuple[str, str], Any] = {}
+
+    def __len__(self) -> int:
+        return self.length
+
+    def cells(self, field_name: str) -> List[tuple]:
+        """The column with every cell as a tuple (empty when missing)"""
+        key = ('cells', field_name)
+        if key not in self._cache:
+            if field_name in self.table:
+                column = self.table[field_name]
+                self._cache[key] = [value if type(value) is tuple else _as_cell(value) for value in column]
+            else:
+                self._cache[key] = [()] * self.length
+        return self._cache[key]
+
+    def lengths(self, field_name: str) -> 'np.ndarray':
+        """Number of values in each cell"""
+        key = ('lengths', field_name)
+        if key not in self._cache:
+            self._cache[key] = np.fromiter(map(len, self.cells(field_name)), dtype=np.int64, count=self.length)
+        return self._cache[key]
+
+    def present(self, field_name: str) -> 'np.ndarray':
+        """Rows with a non-empty value"""
+        return self.lengths(field_name) > 0
+
+    def scalar(self, field_name: str) -> 'pd.Series':
+        """First value of each cell, None when empty"""
+        key = ('scalar', field_name)
+        if key not in self._cache:
+            import pandas as pd
+            self._cache[key] = pd.Series([cell[0] if cell else None for cell in self.cells(field_name)],
+                                         dtype=object)
+        return self._cache[key]
+
+    def dates(self, field_name: str, parser: Callable[[str], Any] = parse_registry_date,
+              date_format: str = None) -> 'np.ndarray':
+        """First value of each cell as datetime64[D] (NaT when missing or unparseable)
+
+        `date_format` only distinguishes cache entries for non-default parsers.
+        """
+        key = ('dates', field_name, date_format)
+        if key not in self._cache:
+            self._cache[key] = parse_date_column(self.scalar(field_name), parser)
+        return self._cache[key]
+
+    def any_match(self, field_name: str, pattern: re.Pattern) -> 'np.ndarray':
+        """Rows where any value of the field matches pattern"""
+        lengths = self.lengths(field_name)
+        flat = [value for cell in self.cells(field_name) for value in cell]
+        matches = np.fromiter((match is not None for match in map(pattern.match, flat)),
+                              dtype=np.int64, count=len(flat))
+        # Matches per cell from a running total over the flattened values
+        totals = np.concatenate(([0], np.cumsum(matches)))
+        ends = np.cumsum(lengths)
+        return (totals[ends] - totals[ends - lengths]) > 0
+
+    def row(self, index: int) -> Study:
+        """Rebuild one row as a Study"""
+        return Study.from_record({
+            field_name: list(self.cells(field_name)[index])
+            for field_name in FIELD_MAP
+            if field_name in self.table
+        })
+
+def _is_frame(table: Any) -> bool:
+    """True for a pandas DataFrame, without importing pandas to find out"""
+    pandas = sys.modules.get('pandas')
+    return pandas is not None and isinstance(table, pandas.DataFrame)
+
+def _as_cell(value: Any) -> tuple:
+    """Registry list, Study scalar, None or NaN -> tuple of string values"""
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    if isinstance(value, str):
+        return (value,)
+    return ()
+
+def _all_rows(columns: StudyColumns) -> 'np.ndarray':
+    return np.ones(len(columns), dtype=bool)
+
+class BatchResult:
+    """Scores and statuses for a batch; ComplianceReports are built on demand
+
+    Reports use the plan the batch was validated with, even if the
+    validator's ruleset has been reloaded since.
+    """
+
+    def __init__(self, validator: 'HIPAAComplianceValidator', plan: Sequence[CompiledRule],
+                 columns: StudyColumns, issue_masks: Dict[str, 'np.ndarray'], failed_rules: Dict[str, str],
+                 scores: 'np.ndarray', statuses: 'np.ndarray', issue_counts: 'np.ndarray'):
+        self.validator = validator
+        self.plan = plan
+        self.columns = columns
+        self.issue_masks = issue_masks
+        self.failed_rules = failed_rules
+        self.scores = scores
+        self.statuses = statuses
+        self.issue_counts = issue_counts
+        self.study_ids = columns.scalar('NCTId').fillna('Unknown').to_numpy()
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def status_counts(self) -> Dict[str, int]:
+        """Number of studies per compliance status"""
+        values, counts = np.unique(self.statuses, return_counts=True)
+        return {str(value): int(count) for value, count in zip(values, counts)}
+
+    def to_frame(self) -> 'pd.DataFrame':
+        """One row per study: id, status, score and issue count"""
+        import pandas as pd
+        return pd.DataFrame({
+            'study_id': self.study_ids,
+            'compliance_status': self.statuses,
+            'compliance_score': self.scores,
+            'issues_count': self.issue_counts
+        })
+
+    def report(self, index: int) -> ComplianceReport:
+        """Full ComplianceReport for one row, running only its flagged checks"""
+        study = self.columns.row(index)
+        issues = []
+        for rule in self.plan:
+            if rule.rule_id in self.failed_rules:
+                issues.append(self.validator._unknown_issue(rule, self.failed_rules[rule.rule_id]))
+            elif self.issue_masks[rule.rule_id][index]:
+                issues.extend(rule.check(study))
+
+        return ComplianceReport(
+            study_id=self.study_ids[index],
+            overall_status=ComplianceLevel(self.statuses[index]),
+            issues=tuple(issues),
+            assessment_date=datetime.utcnow(),
+            recommendations=self.validator._generate_recommendations(issues),
+            score=float(self.scores[index])
+        )
+
+    def iter_reports(self) -> Iterator[ComplianceReport]:
+        """Reports for every row, built lazily"""
+        for index in range(len(self)):
+            yield self.report(index)
 
 class HIPAAComplianceValidator:
     """Validate HIPAA compliance for clinical trials"""
     
-    def __init__(self):
-        self.rules = self._load_compliance_rules()
-    
-    def _load_compliance_rules(self) -> Dict[str, Dict]:
-        """Load HIPAA compliance rules"""
-        return {
-            'data_encryption': {
-                'description': 'PHI must be encrypted at rest and in transit',
-                'severity': ComplianceLevel.NON_COMPLIANT,
-                'check_function': self._check_data_encryption
-            },
-            'access_controls': {
-                'description': 'Proper access controls must be in place',
-                'severity': ComplianceLevel.NON_COMPLIANT,
-                'check_function': self._check_access_controls
-            },
-            'audit_logging': {
-                'description': 'All PHI access must be logged',
-                'severity': ComplianceLevel.NON_COMPLIANT,
-                'check_function': self._check_audit_logging
-            },
-            'data_minimization': {
-                'description': 'Only necessary PHI should be collected',
-                'severity': ComplianceLevel.WARNING,
-                'check_function': self._check_data_minimization
-            },
-            'consent_management': {
-                'description': 'Patient consent must be properly managed',
-                'severity': ComplianceLevel.NON_COMPLIANT,
-                'check_function': self._check_consent_management
-            },
-            'data_retention': {
-                'description': 'PHI retention policies must be enforced',
-                'severity': ComplianceLevel.WARNING,
-                'check_function': self._check_data_retention
-            },
-            'breach_notification': {
-                'description': 'Breach notification procedures must be in place',
-                'severity': ComplianceLevel.WARNING,
-                'check_function': self._check_breach_notification
-            }
-        }
+    def __init__(self, enabled_rules: Iterable[str] = None, ruleset_path: Union[str, Path] = None,
+                 profile_sample_rate: float = None):
+        self.enabled_rules = list(enabled_rules) if enabled_rules else None
+        self.enable_profiling(settings.RULE_PROFILE_SAMPLE_RATE if profile_sample_rate is None
+                              else profile_sample_rate)
+        self.ruleset_path = Path(ruleset_path or settings.COMPLIANCE_RULESET_PATH)
+        self.reload_interval = settings.COMPLIANCE_RULESET_RELOAD_SECONDS
+        self._ruleset_mtime = None
+        self._next_reload_check = 0.0
+        self._recommendations: Dict[tuple, Tuple[str, ...]] = {}
+        self._apply_ruleset(load_ruleset(self.ruleset_path))
+
+    def _apply_ruleset(self, ruleset: Ruleset):
+        """Swap in a compiled ruleset, keeping only the enabled rules"""
+        enabled = set(self.enabled_rules) if self.enabled_rules else None
+        self.ruleset = ruleset
+        self.rules = {rule.rule_id: rule for rule in ruleset.rules if enabled is None or rule.rule_id in enabled}
+        self.plan: List[CompiledRule] = list(self.rules.values())
+        self.penalties = ruleset.penalties
+        # Plain ints for the per-study scorer (Enum hashing is slow)
+        self._penalty_weights = tuple(ruleset.penalties[level] for level in
+                                      (ComplianceLevel.NON_COMPLIANT, ComplianceLevel.WARNING, ComplianceLevel.UNKNOWN))
+        self.ruleset_version = ruleset.fingerprint(list(self.rules))
+        self._time_dependent = [rule for rule in self.plan if rule.valid_until is not None]
+        self._ruleset_mtime = self._mtime()
+        self._next_reload_check = time.monotonic() + self.reload_interval
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.ruleset_path).st_mtime
+        except OSError:
+            return None
+
+    def reload_if_changed(self) -> bool:
+        """Recompile the ruleset if its file changed; keep the old one if it is invalid"""
+        mtime = self._mtime()
+        self._next_reload_check = time.monotonic() + self.reload_interval
+        if mtime is None or mtime == self._ruleset_mtime:
+            return False
+        try:
+            ruleset = load_ruleset(self.ruleset_path)
+        except (OSError, ValueError) as e:
+            # ValueError covers RulesetError and malformed JSON
+            logger.error(f"Keeping ruleset {self.ruleset_version}; reload of {self.ruleset_path} failed: {e}")
+            self._ruleset_mtime = mtime
+            return False
+        self._apply_ruleset(ruleset)
+        logger.info(f"Reloaded ruleset {self.ruleset_version} from {self.ruleset_path}")
+        return True
+
+    def _maybe_reload(self):
+        """Hot reload, checking the file at most every reload_interval seconds"""
+        if self.reload_interval > 0 and time.monotonic() >= self._next_reload_check:
+            self.reload_if_changed()
+
+    def required_fields(self, extra_fields: Iterable[str] = ()) -> List[str]:
+        """Union of fields read by the enabled rules plus extra_fields, in stable order"""
+        fields = list(dict.fromkeys(extra_fields))
+        for rule in self.plan:
+            fields.extend(field for field in rule.fields if field not in fields)
+        return fields
+
+    def report_valid_until(self, study: Study) -> Optional[datetime]:
+        """When a report for this study could change without the study changing
+
+        Only date-based predicates (older_than) depend on the current date;
+        None means the report stays valid as long as the study and ruleset
+        are unchanged.
+        """
+        times = [expiry for expiry in (rule.valid_until(study) for rule in self._time_dependent) if expiry]
+        return min(times) if times else None
     
-    def validate_study_compliance(self, study_data: Dict[str, Any]) -> ComplianceReport:
+    def validate_study_compliance(self, study: Union[Study, Dict[str, Any]]) -> ComplianceReport:
         """Validate HIPAA compliance for a clinical study"""
-        study_id = study_data.get('NCTId', ['Unknown'])[0]
+        self._maybe_reload()
+        study = as_study(study)
+        study_id = study.nct_id or 'Unknown'
         issues = []
         
-        logger.info(f"Starting compliance validation for study {study_id}")
+        logger.debug("Starting compliance validation for study %s", study_id)
         
-        # Run all compliance checks
-        for rule_id, rule_config in self.rules.items():
-            try:
-                rule_issues = rule_config['check_function'](study_data)
-                issues.extend(rule_issues)
-            except Exception as e:
-                logger.error(f"Error checking rule {rule_id}: {e}")
-                issues.append(ComplianceIssue(
-                    rule_id=rule_id,
-                    severity=ComplianceLevel.UNKNOWN,
-                    description=f"Unable to validate {rule_config['description']}",
-                    recommendation="Manual review required",
-                    details={'error': str(e)}
-                ))
+        if self.profiler is not None and self.profiler.should_sample():
+            self._run_plan_profiled(study, issues)
+        else:
+            # Run the compiled plan, skipping rules with nothing to inspect
+            for rule in self.plan:
+                if rule.present is not None and not rule.present(study):
+                    continue
+                try:
+                    issues.extend(rule.check(study))
+                except Exception as e:
+                    issues.append(self._rule_failed(rule, e))
         
         # Calculate overall status and score
         overall_status, score = self._calculate_overall_status(issues)
@@ -112,167 +294,124 @@ class HIPAAComplianceValidator:
         report = ComplianceReport(
             study_id=study_id,
             overall_status=overall_status,
-            issues=issues,
+            issues=tuple(issues),
             assessment_date=datetime.utcnow(),
             recommendations=recommendations,
             score=score
         )
         
-        logger.info(f"Compliance validation completed for {study_id}: {overall_status.value} (score: {score})")
+        logger.debug("Compliance validation completed for %s: %s (score: %s)",
+                     study_id, overall_status.value, score)
         return report
     
-    def _check_data_encryption(self, study_data: Dict[str, Any]) -> List[ComplianceIssue]:
-        """Check if data encryption is properly implemented"""
-        issues = []
-        
-        # Check if emails are encrypted
-        if 'CentralContactEMail' in study_data:
-            emails = study_data['CentralContactEMail']
-            for email in emails:
-                if self._is_plaintext_email(email):
-                    issues.append(ComplianceIssue(
-                        rule_id='data_encryption',
-                        severity=ComplianceLevel.NON_COMPLIANT,
-                        description='Email addresses stored in plaintext',
-                        recommendation='Encrypt all email addresses before storage',
-                        affected_field='CentralContactEMail',
-                        details={'email_count': len(emails)}
-                    ))
-                    break
-        
-        return issues
-    
-    def _check_access_controls(self, study_data: Dict[str, Any]) -> List[ComplianceIssue]:
-        """Check access control implementation"""
-        issues = []
-        
-        # This would check if proper access controls are in place
-        # For now, we'll assume they need to be implemented
-        issues.append(ComplianceIssue(
-            rule_id='access_controls',
-            severity=ComplianceLevel.WARNING,
-            description='Access controls need verification',
-            recommendation='Implement role-based access controls with authentication',
-            details={'requires_implementation': True}
-        ))
-        
-        return issues
-    
-    def _check_audit_logging(self, study_data: Dict[str, Any]) -> List[ComplianceIssue]:
-        """Check audit logging implementation"""
-        issues = []
-        
-        # Check if audit logging is properly configured
-        issues.append(ComplianceIssue(
-            rule_id='audit_logging',
-            severity=ComplianceLevel.WARNING,
-            description='Audit logging needs verification',
-            recommendation='Ensure all PHI access is logged with timestamps and user identification',
-            details={'requires_verification': True}
-        ))
-        
-        return issues
-    
-    def _check_data_minimization(self, study_data: Dict[str, Any]) -> List[ComplianceIssue]:
-        """Check data minimization practices"""
-        issues = []
-        
-        # Check for potentially unnecessary PHI fields
-        sensitive_fields = [
-            'OverallOfficialName',
-            'LocationContactName',
-            'LocationContactPhone',
-            'LocationContactEMail'
-        ]
-        
-        present_sensitive_fields = [field for field in sensitive_fields if field in study_data]
-        
-        if present_sensitive_fields:
-            issues.append(ComplianceIssue(
-                rule_id='data_minimization',
-                severity=ComplianceLevel.WARNING,
-                description='Potentially unnecessary PHI fields present',
-                recommendation='Review if all collected PHI is necessary for the study purpose',
-                details={'sensitive_fields': present_sensitive_fields}
-            ))
-        
-        return issues
-    
-    def _check_consent_management(self, study_data: Dict[str, Any]) -> List[ComplianceIssue]:
-        """Check consent management"""
-        issues = []
-        
-        # Check if consent information is available
-        if 'ConsentRequired' not in study_data and 'ConsentDocument' not in study_data:
-            issues.append(ComplianceIssue(
-                rule_id='consent_management',
-                severity=ComplianceLevel.WARNING,
-                description='Consent management information not found',
-                recommendation='Ensure proper consent procedures are documented and followed',
-                details={'missing_consent_info': True}
-            ))
-        
-        return issues
-    
-    def _check_data_retention(self, study_data: Dict[str, Any]) -> List[ComplianceIssue]:
-        """Check data retention policies"""
-        issues = []
-        
-        # Check study completion date for retention policy
-        if 'StudyFirstSubmitDate' in study_data:
+    def _run_plan_profiled(self, study: Study, issues: List[ComplianceIssue]):
+        """The plan loop of validate_study_compliance, timing each rule"""
+        profiler = self.profiler
+        for rule in self.plan:
+            started = perf_counter_ns()
+            found = 0
+            if rule.present is None or rule.present(study):
+                try:
+                    rule_issues = rule.check(study)
+                    found = len(rule_issues)
+                    issues.extend(rule_issues)
+                except Exception as e:
+                    issues.append(self._rule_failed(rule, e))
+            profiler.record(rule.rule_id, perf_counter_ns() - started, found)
+
+    def enable_profiling(self, sample_rate: float = 1.0):
+        """Time each rule on this fraction of studies (0 turns profiling off)"""
+        self.profile_sample_rate = sample_rate
+        self.profiler = RuleProfiler(sample_rate) if sample_rate > 0 else None
+
+    def flush_profile(self):
+        """Publish accumulated per-rule timings to the metrics collector"""
+        if self.profiler is not None:
+            self.profiler.flush()
+
+    def validate_batch(self, table: Union['pd.DataFrame', Mapping[str, Sequence]]) -> BatchResult:
+        """Validate a table of studies with one vectorized mask per rule
+
+        `table` is a DataFrame or a mapping of registry field -> column
+        (see src.data.study.to_columns). Scores and statuses match
+        validate_study_compliance row for row; full reports come from
+        BatchResult.report().
+        """
+        self._maybe_reload()
+        columns = table if isinstance(table, StudyColumns) else StudyColumns(table)
+        penalties = np.zeros(len(columns), dtype=np.float64)
+        counts = {level: np.zeros(len(columns), dtype=np.int32) for level in self.penalties}
+        issue_masks = {}
+        failed_rules = {}
+        # A hot reload may swap self.plan before the batch's reports are built
+        plan = self.plan
+
+        for rule in plan:
+            started = perf_counter_ns()
             try:
-                submit_date = datetime.strptime(study_data['StudyFirstSubmitDate'][0], '%B %d, %Y')
-                years_old = (datetime.now() - submit_date).days / 365.25
-                
-                if years_old > 6:  # HIPAA generally requires 6 years retention
-                    issues.append(ComplianceIssue(
-                        rule_id='data_retention',
-                        severity=ComplianceLevel.WARNING,
-                        description='Study data may exceed retention period',
-                        recommendation='Review data retention policy and consider secure disposal',
-                        details={'years_old': years_old}
-                    ))
-            except (ValueError, KeyError, IndexError):
-                pass
-        
-        return issues
-    
-    def _check_breach_notification(self, study_data: Dict[str, Any]) -> List[ComplianceIssue]:
-        """Check breach notification procedures"""
-        issues = []
-        
-        # This would check if breach notification procedures are in place
-        issues.append(ComplianceIssue(
-            rule_id='breach_notification',
-            severity=ComplianceLevel.WARNING,
-            description='Breach notification procedures need verification',
-            recommendation='Ensure breach notification procedures are documented and tested',
-            details={'requires_documentation': True}
-        ))
-        
-        return issues
-    
-    def _is_plaintext_email(self, email: str) -> bool:
-        """Check if email appears to be in plaintext"""
-        # Simple check - if it looks like a normal email, it's probably plaintext
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(email_pattern, email))
-    
+                mask, severity = rule.batch_check(columns)
+            except Exception as e:
+                logger.error(f"Error checking rule {rule.rule_id} for batch: {e}")
+                metrics_collector.increment_counter(RULE_ERRORS, tags={'rule': rule.rule_id})
+                failed_rules[rule.rule_id] = str(e)
+                mask, severity = _all_rows(columns), ComplianceLevel.UNKNOWN
+            if self.profiler is not None and rule.rule_id not in failed_rules:
+                self.profiler.record(rule.rule_id, perf_counter_ns() - started, int(mask.sum()), len(columns))
+            issue_masks[rule.rule_id] = mask
+            counts[severity] += mask
+            penalties += mask * self.penalties[severity]
+
+        scores = np.maximum(0.0, 100.0 - penalties)
+        statuses = np.select(
+            [counts[ComplianceLevel.NON_COMPLIANT] > 0,
+             (counts[ComplianceLevel.WARNING] + counts[ComplianceLevel.UNKNOWN]) > 0],
+            [ComplianceLevel.NON_COMPLIANT.value, ComplianceLevel.WARNING.value],
+            default=ComplianceLevel.COMPLIANT.value
+        )
+        issue_counts = sum(counts.values())
+
+        self.flush_profile()
+        logger.info(f"Validated batch of {len(columns)} studies")
+        return BatchResult(self, plan, columns, issue_masks, failed_rules, scores, statuses, issue_counts)
+
+    def _rule_failed(self, rule: CompiledRule, error: Exception) -> ComplianceIssue:
+        """Log and count a rule that raised, returning its unknown-status issue"""
+        logger.error(f"Error checking rule {rule.rule_id}: {error}")
+        metrics_collector.increment_counter(RULE_ERRORS, tags={'rule': rule.rule_id})
+        return self._unknown_issue(rule, str(error))
+
+    def _unknown_issue(self, rule: CompiledRule, error: str) -> ComplianceIssue:
+        """Issue recorded when a rule could not be evaluated"""
+        return ComplianceIssue(
+            rule_id=rule.rule_id,
+            severity=ComplianceLevel.UNKNOWN,
+            description=f"Unable to validate {rule.description}",
+            recommendation="Manual review required",
+            details=FrozenDetails({'error': error})
+        )
+
     def _calculate_overall_status(self, issues: List[ComplianceIssue]) -> Tuple[ComplianceLevel, float]:
         """Calculate overall compliance status and score"""
         if not issues:
             return ComplianceLevel.COMPLIANT, 100.0
         
-        # Count issues by severity
-        non_compliant = sum(1 for issue in issues if issue.severity == ComplianceLevel.NON_COMPLIANT)
-        warnings = sum(1 for issue in issues if issue.severity == ComplianceLevel.WARNING)
-        unknown = sum(1 for issue in issues if issue.severity == ComplianceLevel.UNKNOWN)
-        
-        # Calculate score (100 - penalties)
+        # Count issues by severity in one pass
+        non_compliant = warnings = unknown = 0
+        for issue in issues:
+            if issue.severity is ComplianceLevel.NON_COMPLIANT:
+                non_compliant += 1
+            elif issue.severity is ComplianceLevel.WARNING:
+                warnings += 1
+            elif issue.severity is ComplianceLevel.UNKNOWN:
+                unknown += 1
+        
+        # Calculate score (100 - penalties): major for non-compliance,
+        # minor for warnings, small for unknown status
+        non_compliant_weight, warning_weight, unknown_weight = self._penalty_weights
         score = 100.0
-        score -= non_compliant * 30  # Major penalty for non-compliance
-        score -= warnings * 10       # Minor penalty for warnings
-        score -= unknown * 5         # Small penalty for unknown status
+        score -= non_compliant * non_compliant_weight
+        score -= warnings * warning_weight
+        score -= unknown * unknown_weight
         
         score = max(0.0, score)  # Don't go below 0
         
@@ -286,25 +425,40 @@ class HIPAAComplianceValidator:
         
         return overall_status, score
     
-    def _generate_recommendations(self, issues: List[ComplianceIssue]) -> List[str]:
-        """Generate prioritized recommendations"""
-        recommendations = []
-        
+    def _generate_recommendations(self, issues: List[ComplianceIssue]) -> Tuple[str, ...]:
+        """Generate prioritized recommendations
+
+        The result depends only on a handful of recommendation strings, so
+        each distinct combination is built once and shared across reports.
+        """
         # Group by severity
-        critical_issues = [i for i in issues if i.severity == ComplianceLevel.NON_COMPLIANT]
-        warning_issues = [i for i in issues if i.severity == ComplianceLevel.WARNING]
+        critical_issues = []
+        warning_issues = []
+        for issue in issues:
+            if issue.severity is ComplianceLevel.NON_COMPLIANT:
+                critical_issues.append(issue.recommendation)
+            elif issue.severity is ComplianceLevel.WARNING:
+                warning_issues.append(issue.recommendation)
+        
+        # Top 3 critical issues and top 2 warnings
+        key = (tuple(critical_issues[:3]), tuple(warning_issues[:2]), not issues)
+        recommendations = self._recommendations.get(key)
+        if recommendations is not None:
+            return recommendations
         
+        recommendations = []
         if critical_issues:
             recommendations.append("CRITICAL: Address non-compliant issues immediately")
-            for issue in critical_issues[:3]:  # Top 3 critical issues
-                recommendations.append(f"- {issue.recommendation}")
+            recommendations.extend(f"- {recommendation}" for recommendation in key[0])
         
         if warning_issues:
             recommendations.append("Review and address warning-level issues")
-            for issue in warning_issues[:2]:  # Top 2 warnings
-                recommendations.append(f"- {issue.recommendation}")
+            recommendations.extend(f"- {recommendation}" for recommendation in key[1])
         
         if not issues:
             recommendations.append("Study appears to be HIPAA compliant")
         
+        if len(self._recommendations) >= MAX_INTERNED_RECOMMENDATIONS:
+            self._recommendations.clear()
+        recommendations = self._recommendations[key] = tuple(recommendations)
         return recommendations
@@ -0,0 +1,101 @@
+import re
+import gzip
+import json
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, IO
+import logging
+
+from src.api.v2_adapter import adapt_v2_study
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# Study arrays inside v2 exports ({"studies": [...]}) and saved classic
+# responses ({"StudyFieldsResponse": {..., "StudyFields": [...]}})
+_STUDY_ARRAY = re.compile(r'"(?:studies|StudyFields)"\s*:\s*\[')
+_SEPARATORS = re.compile(r'[\s,]*')
+
+def _open_dump(path: Path) -> IO[str]:
+    """Open a dump as text, transparently decompressing .gz files"""
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+def _dump_format(path: Path) -> str:
+    """Format from the extension, ignoring a trailing .gz"""
+    suffixes = [suffix for suffix in path.suffixes if suffix != '.gz']
+    return suffixes[-1].lstrip('.') if suffixes else 'json'
+
+def _iter_ndjson(stream: IO[str]) -> Iterator[Dict[str, Any]]:
+    """Yield one record per non-blank line"""
+    for line_number, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error(f"Skipping malformed record on line {line_number}: {e}")
+
+def _iter_json_array(stream: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield the elements of the study array one at a time
+
+    Only the current element and one read chunk are held in memory, so
+    multi-gigabyte exports parse in bounded memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+
+    # Locate the opening bracket of the study array
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        stripped = buffer.lstrip()
+        if stripped.startswith('['):
+            pos = len(buffer) - len(stripped) + 1
+            break
+        match = _STUDY_ARRAY.search(buffer)
+        if match:
+            pos = match.end()
+            break
+        if not chunk:
+            raise ValueError("No study array found in JSON dump")
+
+    while True:
+        pos = _SEPARATORS.match(buffer, pos).end()
+
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+
+        try:
+            record, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                raise ValueError("Truncated JSON dump: study array is not closed")
+            # Drop consumed text before growing the buffer
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        yield record
+
+def iter_registry_dump(path, fields: List[str] = None) -> Iterator[Dict[str, List[str]]]:
+    """Stream studies from a local .json, .ndjson/.jsonl or gzip-compressed registry dump
+
+    Records may be classic study_fields dicts or v2 study records; v2
+    records are mapped to the classic dict-of-lists shape.
+    """
+    path = Path(path)
+    dump_format = _dump_format(path)
+    logger.info(f"Importing studies from {path} ({dump_format})")
+
+    with _open_dump(path) as stream:
+        records = _iter_ndjson(stream) if dump_format in ('ndjson', 'jsonl') else _iter_json_array(stream)
+
+        for record in records:
+            if 'protocolSection' in record:
+                yield adapt_v2_study(record, fields)
+            elif fields:
+                yield {name: record.get(name, []) for name in fields}
+            else:
+                yield record
@@ -0,0 +1,81 @@
+# src/data/dates.py
+import time
+import calendar
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Sequence, Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Full and abbreviated English month names -> month number
+_MONTHS = {
+    name.lower(): number
+    for names in (calendar.month_name, calendar.month_abbr)
+    for number, name in enumerate(names) if name
+}
+
+# (local midnight timestamp at which it expires, today's date)
+_today = (0.0, None)
+
+def today() -> date:
+    """Local date, recomputed only once the day rolls over
+
+    date.today() costs about a microsecond; date rules ask for it for
+    every study.
+    """
+    global _today
+    now = time.time()
+    if now >= _today[0]:
+        day = date.fromtimestamp(now)
+        _today = (datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp(), day)
+    return _today[1]
+
+@lru_cache(maxsize=65536)
+def parse_registry_date(value: str) -> Optional[date]:
+    """Parse a registry date; None when missing or unrecognized
+
+    Accepts the formats ClinicalTrials.gov uses across API versions:
+    'March 2, 2010', 'March 2010', '2010-03-02' and '2010-03'. Month
+    precision dates resolve to the first of the month. Dates repeat
+    heavily across studies, so parses are memoized and equal strings
+    share one date object.
+    """
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    try:
+        if text[:1].isdigit():
+            parts = text.split('-')
+            if len(parts[0]) != 4 or len(parts) not in (2, 3):
+                return None
+            return date(int(parts[0]), int(parts[1]), int(parts[2]) if len(parts) == 3 else 1)
+
+        month_name, _, rest = text.partition(' ')
+        month = _MONTHS.get(month_name.rstrip('.').lower())
+        if month is None:
+            return None
+        day, comma, year = rest.partition(',')
+        if comma:
+            return date(int(year), month, int(day))
+        return date(int(rest), month, 1)
+    except ValueError:
+        return None
+
+def parse_date_column(values: Sequence[Optional[str]],
+                      parser: Callable[[str], Optional[date]] = parse_registry_date) -> 'np.ndarray':
+    """Parse a column of date strings into datetime64[D], NaT when unparseable
+
+    Each distinct string is parsed once, however often it repeats. numpy
+    and pandas are only needed here (batch validation), so they are
+    imported on the first call rather than with every Study.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    parsed = [parser(value) for value in uniques]
+    # Trailing NaT is picked by missing values (code -1)
+    table = np.array([np.datetime64(day, 'D') if day else np.datetime64('NaT', 'D') for day in parsed]
+                     + [np.datetime64('NaT', 'D')], dtype='datetime64[D]')
+    return table[codes]
@@ -1,14 +1,17 @@
 import re
 
+from src.data.study import as_study
+
 def extract_contact_info(trial_data):
-    """Extract emails from trial data"""
+    """Extract emails from trial data (a Study or raw registry record)"""
+    study = as_study(trial_data)
     contacts = {
         'pi_emails': [],
         'central_contacts': []
     }
     
     # Extract from Principal Investigators
-    if affils := trial_data.get('OverallOfficialAffiliation', []):
+    if affils := study.official_affiliations:
         contacts['pi_emails'] = [
             match.group(0) 
             for affil in affils 
@@ -16,7 +19,7 @@ def extract_contact_info(trial_data):
         ]
     
     # Extract Central Contacts
-    if emails := trial_data.get('CentralContactEMail', []):
+    if emails := study.central_contact_emails:
         contacts['central_contacts'] = [
             email for email in emails
             if re.match(r'^[\w.+-]+@[\w.-]+\.[a-zA-Z]{2,}$', email)
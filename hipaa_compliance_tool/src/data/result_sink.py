@@ -0,0 +1,229 @@
+# src/data/result_sink.py
+import csv
+import gzip
+import json
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, IO
+import logging
+
+from src.compliance.models import ComplianceReport
+
+logger = logging.getLogger(__name__)
+
+# Write buffer per output file
+BUFFER_BYTES = 256 * 1024
+
+FORMATS = ('csv', 'ndjson', 'parquet')
+
+class ResultSink:
+    """Writes assessment result rows to a file as they are produced
+
+    Only the write buffer is held in memory, so output size does not
+    depend on the number of studies. The file is created on the first
+    row (a run without results leaves nothing behind) and flushed every
+    flush_rows rows, so a long run's output can be followed while it is
+    written. A path ending in .gz is gzip-compressed.
+    """
+
+    extension = ''
+
+    def __init__(self, path: str, flush_rows: int = 5000):
+        self.path = Path(path)
+        self.flush_rows = max(1, flush_rows)
+        self.rows = 0
+        self._file: Optional[IO[str]] = None
+
+    def _open(self) -> IO[str]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.suffix == '.gz':
+            return gzip.open(self.path, 'wt', encoding='utf-8', newline='', compresslevel=6)
+        return open(self.path, 'w', encoding='utf-8', newline='', buffering=BUFFER_BYTES)
+
+    def write(self, row: Dict[str, Any], report: ComplianceReport = None):
+        """Append one result row; formats that store issues take them from report"""
+        if self._file is None:
+            self._file = self._open()
+            self._start(row)
+        self._write(row, report)
+        self.rows += 1
+        if self.rows % self.flush_rows == 0:
+            self._flush()
+
+    def _start(self, row: Dict[str, Any]):
+        """Called once before the first row is written"""
+
+    def _write(self, row: Dict[str, Any], report: Optional[ComplianceReport]):
+        raise NotImplementedError
+
+    def _flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info(f"Wrote {self.rows} results to {self.path}")
+
+    def __enter__(self) -> 'ResultSink':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class CsvResultSink(ResultSink):
+    """CSV with a header row taken from the first row's keys"""
+
+    extension = '.csv'
+
+    def _start(self, row: Dict[str, Any]):
+        self._fields: List[str] = list(row)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self._fields)
+
+    def _write(self, row: Dict[str, Any], report: Optional[ComplianceReport]):
+        self._writer.writerow([row.get(field, '') for field in self._fields])
+
+class NdjsonResultSink(ResultSink):
+    """One JSON object per line"""
+
+    extension = '.ndjson'
+
+    def _write(self, row: Dict[str, Any], report: Optional[ComplianceReport]):
+        self._file.write(json.dumps(row, ensure_ascii=False, separators=(',', ':'), default=str))
+        self._file.write('\n')
+
+class ParquetResultSink(ResultSink):
+    """Columnar results for analytics, as two Hive-partitioned Parquet datasets
+
+    Result rows go to <directory>/assessment_results/run_date=YYYY-MM-DD/<name>
+    and one row per issue to the same layout under assessment_issues/, both carrying
+    run_id and study_id to join on. Status, rule, severity and field
+    columns are dictionary-encoded. Rows are buffered column-wise and
+    written as a row group every flush_rows rows, so memory stays bounded
+    and readers can skip whole row groups and unread columns. Needs
+    pyarrow, imported only when a Parquet sink is opened.
+    """
+
+    extension = '.parquet'
+
+    def __init__(self, directory: str, name: str, run_date: date, flush_rows: int = 65536,
+                 run_id: int = None):
+        partition = f"run_date={run_date.isoformat()}"
+        super().__init__(str(Path(directory) / 'assessment_results' / partition / name), flush_rows)
+        self.issues_path = Path(directory) / 'assessment_issues' / partition / name
+        self.run_id = run_id
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet output (pip install pyarrow)")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._results: Dict[str, list] = {}
+        self._issues: Dict[str, list] = {}
+        self._writers = None
+
+    def _open(self):
+        pa, pq = self._pa, self._pq
+        category = pa.dictionary(pa.int32(), pa.string())
+        self._result_schema = pa.schema([
+            ('run_id', pa.int64()),
+            ('study_id', pa.string()),
+            ('title', pa.string()),
+            ('compliance_status', category),
+            ('compliance_score', pa.float64()),
+            ('issues_count', pa.int32()),
+            ('contacts', pa.int32()),
+            ('assessment_date', pa.timestamp('us'))
+        ])
+        self._issue_schema = pa.schema([
+            ('run_id', pa.int64()),
+            ('study_id', pa.string()),
+            ('rule_id', category),
+            ('severity', category),
+            ('affected_field', category)
+        ])
+        self._results = {name: [] for name in self._result_schema.names}
+        self._issues = {name: [] for name in self._issue_schema.names}
+        for path in (self.path, self.issues_path):
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self._writers = (pq.ParquetWriter(str(self.path), self._result_schema, compression='zstd'),
+                         pq.ParquetWriter(str(self.issues_path), self._issue_schema, compression='zstd'))
+        # The writers are the open "file" for the base class
+        return self._writers
+
+    def _write(self, row: Dict[str, Any], report: Optional[ComplianceReport]):
+        results = self._results
+        study_id = row['study_id']
+        results['run_id'].append(self.run_id)
+        results['study_id'].append(study_id)
+        results['title'].append(row.get('title'))
+        results['compliance_status'].append(row['compliance_status'])
+        results['compliance_score'].append(row['compliance_score'])
+        results['issues_count'].append(row.get('issues_count'))
+        results['contacts'].append(row.get('contacts'))
+        results['assessment_date'].append(
+            report.assessment_date if report else datetime.fromisoformat(row['assessment_date'])
+        )
+        if report:
+            issues = self._issues
+            for issue in report.issues:
+                issues['run_id'].append(self.run_id)
+                issues['study_id'].append(study_id)
+                issues['rule_id'].append(issue.rule_id)
+                issues['severity'].append(issue.severity.value)
+                issues['affected_field'].append(issue.affected_field)
+
+    def _flush(self):
+        """Write the buffered rows as one row group per dataset"""
+        for writer, schema, columns in ((self._writers[0], self._result_schema, self._results),
+                                        (self._writers[1], self._issue_schema, self._issues)):
+            if not columns['study_id']:
+                continue
+            arrays = [
+                self._pa.array(values, type=field.type.value_type).dictionary_encode()
+                if self._pa.types.is_dictionary(field.type) else self._pa.array(values, type=field.type)
+                for field, values in zip(schema, columns.values())
+            ]
+            writer.write_table(self._pa.Table.from_arrays(arrays, schema=schema))
+            for values in columns.values():
+                values.clear()
+
+    def close(self):
+        if self._writers is not None:
+            try:
+                self._flush()
+            finally:
+                for writer in self._writers:
+                    writer.close()
+                self._writers = self._file = None
+            logger.info(f"Wrote {self.rows} results to {self.path}")
+
+_SINKS = {'csv': CsvResultSink, 'ndjson': NdjsonResultSink, 'parquet': ParquetResultSink}
+
+def open_result_sink(output_format: str = 'csv', compress: bool = False, directory: str = '.',
+                     flush_rows: int = 5000, prefix: str = 'compliance_assessment',
+                     started_at: datetime = None, run_id: int = None,
+                     row_group_rows: int = 65536) -> ResultSink:
+    """Sink for a new timestamped results file, e.g. compliance_assessment_20240101_120000.csv.gz
+
+    The name is stamped with started_at (default: local time now); pass the
+    run's own start time so it matches the run's other records.
+
+    Parquet output is partitioned by run date instead (see
+    ParquetResultSink), uses row_group_rows per row group and is always
+    compressed.
+    """
+    try:
+        sink_class = _SINKS[output_format]
+    except KeyError:
+        raise ValueError(f"Unknown output format {output_format!r}; expected one of {', '.join(FORMATS)}")
+    started_at = started_at or datetime.now()
+    name = f"{prefix}_{started_at.strftime('%Y%m%d_%H%M%S')}{sink_class.extension}"
+    if sink_class is ParquetResultSink:
+        return ParquetResultSink(directory, name, started_at.date(), flush_rows=row_group_rows,
+                                 run_id=run_id)
+    if compress:
+        name += '.gz'
+    return sink_class(str(Path(directory) / name), flush_rows=flush_rows)
@@ -0,0 +1,131 @@
+# src/data/study.py
+import sys
+from typing import Dict, List, Any, Iterable, Tuple, Union
+
+from src.data.dates import parse_registry_date
+
+# Registry field name -> (attribute, is_list, intern). Values that repeat
+# across many studies (statuses, affiliations, dates) are interned so 100k
+# records share one copy of each distinct string.
+FIELD_MAP: Dict[str, Tuple[str, bool, bool]] = {
+    'NCTId': ('nct_id', False, False),
+    'BriefTitle': ('brief_title', False, False),
+    'OverallStatus': ('overall_status', False, True),
+    'StudyFirstSubmitDate': ('first_submit_date', False, True),
+    'LastUpdatePostDate': ('last_update_date', False, True),
+    'CompletionDate': ('completion_date', False, True),
+    'CentralContactEMail': ('central_contact_emails', True, False),
+    'OverallOfficialName': ('official_names', True, False),
+    'OverallOfficialAffiliation': ('official_affiliations', True, True),
+    'LocationContactName': ('location_contact_names', True, False),
+    'LocationContactPhone': ('location_contact_phones', True, False),
+    'LocationContactEMail': ('location_contact_emails', True, False),
+    'LargeDocHasICF': ('icf_documents', True, True),
+}
+
+# Date field attribute -> attribute holding its parsed datetime.date
+DATE_ATTRIBUTES: Dict[str, str] = {
+    'first_submit_date': 'first_submit_day',
+    'last_update_date': 'last_update_day',
+    'completion_date': 'completion_day',
+}
+
+def _intern(value: str) -> str:
+    return sys.intern(value) if isinstance(value, str) else value
+
+class Study:
+    """Immutable, slotted clinical study record
+
+    Built once from the registry's dict-of-single-element-lists shape;
+    scalar fields are plain strings (or None) and repeated fields are
+    tuples (empty when absent). Date fields are also kept parsed, in
+    whichever format the registry sent them (see DATE_ATTRIBUTES).
+    """
+
+    __slots__ = tuple(attribute for attribute, _, _ in FIELD_MAP.values()) + tuple(DATE_ATTRIBUTES.values())
+
+    def __init__(self, **values):
+        for attribute, is_list, _ in FIELD_MAP.values():
+            object.__setattr__(self, attribute, values.get(attribute, () if is_list else None))
+        for attribute, parsed in DATE_ATTRIBUTES.items():
+            object.__setattr__(self, parsed, parse_registry_date(getattr(self, attribute)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, Study):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        return f"Study(nct_id={self.nct_id!r}, brief_title={self.brief_title!r})"
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> 'Study':
+        """Normalize a classic-shaped registry record (dict of lists)"""
+        values = {}
+        for field_name, (attribute, is_list, intern) in FIELD_MAP.items():
+            raw = record.get(field_name)
+            if raw is None:
+                continue
+            if isinstance(raw, str):
+                raw = [raw]
+            if intern:
+                raw = [_intern(value) for value in raw]
+            if is_list:
+                values[attribute] = tuple(raw)
+            elif raw:
+                values[attribute] = raw[0]
+        return cls(**values)
+
+    def replace(self, **changes) -> 'Study':
+        """Copy of the study with some attributes changed"""
+        # Parsed dates are recomputed from the (possibly changed) strings
+        values = {attribute: getattr(self, attribute) for attribute, _, _ in FIELD_MAP.values()}
+        values.update(changes)
+        return type(self)(**values)
+
+    def has(self, field_name: str) -> bool:
+        """Whether the study has a non-empty value for a registry field"""
+        return bool(getattr(self, FIELD_MAP[field_name][0]))
+
+    def to_record(self) -> Dict[str, List[str]]:
+        """Back to the registry dict-of-lists shape, omitting empty fields"""
+        record = {}
+        for field_name, (attribute, is_list, _) in FIELD_MAP.items():
+            value = getattr(self, attribute)
+            if is_list and value:
+                record[field_name] = list(value)
+            elif not is_list and value is not None:
+                record[field_name] = [value]
+        return record
+
+def to_columns(studies: Iterable[Study]) -> Dict[str, list]:
+    """Registry field -> column of values, for batch validation"""
+    studies = list(studies)
+    return {
+        field_name: [getattr(study, attribute) for study in studies]
+        for field_name, (attribute, _, _) in FIELD_MAP.items()
+    }
+
+def as_study(record: Union[Study, Dict[str, Any]]) -> Study:
+    """Accept a Study, a raw registry record, or a read-only view of a Study
+
+    Anything but a registry dict is taken to read like a Study (e.g.
+    PHIProtection.sanitized_view()) and is returned as is.
+    """
+    return Study.from_record(record) if isinstance(record, dict) else record
@@ -3,14 +3,15 @@ import smtplib
 from email.message import EmailMessage
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
 from datetime import datetime
 import logging
 
 from config import settings
 from src.monitoring.logger import hipaa_logger
 from src.monitoring.metrics import performance_monitor
-from src.security.encryption import EncryptionManager
+from src.security.encryption import EncryptionManager, PHIProtection
+from src.data.study import Study, as_study
 from src.localization.i18n import i18n
 
 logger = logging.getLogger(__name__)
@@ -20,22 +21,27 @@ class EmailSender:
 
     def __init__(self):
         self.encryption_manager = EncryptionManager()
+        self.phi_protection = PHIProtection()
         self.smtp_server = settings.BREVO_SMTP_SERVER
         self.smtp_port = settings.BREVO_SMTP_PORT
         self.username = settings.BREVO_USERNAME
         self.password = settings.BREVO_PASSWORD
 
-    def send_compliance_report(self, recipient: str, study_data: Dict[str, Any],
+    def send_compliance_report(self, recipient: str, study_data: Union[Study, Dict[str, Any]],
                              compliance_report: Any, user_id: str = None) -> bool:
         """Send HIPAA compliance report (legitimate, not deceptive)"""
         try:
+            # Study details leave through the sanitized view only; PHI is
+            # encrypted (and its cost counted under 'email') if it is read
+            study = self.phi_protection.sanitized_view(as_study(study_data), 'email')
+
             # Create professional, legitimate email content
             subject = i18n.translate('email_subject_compliance',
-                                   study_id=study_data.get('NCTId', ['Unknown'])[0])
+                                   study_id=study.nct_id or 'Unknown')
 
             body = i18n.translate('email_body_compliance',
-                study_id=study_data.get('NCTId', ['Unknown'])[0],
-                study_title=study_data.get('BriefTitle', ['Unknown'])[0],
+                study_id=study.nct_id or 'Unknown',
+                study_title=study.brief_title or 'Unknown',
                 compliance_status=compliance_report.overall_status.value,
                 compliance_score=compliance_report.score,
                 recommendations='\n'.join(f"• {rec}" for rec in compliance_report.recommendations)
@@ -5,6 +5,8 @@ from typing import Dict, Any, Optional
 from pathlib import Path
 import logging
 
+from src.utils.lazy import LazyInstance
+
 logger = logging.getLogger(__name__)
 
 class LocalizationManager:
@@ -234,7 +236,8 @@ HIPAA Compliance Team""",
         return False
 
 # Global localization manager
-i18n = LocalizationManager()
+# Translations are loaded (and defaults written) on first use, not on import
+i18n: LocalizationManager = LazyInstance(LocalizationManager)
 
 # Convenience function
 def _(key: str, **kwargs) -> str:
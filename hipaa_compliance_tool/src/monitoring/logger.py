@@ -7,6 +7,7 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 from pathlib import Path
 from config import settings
+from src.utils.lazy import LazyInstance
 
 class HIPAALogger:
     """HIPAA-compliant logging system with audit trail"""
@@ -159,5 +160,5 @@ class HIPAALogger:
         # In a web application, this would extract from request
         return "HIPAA Compliance Tool"
 
-# Global logger instance
-hipaa_logger = HIPAALogger()
+# Global logger instance; log files are opened on first use, not on import
+hipaa_logger: HIPAALogger = LazyInstance(HIPAALogger)
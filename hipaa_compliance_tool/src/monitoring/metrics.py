@@ -2,7 +2,7 @@
 import time
 import json
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence
 from collections import defaultdict, deque
 from threading import Lock
 import logging
@@ -17,6 +17,7 @@ class MetricsCollector:
         self.counters = defaultdict(int)
         self.gauges = defaultdict(float)
         self.timers = defaultdict(deque)
+        self.histograms = {}
         self.lock = Lock()
         
         # Rate limiting tracking
@@ -63,6 +64,23 @@ class MetricsCollector:
                 'type': 'timer'
             })
     
+    def observe_histogram(self, name: str, buckets: Sequence[float], counts: Sequence[int],
+                          tags: Dict[str, str] = None):
+        """Add bucket counts to a fixed-bucket histogram
+
+        Histograms hold only their counts, so callers aggregate locally and
+        add them in bulk; the buckets of one histogram must not change.
+        """
+        with self.lock:
+            key = self._make_key(name, tags)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                self.histograms[key] = {'buckets': list(buckets), 'counts': list(counts)}
+            elif histogram['buckets'] != list(buckets):
+                raise ValueError(f"Histogram {key} already uses buckets {histogram['buckets']}")
+            else:
+                histogram['counts'] = [mine + theirs for mine, theirs in zip(histogram['counts'], counts)]
+    
     def check_rate_limit(self, identifier: str, limit_type: str, 
                         limit_per_minute: int = 10) -> bool:
         """Check if rate limit is exceeded"""
@@ -93,7 +111,9 @@ class MetricsCollector:
             summary = {
                 'counters': dict(self.counters),
                 'gauges': dict(self.gauges),
-                'timers': {}
+                'timers': {},
+                'histograms': {key: {'buckets': list(histogram['buckets']), 'counts': list(histogram['counts'])}
+                               for key, histogram in self.histograms.items()}
             }
             
             # Calculate timer statistics
@@ -109,6 +129,38 @@ class MetricsCollector:
             
             return summary
     
+    def drain(self) -> Dict[str, Any]:
+        """Export counters, gauges and timers recorded so far, then reset
+
+        Worker processes drain after each task so the parent can merge()
+        exactly what each task recorded.
+        """
+        with self.lock:
+            snapshot = {
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'timers': {key: list(times) for key, times in self.timers.items()},
+                'histograms': self.histograms
+            }
+            self.histograms = {}
+            self.metrics.clear()
+            self.counters.clear()
+            self.gauges.clear()
+            self.timers.clear()
+            return snapshot
+    
+    def merge(self, snapshot: Dict[str, Any]):
+        """Fold a drained snapshot from another collector into this one"""
+        for key, value in snapshot.get('counters', {}).items():
+            self.increment_counter(key, value)
+        for key, value in snapshot.get('gauges', {}).items():
+            self.set_gauge(key, value)
+        for key, times in snapshot.get('timers', {}).items():
+            for duration in times:
+                self.record_timer(key, duration)
+        for key, histogram in snapshot.get('histograms', {}).items():
+            self.observe_histogram(key, histogram['buckets'], histogram['counts'])
+    
     def _make_key(self, name: str, tags: Dict[str, str] = None) -> str:
         """Create metric key with tags"""
         if not tags:
@@ -1,6 +1,4 @@
 # src/security/auth.py
-import jwt
-import bcrypt
 import secrets
 from datetime import datetime, timedelta
 from functools import wraps
@@ -10,6 +8,8 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# jwt and bcrypt load on first use, keeping this module cheap to import
+
 class AuthenticationManager:
     """Handle user authentication and authorization"""
     
@@ -19,15 +19,18 @@ class AuthenticationManager:
     
     def hash_password(self, password: str) -> str:
         """Hash password using bcrypt"""
+        import bcrypt
         salt = bcrypt.gensalt()
         return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
     
     def verify_password(self, password: str, hashed: str) -> bool:
         """Verify password against hash"""
+        import bcrypt
         return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
     
     def generate_token(self, user_id: str, permissions: list = None) -> str:
         """Generate JWT token for user"""
+        import jwt
         payload = {
             'user_id': user_id,
             'permissions': permissions or [],
@@ -38,6 +41,7 @@ class AuthenticationManager:
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify and decode JWT token"""
+        import jwt
         try:
             payload = jwt.decode(token, self.jwt_secret, algorithms=['HS256'])
             return payload
@@ -1,14 +1,25 @@
 # src/security/encryption.py
 import os
 import base64
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from typing import Union
+from time import perf_counter_ns
+from typing import Dict, Any, Iterable, Tuple, Union
 import logging
 
+from src.data.study import Study
+from src.monitoring.metrics import MetricsCollector, metrics_collector
+
 logger = logging.getLogger(__name__)
 
+# Study attributes dropped from sanitized data, and those encrypted
+PHI_REMOVED_ATTRIBUTES = ('official_names', 'location_contact_names', 'location_contact_phones')
+PHI_ENCRYPTED_ATTRIBUTES = ('central_contact_emails',)
+
+# Counter names, tagged with stage=<consumer that needed sanitized PHI>
+PHI_SANITIZE_NS = 'phi_sanitize_ns'
+PHI_VALUES_ENCRYPTED = 'phi_values_encrypted'
+
+# cryptography is imported where used, so importing this module stays cheap
+
 class EncryptionManager:
     """Handle data encryption for HIPAA compliance"""
     
@@ -20,14 +31,18 @@ class EncryptionManager:
         else:
             self.key = self._generate_key()
         
+        from cryptography.fernet import Fernet
         self.cipher = Fernet(self._derive_key(self.key))
     
     def _generate_key(self) -> bytes:
         """Generate a new encryption key"""
+        from cryptography.fernet import Fernet
         return Fernet.generate_key()
     
     def _derive_key(self, password: bytes) -> bytes:
         """Derive encryption key from password"""
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
         salt = b'hipaa_compliance_salt'  # In production, use random salt per encryption
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
@@ -67,26 +82,102 @@ class EncryptionManager:
     
     def hash_data(self, data: str) -> str:
         """Create one-way hash of data for indexing"""
+        from cryptography.hazmat.primitives import hashes
         digest = hashes.Hash(hashes.SHA256())
         digest.update(data.encode())
         return base64.urlsafe_b64encode(digest.finalize()).decode()
 
+class SanitizedStudy:
+    """Sanitized, read-only view of a Study that does the work on access
+
+    Non-PHI data attributes read through to the study. Removed PHI fields read
+    as empty, and encrypted fields are encrypted the first time they are
+    read, then cached. to_study() builds the fully sanitized record for
+    whatever persists or sends it. The study is never copied and nothing is
+    encrypted unless a consumer asks, and the time spent is counted under
+    the view's stage.
+    """
+
+    __slots__ = ('_study', '_protection', '_stage', '_encrypted')
+
+    def __init__(self, study: Study, protection: 'PHIProtection', stage: str):
+        self._study = study
+        self._protection = protection
+        self._stage = stage
+        self._encrypted: Dict[str, Tuple[str, ...]] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        if name in PHI_REMOVED_ATTRIBUTES:
+            return ()
+        if name in PHI_ENCRYPTED_ATTRIBUTES:
+            if name not in self._encrypted:
+                self._encrypted[name] = self._protection.encrypt_values(getattr(self._study, name), self._stage)
+            return self._encrypted[name]
+        # Only data attributes: Study methods would read the raw fields
+        if name in Study.__slots__:
+            return getattr(self._study, name)
+        raise AttributeError(f"{type(self).__name__} has no attribute {name!r}")
+
+    def to_study(self) -> Study:
+        """The sanitized Study, encrypting any fields not read yet"""
+        changes = {name: () for name in PHI_REMOVED_ATTRIBUTES}
+        changes.update((name, getattr(self, name)) for name in PHI_ENCRYPTED_ATTRIBUTES)
+        return self._study.replace(**changes)
+
+    def to_record(self) -> Dict[str, Any]:
+        return self.to_study().to_record()
+
 class PHIProtection:
     """Protect Personal Health Information (PHI)"""
     
     def __init__(self):
-        self.encryption_manager = EncryptionManager()
+        self._encryption_manager = None
+
+    @property
+    def encryption_manager(self) -> EncryptionManager:
+        """Built on first encryption; deriving its key is deliberately slow"""
+        if self._encryption_manager is None:
+            self._encryption_manager = EncryptionManager()
+        return self._encryption_manager
+
+    def encrypt_values(self, values: Iterable[str], stage: str,
+                       collector: MetricsCollector = None) -> Tuple[str, ...]:
+        """Encrypt PHI values, counting the time against `stage`"""
+        started = perf_counter_ns()
+        encrypted = tuple(self.encryption_manager.encrypt_email(value) for value in values)
+        if encrypted:
+            collector = collector or metrics_collector
+            tags = {'stage': stage}
+            collector.increment_counter(PHI_SANITIZE_NS, perf_counter_ns() - started, tags=tags)
+            collector.increment_counter(PHI_VALUES_ENCRYPTED, len(encrypted), tags=tags)
+        return encrypted
+
+    def sanitized_view(self, study: Study, stage: str) -> SanitizedStudy:
+        """Lazy sanitized view; `stage` names the consumer the PHI is leaving through
+
+        A view that is already sanitized is returned as is.
+        """
+        if isinstance(study, SanitizedStudy):
+            return study
+        return SanitizedStudy(study, self, stage)
     
-    def sanitize_trial_data(self, trial_data: dict) -> dict:
-        """Remove or encrypt PHI from trial data"""
+    def sanitize_trial_data(self, trial_data: Union[dict, Study],
+                            stage: str = 'sanitize') -> Union[dict, Study]:
+        """Remove or encrypt PHI from trial data, eagerly
+
+        Prefer sanitized_view() where only some consumers need the
+        sanitized fields.
+        """
+        if isinstance(trial_data, Study):
+            return self.sanitized_view(trial_data, stage).to_study()
+
         sanitized = trial_data.copy()
         
         # Encrypt email addresses
         if 'CentralContactEMail' in sanitized:
-            sanitized['CentralContactEMail'] = [
-                self.encryption_manager.encrypt_email(email)
-                for email in sanitized['CentralContactEMail']
-            ]
+            sanitized['CentralContactEMail'] = list(
+                self.encrypt_values(sanitized['CentralContactEMail'], stage)
+            )
         
         # Remove potentially sensitive fields
         sensitive_fields = [
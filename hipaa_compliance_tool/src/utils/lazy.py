@@ -0,0 +1,47 @@
+# src/utils/lazy.py
+from threading import Lock
+from typing import Any, Callable
+
+class LazyInstance:
+    """Module-level singleton built on first attribute access
+
+    Stands in for `instance = Factory()` at import time, so importing a
+    module does not run the factory's side effects (creating directories,
+    opening log files, writing defaults). Attribute reads, writes and
+    deletes go to the real instance, which is built once, thread-safely.
+    """
+
+    __slots__ = ('_factory', '_instance', '_lock')
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', Lock())
+
+    def _get(self) -> Any:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = self._factory()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._get(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self._get(), name)
+
+    def __repr__(self) -> str:
+        if self._instance is None:
+            return f"<lazy {getattr(self._factory, '__name__', 'instance')} (not built)>"
+        return repr(self._instance)
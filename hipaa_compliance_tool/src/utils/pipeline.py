@@ -0,0 +1,344 @@
+# src/utils/pipeline.py
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Callable, Iterable, Iterator
+import logging
+
+from src.monitoring.metrics import MetricsCollector, metrics_collector
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+# How often blocked puts/gets wake up to check for cancellation
+_POLL_SECONDS = 0.1
+
+class PipelineCancelled(Exception):
+    """Raised inside stages when another stage failed"""
+
+@dataclass
+class StageStats:
+    """Throughput and backpressure of one pipeline stage"""
+    name: str
+    workers: int
+    items_in: int = 0
+    items_out: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # Depth of the stage's output queue in items (whole batches), sampled
+    # at every put
+    batches: int = 0
+    queue_depth_sum: int = 0
+    queue_depth_max: int = 0
+
+    @property
+    def dropped(self) -> int:
+        """Items filtered out (a stage function returned None)"""
+        return max(0, self.items_in - self.items_out)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Items emitted per second while the stage ran"""
+        return self.items_out / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def queue_depth_mean(self) -> float:
+        return self.queue_depth_sum / self.batches if self.batches else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'dropped': self.dropped,
+            'seconds': round(self.elapsed, 3),
+            'throughput': round(self.throughput, 1),
+            'queue_depth_mean': round(self.queue_depth_mean, 1),
+            'queue_depth_max': self.queue_depth_max
+        }
+
+class _Stage:
+    def __init__(self, name: str, workers: int, run: Callable[[Iterator[Any]], Iterator[Any]]):
+        self.name = name
+        self.stats = StageStats(name, workers)
+        self.run = run
+
+class Pipeline:
+    """Stages connected by bounded queues, each running in its own thread
+
+    A pipeline is a source, any number of stages and a sink:
+
+        Pipeline(queue_size=1000) \\
+            .source('fetch', records) \\
+            .stage('normalize', to_study, workers=2) \\
+            .transform('validate', assessor.assess) \\
+            .sink('collect', write_row) \\
+            .run()
+
+    stage() applies a function per item (returning None drops the item),
+    on `workers` threads while keeping input order. transform() hands a
+    stage the whole input iterator, for steps that manage their own
+    concurrency such as a process pool. The sink runs in the calling
+    thread. Items move between stages in batches of up to batch_size. A
+    stage ships a partial batch as soon as its input runs dry, and the
+    source ships one once it has waited batch_wait seconds, even while
+    the source is blocked fetching its next page, so slow sources are not
+    held back. Full queues (queue_size items) block the upstream stage,
+    so memory stays bounded however fast the source is. The first
+    exception in any stage cancels the others and is re-raised by run().
+    """
+
+    def __init__(self, queue_size: int = 1000, batch_size: int = 64, batch_wait: float = 0.25):
+        self.queue_size = queue_size
+        self.batch_size = max(1, min(batch_size, queue_size))
+        self.batch_wait = batch_wait
+        self._stages: List[_Stage] = []
+        self._sink: Optional[_Stage] = None
+        self._sink_fn: Optional[Callable[[Any], None]] = None
+        self._cancelled = threading.Event()
+        self._errors: List[BaseException] = []
+
+    @property
+    def stats(self) -> List[StageStats]:
+        stages = self._stages + ([self._sink] if self._sink else [])
+        return [stage.stats for stage in stages]
+
+    def source(self, name: str, items: Iterable[Any]) -> 'Pipeline':
+        """First stage: iterate items (e.g. a streaming fetch)"""
+        if self._stages:
+            raise ValueError("A pipeline has exactly one source, added first")
+        self._stages.append(_Stage(name, 1, lambda _: iter(items)))
+        return self
+
+    def stage(self, name: str, fn: Callable[[Any], Any], workers: int = 1) -> 'Pipeline':
+        """Apply fn to every item on `workers` threads, in input order"""
+        workers = max(1, workers)
+        if workers == 1:
+            def run(items: Iterator[Any]) -> Iterator[Any]:
+                for item in items:
+                    result = fn(item)
+                    if result is not None:
+                        yield result
+        else:
+            def run(items: Iterator[Any]) -> Iterator[Any]:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"pipeline-{name}") as pool:
+                    pending = deque()
+                    for item in items:
+                        pending.append(pool.submit(fn, item))
+                        # Bounded in-flight work keeps backpressure intact
+                        while len(pending) >= workers * 2:
+                            result = pending.popleft().result()
+                            if result is not None:
+                                yield result
+                    while pending:
+                        result = pending.popleft().result()
+                        if result is not None:
+                            yield result
+        return self._add(name, workers, run)
+
+    def transform(self, name: str, fn: Callable[[Iterator[Any]], Iterable[Any]],
+                  workers: int = 1) -> 'Pipeline':
+        """Hand the stage's whole input iterator to fn; `workers` is informational"""
+        return self._add(name, workers, lambda items: iter(fn(items)))
+
+    def sink(self, name: str, fn: Callable[[Any], None]) -> 'Pipeline':
+        """Last stage: consume every item in the thread that calls run()"""
+        self._sink = _Stage(name, 1, None)
+        self._sink_fn = fn
+        return self
+
+    def _add(self, name: str, workers: int, run) -> 'Pipeline':
+        if not self._stages:
+            raise ValueError("Add a source before other stages")
+        self._stages.append(_Stage(name, workers, run))
+        return self
+
+    def run(self) -> List[StageStats]:
+        """Run every stage to completion; returns per-stage statistics"""
+        if not self._stages or self._sink is None:
+            raise ValueError("A pipeline needs a source and a sink")
+
+        # Items travel in batches to keep queue overhead off the per-item path
+        queues = [queue.Queue(maxsize=max(1, self.queue_size // self.batch_size)) for _ in self._stages]
+        threads = []
+        for index, stage in enumerate(self._stages):
+            inbox = queues[index - 1] if index else None
+            thread = threading.Thread(
+                target=self._run_stage, args=(stage, inbox, queues[index]),
+                name=f"pipeline-{stage.name}", daemon=True
+            )
+            threads.append(thread)
+            thread.start()
+
+        sink = self._sink.stats
+        sink.started_at = time.perf_counter()
+        try:
+            for item in self._drain(queues[-1]):
+                sink.items_in += 1
+                self._sink_fn(item)
+                sink.items_out += 1
+        except PipelineCancelled:
+            pass
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            sink.finished_at = time.perf_counter()
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+        self._log_stats()
+        return self.stats
+
+    def _run_stage(self, stage: _Stage, inbox: Optional[queue.Queue], outbox: queue.Queue):
+        stats = stage.stats
+        stats.started_at = time.perf_counter()
+        batch = []
+        try:
+            if inbox is None:
+                self._run_source(stage, outbox)
+                return
+            for item in stage.run(self._counted(self._drain(inbox), stats)):
+                batch.append(item)
+                # Ship full batches, or whatever is ready when the input runs dry
+                if len(batch) >= self.batch_size or inbox.empty():
+                    self._ship(outbox, batch, stats)
+                    batch = []
+            if batch:
+                self._ship(outbox, batch, stats)
+        except PipelineCancelled:
+            pass
+        except BaseException as e:
+            logger.error(f"Pipeline stage {stage.name} failed: {e}")
+            self._fail(e)
+        finally:
+            stats.finished_at = time.perf_counter()
+            try:
+                if not self._cancelled.is_set():
+                    self._put(outbox, _DONE)
+            except PipelineCancelled:
+                pass
+
+    def _run_source(self, stage: _Stage, outbox: queue.Queue):
+        """Read the source on a helper thread while this one ships partial
+        batches that have waited batch_wait seconds"""
+        stats = stage.stats
+        lock = threading.Lock()
+        finished = threading.Event()
+        errors = []
+        batch = []
+        batch_started = 0.0
+
+        def read():
+            nonlocal batch, batch_started
+            try:
+                for item in stage.run(None):
+                    with lock:
+                        stats.items_in += 1
+                        if not batch:
+                            batch_started = time.perf_counter()
+                        batch.append(item)
+                        if len(batch) >= self.batch_size:
+                            self._ship(outbox, batch, stats)
+                            batch = []
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                finished.set()
+
+        # Daemon, so a source stuck in a fetch cannot hold up a cancelled run
+        threading.Thread(target=read, name=f"pipeline-{stage.name}-read", daemon=True).start()
+        while not finished.wait(min(self.batch_wait, _POLL_SECONDS)):
+            if self._cancelled.is_set():
+                raise PipelineCancelled()
+            with lock:
+                if batch and time.perf_counter() - batch_started >= self.batch_wait:
+                    self._ship(outbox, batch, stats)
+                    batch = []
+        if errors:
+            raise errors[0]
+        if batch:
+            self._ship(outbox, batch, stats)
+
+    def _ship(self, outbox: queue.Queue, batch: List[Any], stats: StageStats):
+        self._put(outbox, batch)
+        stats.items_out += len(batch)
+        stats.batches += 1
+        depth = outbox.qsize() * self.batch_size
+        stats.queue_depth_sum += depth
+        if depth > stats.queue_depth_max:
+            stats.queue_depth_max = depth
+
+    @staticmethod
+    def _counted(items: Iterator[Any], stats: StageStats) -> Iterator[Any]:
+        for item in items:
+            stats.items_in += 1
+            yield item
+
+    def _drain(self, inbox: queue.Queue) -> Iterator[Any]:
+        """Items from a queue until the upstream stage is done"""
+        while True:
+            try:
+                batch = inbox.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if self._cancelled.is_set():
+                    raise PipelineCancelled()
+                continue
+            if batch is _DONE:
+                return
+            yield from batch
+
+    def _put(self, outbox: queue.Queue, item: Any):
+        """Blocking put that gives up once the pipeline is cancelled"""
+        while True:
+            try:
+                outbox.put(item, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                if self._cancelled.is_set():
+                    raise PipelineCancelled()
+
+    def _fail(self, error: BaseException):
+        self._errors.append(error)
+        self._cancelled.set()
+
+    def _log_stats(self):
+        for stats in self.stats:
+            logger.info(f"Pipeline stage {stats.name}: {stats.items_out} items, "
+                        f"{stats.throughput:.0f}/s, queue depth mean {stats.queue_depth_mean:.1f} "
+                        f"max {stats.queue_depth_max}")
+
+    def publish(self, collector: MetricsCollector = None):
+        """Per-stage item counts and queue depths into the metrics collector"""
+        collector = collector or metrics_collector
+        for stats in self.stats:
+            tags = {'stage': stats.name}
+            collector.increment_counter('pipeline_items', stats.items_out, tags=tags)
+            collector.increment_counter('pipeline_dropped', stats.dropped, tags=tags)
+            collector.set_gauge('pipeline_throughput', stats.throughput, tags=tags)
+            collector.set_gauge('pipeline_queue_depth_max', stats.queue_depth_max, tags=tags)
+
+def format_pipeline_stats(rows: List[Dict[str, Any]]) -> str:
+    """Fixed-width table of StageStats.to_dict() rows"""
+    width = max([len('Stage')] + [len(row['stage']) for row in rows])
+    lines = [f"{'Stage':<{width}}  {'Workers':>7}  {'Items':>9}  {'Dropped':>7}  "
+             f"{'Items/s':>9}  {'Queue avg':>9}  {'Queue max':>9}"]
+    for row in rows:
+        lines.append(
+            f"{row['stage']:<{width}}  {row['workers']:>7}  {row['items_out']:>9}  {row['dropped']:>7}  "
+            f"{row['throughput']:>9.0f}  {row['queue_depth_mean']:>9.1f}  {row['queue_depth_max']:>9}"
+        )
+    return '\n'.join(lines)
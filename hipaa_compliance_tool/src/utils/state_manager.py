@@ -1,14 +1,21 @@
 import json
 import os
-from datetime import datetime
+from collections import deque
+from datetime import datetime, date
+
+from src.data.dates import parse_registry_date
 
 class CampaignState:
     """Track campaign progress and state"""
     STATE_FILE = "campaign_state.json"
-    
+    # Kept apart from STATE_FILE so per-page checkpoints stay cheap to write
+    CURSOR_FILE = "fetch_cursor.json"
+
     def __init__(self):
         self.state = self._load_state()
-        
+        self.state.setdefault('watermark', {'last_update_date': None, 'studies': {}})
+        self._current_run = {}
+
     def _load_state(self):
         if os.path.exists(self.STATE_FILE):
             with open(self.STATE_FILE, 'r') as f:
@@ -16,9 +23,10 @@ class CampaignState:
         return {
             'last_run': None,
             'sent_count': 0,
-            'processed_trials': []
+            'processed_trials': [],
+            'watermark': {'last_update_date': None, 'studies': {}}
         }
-    
+
     def record_successful_send(self, trial_id, email):
         self.state['sent_count'] += 1
         self.state['processed_trials'].append({
@@ -27,7 +35,116 @@ class CampaignState:
             'timestamp': datetime.now().isoformat()
         })
         self._save()
-        
+
+    def updated_since(self):
+        """Date to resume incremental fetching from, or None before the first run"""
+        last_update_date = self.state['watermark']['last_update_date']
+        return date.fromisoformat(last_update_date) if last_update_date else None
+
+    def is_new_or_changed(self, trial_id, last_update):
+        """Check whether a study differs from what the last run assessed"""
+        seen = self.state['watermark']['studies'].get(trial_id)
+        return seen is None or seen != last_update
+
+    def record_assessed(self, trial_id, last_update):
+        """Remember a study's last update for the next watermark"""
+        self._current_run[trial_id] = last_update
+
+    def record_run(self, started_at=None, complete=True, exhausted=True):
+        """Persist last_run and advance the watermark past this run
+
+        The watermark date only moves forward after a complete fetch that
+        exhausted the result set, so studies on pages that failed, or past
+        a max-results cut-off, are picked up again next time. When it moves,
+        studies last updated before the previous date are forgotten: no
+        later query can return them unless they change (a whole registry
+        dump would assess them again).
+        """
+        started_at = started_at or datetime.utcnow()
+        self.state['last_run'] = started_at.isoformat()
+        self.state['watermark']['studies'].update(self._current_run)
+        if complete and exhausted:
+            # RANGE queries are inclusive, so studies updated later on the same
+            # day are refetched and filtered by the per-study map
+            previous = self.updated_since()
+            self.state['watermark']['last_update_date'] = started_at.date().isoformat()
+            if previous:
+                self._trim_studies(previous)
+        self._current_run = {}
+        self._save()
+
+    def _trim_studies(self, since):
+        """Drop per-study entries last updated before `since`
+
+        Entries with unparseable dates are kept.
+        """
+        studies = self.state['watermark']['studies']
+        for trial_id, last_update in list(studies.items()):
+            day = parse_registry_date(last_update)
+            if day is not None and day < since:
+                del studies[trial_id]
+
+    def get_fetch_cursor(self, query_id):
+        """Cursor of an interrupted fetch of this query, or None
+
+        Holds the last fully processed rank and, for cursor-paginated
+        backends, the token of the next page.
+        """
+        if not os.path.exists(self.CURSOR_FILE):
+            return None
+        with open(self.CURSOR_FILE, 'r') as f:
+            cursor = json.load(f)
+        return cursor if cursor.get('query_id') == query_id else None
+
+    def save_fetch_cursor(self, query_id, last_completed_rank, page_token=None):
+        with open(self.CURSOR_FILE, 'w') as f:
+            json.dump({
+                'query_id': query_id,
+                'last_completed_rank': last_completed_rank,
+                'page_token': page_token,
+                'updated_at': datetime.now().isoformat()
+            }, f)
+
+    def clear_fetch_cursor(self):
+        if os.path.exists(self.CURSOR_FILE):
+            os.remove(self.CURSOR_FILE)
+
     def _save(self):
         with open(self.STATE_FILE, 'w') as f:
             json.dump(self.state, f, indent=2)
+
+class FetchProgress:
+    """Advance the fetch cursor only once a page's studies are processed
+
+    The fetch reports a page (page_read) as soon as its studies have been
+    read, while they may still be queued or in flight downstream. tag()
+    numbers the fetched records in read order; done_through(index) reports
+    that every record up to that index is processed, and the cursor is
+    saved for the last page lying entirely within them.
+    """
+
+    def __init__(self, save_cursor):
+        self._save_cursor = save_cursor
+        self._read = 0
+        # (records read by the end of the page, last rank, next page token)
+        self._pages = deque()
+
+    def tag(self, records):
+        """Yield (index, record) pairs; page_read() sees the running count"""
+        for record in records:
+            yield self._read, record
+            self._read += 1
+
+    def page_read(self, last_rank, page_token=None):
+        self._pages.append((self._read, last_rank, page_token))
+
+    def done_through(self, index):
+        latest = None
+        while self._pages and self._pages[0][0] <= index + 1:
+            latest = self._pages.popleft()
+        if latest:
+            self._save_cursor(latest[1], latest[2])
+
+    def finish(self):
+        """Every record read has been processed"""
+        self.done_through(self._read - 1)
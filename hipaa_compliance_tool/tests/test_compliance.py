@@ -0,0 +1,612 @@
+# tests/test_compliance.py
+import unittest
+import sys
+import os
+import json
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+import pandas as pd
+
+from config import settings
+from src.compliance.validator import HIPAAComplianceValidator, ComplianceLevel
+from src.compliance.assessment import StudyAssessor
+from src.compliance.report_cache import ReportCache
+from src.compliance.results_store import ResultsStore, CHANGED_STUDIES, CHANGED_ISSUES
+from src.compliance.run_stats import RunStatistics
+from src.compliance.ruleset import RulesetError, compile_ruleset, load_ruleset
+from src.data.study import Study, to_columns
+from src.monitoring.metrics import metrics_collector
+from src.monitoring.profiling import RuleProfiler, rule_profile_summary, format_rule_profile
+
+SAMPLE_STUDY = {
+    'NCTId': ['NCT12345'],
+    'BriefTitle': ['Test Study'],
+    'CentralContactEMail': ['contact@research.org'],
+    'OverallOfficialName': [],
+    'LocationContactName': [],
+    'LocationContactPhone': ['555-123-4567'],
+    'LocationContactEMail': [],
+    'LargeDocHasICF': [],
+    'StudyFirstSubmitDate': ['March 2, 2010']
+}
+
+class TestHIPAAComplianceValidator(unittest.TestCase):
+    """Test compliance rule evaluation"""
+
+    def setUp(self):
+        self.validator = HIPAAComplianceValidator()
+
+    def test_required_fields_cover_enabled_rules(self):
+        """Test the field projection is the union of rule fields and extras"""
+        fields = self.validator.required_fields(settings.REPORTING_FIELDS)
+
+        self.assertEqual(fields[:len(settings.REPORTING_FIELDS)], settings.REPORTING_FIELDS)
+        for field in ('OverallOfficialName', 'LocationContactPhone', 'LargeDocHasICF', 'StudyFirstSubmitDate'):
+            self.assertIn(field, fields)
+        self.assertEqual(len(fields), len(set(fields)))
+
+    def test_disabled_rules_drop_their_fields(self):
+        """Test only enabled rules run and contribute fields"""
+        validator = HIPAAComplianceValidator(enabled_rules=['data_encryption'])
+
+        self.assertEqual(validator.required_fields(), ['CentralContactEMail'])
+        report = validator.validate_study_compliance(SAMPLE_STUDY)
+        self.assertEqual({issue.rule_id for issue in report.issues}, {'data_encryption'})
+
+    def test_empty_requested_fields_are_not_present(self):
+        """Test fields returned as empty lists do not count as collected PHI"""
+        report = self.validator.validate_study_compliance(SAMPLE_STUDY)
+        minimization = [issue for issue in report.issues if issue.rule_id == 'data_minimization']
+
+        self.assertEqual(minimization[0].details['sensitive_fields'], ['LocationContactPhone'])
+
+    def test_consent_document_satisfies_consent_rule(self):
+        """Test an informed consent form document clears the consent issue"""
+        without_icf = self.validator.validate_study_compliance(SAMPLE_STUDY)
+        with_icf = self.validator.validate_study_compliance({**SAMPLE_STUDY, 'LargeDocHasICF': ['Yes']})
+
+        self.assertIn('consent_management', {issue.rule_id for issue in without_icf.issues})
+        self.assertNotIn('consent_management', {issue.rule_id for issue in with_icf.issues})
+        self.assertEqual(with_icf.overall_status, ComplianceLevel.NON_COMPLIANT)
+
+    def test_rules_without_inputs_are_skipped(self):
+        """Test the compiled plan skips field-driven rules when their fields are empty"""
+        validator = HIPAAComplianceValidator()
+        retention = next(rule for rule in validator.plan if rule.rule_id == 'data_retention')
+        calls = []
+        validator.plan[validator.plan.index(retention)] = retention.__class__(
+            rule_id=retention.rule_id,
+            description=retention.description,
+            check=lambda study: calls.append(study) or [],
+            present=retention.present
+        )
+
+        report = validator.validate_study_compliance({**SAMPLE_STUDY, 'StudyFirstSubmitDate': []})
+
+        self.assertEqual(calls, [])
+        # Consent flags a missing ICF, so it runs even though its field is empty
+        self.assertIn('consent_management', {issue.rule_id for issue in report.issues})
+
+    def test_iso_and_month_submit_dates_are_understood(self):
+        """Test retention applies to v2 ISO and month-precision submit dates"""
+        for value in ('2010-03-02', '2010-03', 'Mar 2010'):
+            report = self.validator.validate_study_compliance({**SAMPLE_STUDY, 'StudyFirstSubmitDate': [value]})
+            retention = [issue for issue in report.issues if issue.rule_id == 'data_retention']
+            self.assertEqual(len(retention), 1, value)
+            self.assertGreater(retention[0].details['years_old'], 15)
+
+        recent = datetime.now().strftime('%Y-%m-%d')
+        report = self.validator.validate_study_compliance({**SAMPLE_STUDY, 'StudyFirstSubmitDate': [recent]})
+        self.assertNotIn('data_retention', {issue.rule_id for issue in report.issues})
+
+    def test_malformed_submit_date_is_ignored(self):
+        """Test an unparseable submit date raises no retention issue"""
+        report = self.validator.validate_study_compliance({**SAMPLE_STUDY, 'StudyFirstSubmitDate': ['02/03/2010']})
+        self.assertNotIn('data_retention', {issue.rule_id for issue in report.issues})
+        self.assertNotIn(ComplianceLevel.UNKNOWN, {issue.severity for issue in report.issues})
+
+    def test_static_issues_and_recommendations_are_shared(self):
+        """Test detail-free issues and recommendation lists are reused across reports"""
+        first = self.validator.validate_study_compliance(SAMPLE_STUDY)
+        second = self.validator.validate_study_compliance({**SAMPLE_STUDY, 'NCTId': ['NCT99999999']})
+        shared = {'access_controls', 'audit_logging', 'breach_notification', 'consent_management'}
+
+        for issue, other in zip(first.issues, second.issues):
+            self.assertEqual(issue is other, issue.rule_id in shared, issue.rule_id)
+        self.assertIs(first.recommendations, second.recommendations)
+
+    def test_reports_are_immutable(self):
+        """Test reports and shared issue details cannot be modified"""
+        report = self.validator.validate_study_compliance(SAMPLE_STUDY)
+        audit = next(issue for issue in report.issues if issue.rule_id == 'audit_logging')
+
+        with self.assertRaises(AttributeError):
+            report.score = 100.0
+        with self.assertRaises(AttributeError):
+            audit.severity = ComplianceLevel.COMPLIANT
+        with self.assertRaises(TypeError):
+            audit.details['requires_verification'] = False
+
+        # Per-study computed details are frozen too
+        minimization = next(issue for issue in report.issues if issue.rule_id == 'data_minimization')
+        with self.assertRaises(TypeError):
+            minimization.details['sensitive_fields'] = []
+        self.assertEqual(len({minimization, audit, minimization}), 2)
+
+class TestBatchValidation(unittest.TestCase):
+    """Test vectorized validation over study tables"""
+
+    STUDIES = [
+        SAMPLE_STUDY,
+        {**SAMPLE_STUDY, 'NCTId': ['NCT2'], 'LargeDocHasICF': ['Yes'], 'LocationContactPhone': []},
+        {**SAMPLE_STUDY, 'NCTId': ['NCT3'], 'CentralContactEMail': ['gAAAAB-encrypted', 'a@b.org'],
+         'StudyFirstSubmitDate': ['not a date']},
+        {**SAMPLE_STUDY, 'NCTId': ['NCT4'], 'CentralContactEMail': ['gAAAAB-encrypted'],
+         'StudyFirstSubmitDate': [datetime.now().strftime('%B %d, %Y')]},
+        {'NCTId': ['NCT5']},
+        {**SAMPLE_STUDY, 'NCTId': ['NCT6'], 'StudyFirstSubmitDate': ['2010-03']},
+        {**SAMPLE_STUDY, 'NCTId': ['NCT7'], 'StudyFirstSubmitDate': [datetime.now().strftime('%Y-%m-%d')]}
+    ]
+
+    def setUp(self):
+        self.validator = HIPAAComplianceValidator()
+        self.expected = [self.validator.validate_study_compliance(study) for study in self.STUDIES]
+
+    def assert_matches_per_study(self, result):
+        for index, expected in enumerate(self.expected):
+            self.assertEqual(result.scores[index], expected.score)
+            self.assertEqual(result.statuses[index], expected.overall_status.value)
+            self.assertEqual(result.issue_counts[index], len(expected.issues))
+
+    def test_batch_matches_per_study_for_study_columns(self):
+        """Test scores and statuses equal validate_study_compliance row for row"""
+        studies = [Study.from_record(study) for study in self.STUDIES]
+        self.assert_matches_per_study(self.validator.validate_batch(to_columns(studies)))
+
+    def test_batch_accepts_registry_dataframe(self):
+        """Test a DataFrame of registry records, including missing cells"""
+        self.assert_matches_per_study(self.validator.validate_batch(pd.DataFrame(self.STUDIES)))
+
+    def test_reports_are_built_on_demand(self):
+        """Test a row's report carries the same issues as per-study validation"""
+        result = self.validator.validate_batch(pd.DataFrame(self.STUDIES))
+        report = result.report(2)
+
+        self.assertEqual(report.study_id, 'NCT3')
+        self.assertEqual([issue.rule_id for issue in report.issues],
+                         [issue.rule_id for issue in self.expected[2].issues])
+        self.assertEqual(result.to_frame()['study_id'].tolist(), [study['NCTId'][0] for study in self.STUDIES])
+
+class TestStudyAssessor(unittest.TestCase):
+    """Test serial and process-pool assessment"""
+
+    def setUp(self):
+        self.studies = [
+            Study.from_record({**SAMPLE_STUDY, 'NCTId': [f'NCT{index:05d}'],
+                               'LargeDocHasICF': ['Yes'] if index % 3 else []})
+            for index in range(50)
+        ]
+        self.validator = HIPAAComplianceValidator()
+
+    def assess(self, workers):
+        with StudyAssessor(self.validator, workers=workers, chunk_size=7) as assessor:
+            return list(assessor.assess(iter(self.studies)))
+
+    def test_pool_results_match_serial_in_input_order(self):
+        """Test worker results come back in input order and match in-process results"""
+        serial = self.assess(workers=1)
+        parallel = self.assess(workers=2)
+
+        self.assertEqual([study for study, _ in parallel], self.studies)
+        strip_date = lambda pairs: [{**result, 'assessment_date': None} for _, result in pairs]
+        self.assertEqual(strip_date(parallel), strip_date(serial))
+
+    def test_worker_metrics_are_merged(self):
+        """Test studies_assessed counts studies validated in worker processes"""
+        before = metrics_collector.counters['studies_assessed']
+        self.assess(workers=2)
+        self.assertEqual(metrics_collector.counters['studies_assessed'] - before, len(self.studies))
+
+    def test_run_statistics_match_results_serial_and_pooled(self):
+        """Test the streaming aggregates agree with the results, including merged worker stats"""
+        metrics_collector.drain()
+        aggregates = []
+        for workers in (1, 2):
+            with StudyAssessor(self.validator, workers=workers, chunk_size=7) as assessor:
+                results = [result for _, result in assessor.assess(iter(self.studies))]
+            aggregates.append(assessor.stats.to_dict())
+
+        serial, pooled = aggregates
+        self.assertEqual(serial, pooled)
+        scores = [result['compliance_score'] for result in results]
+        self.assertEqual(serial['count'], len(results))
+        self.assertEqual(serial['score_sum'], sum(scores))
+        self.assertEqual(sum(serial['score_histogram']), len(results))
+        self.assertEqual(serial['status_counts'], {'non_compliant': 50})
+        self.assertEqual(serial['rule_counts']['consent_management'], 17)
+
+        histogram = metrics_collector.get_metrics_summary()['histograms']['compliance_score']
+        self.assertEqual(histogram['counts'], [count * 2 for count in serial['score_histogram']])
+        self.assertEqual(metrics_collector.counters['rule_issues[rule=consent_management]'], 34)
+
+    def test_statistics_merge_and_quantiles(self):
+        """Test merged statistics equal one pass over all reports"""
+        reports = [self.validator.validate_study_compliance(study) for study in self.studies]
+        whole, first, second = RunStatistics(), RunStatistics(), RunStatistics()
+        for index, report in enumerate(reports):
+            whole.add(report)
+            (first if index < 20 else second).add(report)
+        first.merge(second.to_dict())
+
+        self.assertEqual(first.to_dict(), whole.to_dict())
+        median = whole.score_quantile(0.5)
+        self.assertTrue(whole.score_min <= median <= whole.score_max)
+        self.assertIsNone(RunStatistics().score_quantile(0.5))
+
+class TestReportCache(unittest.TestCase):
+    """Test reuse of compliance reports across runs"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ReportCache(f"{self.tmpdir.name}/reports.db")
+        self.validator = HIPAAComplianceValidator()
+        self.study = Study.from_record(SAMPLE_STUDY)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def test_round_trip_keeps_original_assessment_date(self):
+        """Test a reused report equals the stored one, including its assessment_date"""
+        report = self.validator.validate_study_compliance(self.study)
+        key = self.cache.make_key(self.validator, self.study)
+        self.cache.put(key, report)
+        self.cache.flush()
+
+        self.assertEqual(self.cache.get(key), report)
+
+    def test_decoded_reports_share_static_issues(self):
+        """Test reports read back from the cache share issues and recommendations"""
+        report = self.validator.validate_study_compliance(self.study)
+        key = self.cache.make_key(self.validator, self.study)
+        self.cache.put(key, report)
+
+        first, second = self.cache.get(key), self.cache.get(key)
+        audit = [issue for issue in first.issues if issue.rule_id == 'audit_logging']
+        self.assertTrue(any(audit[0] is issue for issue in second.issues))
+        self.assertIs(first.recommendations, second.recommendations)
+
+    def test_key_changes_with_rule_inputs_and_ruleset(self):
+        """Test changed rule inputs or rule definitions miss the cache"""
+        key = self.cache.make_key(self.validator, self.study)
+
+        self.assertEqual(key, self.cache.make_key(self.validator, Study.from_record(SAMPLE_STUDY)))
+        self.assertNotEqual(key, self.cache.make_key(self.validator, self.study.replace(icf_documents=('Yes',))))
+        self.assertNotEqual(key, self.cache.make_key(HIPAAComplianceValidator(['data_encryption']), self.study))
+        # Fields no rule reads do not affect the key
+        self.assertEqual(key, self.cache.make_key(self.validator, self.study.replace(overall_status='Completed')))
+
+    def test_expired_entries_miss(self):
+        """Test date-dependent reports are not reused past valid_until"""
+        report = self.validator.validate_study_compliance(self.study)
+        self.cache.put('fresh', report, datetime.now() + timedelta(days=1))
+        self.cache.put('stale', report, datetime.now() - timedelta(seconds=1))
+
+        self.assertEqual(set(self.cache.get_many(['fresh', 'stale'])), {'fresh'})
+
+    def test_retention_verdict_expiry(self):
+        """Test valid_until is the moment a recent study crosses the retention period"""
+        submitted = datetime.now() - timedelta(days=100)
+        study = self.study.replace(first_submit_date=submitted.strftime('%B %d, %Y'))
+
+        valid_until = self.validator.report_valid_until(study)
+        self.assertEqual(valid_until.date(), (submitted + timedelta(days=2192)).date())
+        self.assertIsNone(self.validator.report_valid_until(self.study))
+
+    def test_flush_evicts_least_recently_used(self):
+        """Test the cache is trimmed to max_bytes, oldest accesses first"""
+        report = self.validator.validate_study_compliance(self.study)
+        for key in ('a', 'b', 'c'):
+            self.cache.put(key, report)
+        self.cache.flush()
+        self.cache.get('a')
+        self.cache.max_bytes = 2 * self.cache.conn.execute("SELECT MAX(size) FROM reports").fetchone()[0]
+        self.cache.flush()
+
+        self.assertEqual(set(self.cache.get_many(['a', 'b', 'c'])), {'a', 'c'})
+
+    def test_assessor_reuses_cached_reports(self):
+        """Test a second run over unchanged studies does not revalidate them"""
+        studies = [Study.from_record({**SAMPLE_STUDY, 'NCTId': [f'NCT{index}']}) for index in range(5)]
+        with StudyAssessor(self.validator, workers=1, report_cache=self.cache) as assessor:
+            first = [result for _, result in assessor.assess(studies)]
+
+        with patch.object(self.validator, 'validate_study_compliance') as validate:
+            with StudyAssessor(self.validator, workers=1, report_cache=self.cache) as assessor:
+                second = [result for _, result in assessor.assess(studies)]
+
+        validate.assert_not_called()
+        self.assertEqual(second, first)
+
+class TestResultsStore(unittest.TestCase):
+    """Test run-over-run history and diffs"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = ResultsStore(f"{self.tmpdir.name}/results.db")
+        self.validator = HIPAAComplianceValidator()
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def record_run(self, studies, incremental=False) -> int:
+        run = self.store.start_run(source='test', incremental=incremental)
+        with StudyAssessor(self.validator, results_run=run) as assessor:
+            list(assessor.assess(Study.from_record(study) for study in studies))
+        run.finish()
+        return run.run_id
+
+    def test_diff_reports_status_score_and_issue_changes(self):
+        """Test changed, unchanged and new studies between consecutive runs"""
+        consented = {**SAMPLE_STUDY, 'NCTId': ['NCT2'], 'LargeDocHasICF': ['Yes']}
+        self.record_run([SAMPLE_STUDY, consented])
+        self.record_run([
+            {**SAMPLE_STUDY, 'CentralContactEMail': []},
+            consented,
+            {**SAMPLE_STUDY, 'NCTId': ['NCT3']}
+        ])
+
+        changes = {change.study_id: change for change in self.store.diff()}
+
+        self.assertEqual(set(changes), {'NCT12345', 'NCT3'})
+        fixed = changes['NCT12345']
+        self.assertEqual((fixed.old_status, fixed.new_status), ('non_compliant', 'warning'))
+        self.assertEqual(fixed.resolved_issues, ['data_encryption'])
+        self.assertEqual(fixed.added_issues, [])
+        self.assertGreater(fixed.new_score, fixed.old_score)
+        self.assertTrue(changes['NCT3'].is_new)
+
+    def test_incremental_runs_compare_latest_results(self):
+        """Test a study skipped by a later run keeps its earlier result as the baseline"""
+        first = self.record_run([SAMPLE_STUDY, {**SAMPLE_STUDY, 'NCTId': ['NCT2']}])
+        self.record_run([{**SAMPLE_STUDY, 'NCTId': ['NCT2'], 'LargeDocHasICF': ['Yes']}], incremental=True)
+        last = self.record_run([{**SAMPLE_STUDY, 'StudyFirstSubmitDate': []}], incremental=True)
+
+        self.assertEqual([change.study_id for change in self.store.diff()], ['NCT12345'])
+        changes = self.store.diff(since_run=first, until_run=last)
+        self.assertEqual([change.study_id for change in changes], ['NCT12345', 'NCT2'])
+        self.assertEqual(changes[1].resolved_issues, ['consent_management'])
+        self.assertEqual(self.store.runs()[0]['studies'], 1)
+
+    def test_diff_queries_use_indexes(self):
+        """Test diff seeks by (study_id, run_id) instead of scanning history"""
+        for query in (CHANGED_STUDIES, CHANGED_ISSUES):
+            plan = ' '.join(row[-1] for row in self.store.conn.execute(
+                f"EXPLAIN QUERY PLAN {query}", {'since': 1, 'until': 2}))
+            self.assertNotIn('SCAN results', plan)
+            self.assertNotIn('SCAN result_issues', plan)
+
+class TestRuleProfiling(unittest.TestCase):
+    """Test per-rule timing, hit and error counts"""
+
+    def setUp(self):
+        metrics_collector.drain()
+        self.studies = [Study.from_record({**SAMPLE_STUDY, 'NCTId': [f'NCT{i}']}) for i in range(10)]
+
+    def tearDown(self):
+        metrics_collector.drain()
+
+    def profile(self) -> dict:
+        return {row['rule_id']: row for row in rule_profile_summary()}
+
+    def test_profile_counts_every_rule(self):
+        """Test each rule gets timed samples and hits matching the reports"""
+        validator = HIPAAComplianceValidator(profile_sample_rate=1.0)
+        reports = [validator.validate_study_compliance(study) for study in self.studies]
+        validator.flush_profile()
+
+        profile = self.profile()
+        self.assertEqual(set(profile), set(validator.rules))
+        for rule_id, row in profile.items():
+            flagged = sum(rule_id in {issue.rule_id for issue in report.issues} for report in reports)
+            self.assertEqual(row['samples'], 10)
+            self.assertEqual(row['hit_rate'], flagged / 10)
+        self.assertAlmostEqual(sum(row['time_share'] for row in profile.values()), 1.0)
+        self.assertIn('data_retention', format_rule_profile(list(profile.values())))
+
+    def test_sampling_times_a_fraction_of_studies(self):
+        """Test a sample rate below one times only a fraction of studies"""
+        validator = HIPAAComplianceValidator(profile_sample_rate=0.25)
+        validator.profiler = RuleProfiler(0.25, seed=7)
+        for study in self.studies * 10:
+            validator.validate_study_compliance(study)
+        validator.flush_profile()
+
+        samples = {row['samples'] for row in self.profile().values()}
+        self.assertEqual(len(samples), 1)
+        self.assertTrue(0 < samples.pop() < 100)
+
+    def test_sampling_is_not_periodic(self):
+        """Test sampling does not lock onto every Nth position of ordered input"""
+        profiler = RuleProfiler(0.25, seed=7)
+        sampled = [index for index in range(4000) if profiler.should_sample()]
+
+        self.assertAlmostEqual(len(sampled) / 4000, 0.25, delta=0.03)
+        self.assertEqual({index % 4 for index in sampled}, {0, 1, 2, 3})
+
+    def test_disabled_profiling_records_nothing(self):
+        """Test no profile is collected with a zero sample rate"""
+        validator = HIPAAComplianceValidator(profile_sample_rate=0)
+        validator.validate_study_compliance(self.studies[0])
+        validator.flush_profile()
+
+        self.assertIsNone(validator.profiler)
+        self.assertEqual(self.profile(), {})
+
+    def test_rule_errors_are_counted(self):
+        """Test a raising rule is counted whether or not profiling is on"""
+        validator = HIPAAComplianceValidator(profile_sample_rate=0)
+        retention = next(rule for rule in validator.plan if rule.rule_id == 'data_retention')
+
+        def fail(study):
+            raise ValueError("broken rule")
+
+        validator.plan[validator.plan.index(retention)] = retention.__class__(
+            retention.rule_id, retention.description, fail, retention.present
+        )
+        report = validator.validate_study_compliance(self.studies[0])
+
+        self.assertIn(ComplianceLevel.UNKNOWN, {issue.severity for issue in report.issues})
+        self.assertEqual(self.profile()['data_retention']['errors'], 1)
+
+    def test_batch_and_pool_profiles(self):
+        """Test batch validation and worker processes publish rule profiles"""
+        validator = HIPAAComplianceValidator(profile_sample_rate=1.0)
+        validator.validate_batch(to_columns(self.studies))
+        self.assertEqual({row['samples'] for row in self.profile().values()}, {10})
+
+        metrics_collector.drain()
+        with StudyAssessor(validator, workers=2, chunk_size=4) as assessor:
+            list(assessor.assess(self.studies))
+        self.assertEqual({row['samples'] for row in self.profile().values()}, {10})
+
+CUSTOM_RULESET = {
+    'version': 'test-1',
+    'penalties': {'non_compliant': 50, 'warning': 20},
+    'rules': [
+        {
+            'id': 'contact_without_consent',
+            'description': 'Contacts require a consent form',
+            'severity': 'non_compliant',
+            'when': {'all': [
+                {'present': ['LocationContactPhone', 'LocationContactEMail']},
+                {'not': {'present': 'LargeDocHasICF'}}
+            ]},
+            'issue': {
+                'description': 'Site contacts listed without a consent form',
+                'recommendation': 'Attach the informed consent form',
+                'details': {'contact_fields': {'present_fields': ['LocationContactPhone', 'LocationContactEMail']}}
+            }
+        },
+        {
+            'id': 'org_email',
+            'description': 'Central contacts use organisational addresses',
+            'severity': 'warning',
+            'when': {'matches': {'field': 'CentralContactEMail', 'pattern': r'.*@(gmail|yahoo)\.com$'}},
+            'issue': {'description': 'Personal email address used', 'recommendation': 'Use an institutional address'}
+        }
+    ]
+}
+
+class TestDeclarativeRuleset(unittest.TestCase):
+    """Test rules loaded from ruleset files"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'rules.json')
+        self.write(CUSTOM_RULESET)
+        self.validator = HIPAAComplianceValidator(ruleset_path=self.path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, ruleset, path=None):
+        path = path or self.path
+        with open(path, 'w') as f:
+            json.dump(ruleset, f)
+        # Make sure the change is visible even within one mtime tick
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+
+    def test_custom_rules_penalties_and_fields(self):
+        """Test predicates, computed details and per-ruleset weights"""
+        report = self.validator.validate_study_compliance(
+            {**SAMPLE_STUDY, 'CentralContactEMail': ['someone@gmail.com']}
+        )
+
+        self.assertEqual([issue.rule_id for issue in report.issues], ['contact_without_consent', 'org_email'])
+        self.assertEqual(report.issues[0].details, {'contact_fields': ['LocationContactPhone']})
+        self.assertEqual(report.score, 30.0)
+        self.assertEqual(self.validator.required_fields(),
+                         ['LocationContactPhone', 'LocationContactEMail', 'LargeDocHasICF', 'CentralContactEMail'])
+
+    def test_batch_matches_per_study(self):
+        """Test compiled predicates agree between per-study and batch evaluation"""
+        studies = [
+            SAMPLE_STUDY,
+            {**SAMPLE_STUDY, 'LargeDocHasICF': ['Yes'], 'CentralContactEMail': ['x@yahoo.com']},
+            {'NCTId': ['NCT3']}
+        ]
+        result = self.validator.validate_batch(pd.DataFrame(studies))
+        for index, study in enumerate(studies):
+            report = self.validator.validate_study_compliance(study)
+            self.assertEqual(result.scores[index], report.score)
+            self.assertEqual(result.statuses[index], report.overall_status.value)
+
+    def test_hot_reload_swaps_rules_and_version(self):
+        """Test an edited ruleset file is picked up without a new validator"""
+        old_version = self.validator.ruleset_version
+        self.write({**CUSTOM_RULESET, 'rules': CUSTOM_RULESET['rules'][1:]})
+
+        self.assertTrue(self.validator.reload_if_changed())
+        self.assertEqual(list(self.validator.rules), ['org_email'])
+        self.assertNotEqual(self.validator.ruleset_version, old_version)
+        self.assertFalse(self.validator.reload_if_changed())
+
+    def test_batch_reports_survive_reload(self):
+        """Test a batch's reports use the rules it was validated with"""
+        result = self.validator.validate_batch(to_columns([Study.from_record(SAMPLE_STUDY)]))
+        expected = [issue.rule_id for issue in self.validator.validate_study_compliance(SAMPLE_STUDY).issues]
+        added = {'id': 'has_title', 'severity': 'warning', 'issue': {}, 'when': {'present': ['NCTId']}}
+        self.write({**CUSTOM_RULESET, 'rules': CUSTOM_RULESET['rules'] + [added]})
+        self.assertTrue(self.validator.reload_if_changed())
+
+        self.assertEqual([issue.rule_id for issue in result.report(0).issues], expected)
+
+    def test_invalid_reload_keeps_current_rules(self):
+        """Test a broken edit is logged and the previous ruleset stays active"""
+        version = self.validator.ruleset_version
+        self.write({'rules': [{'id': 'broken', 'severity': 'warning', 'issue': {},
+                               'when': {'present': ['NoSuchField']}}]})
+
+        self.assertFalse(self.validator.reload_if_changed())
+        self.assertEqual(self.validator.ruleset_version, version)
+
+    def test_invalid_definitions_are_rejected(self):
+        """Test unknown predicates, fields and severities raise RulesetError"""
+        for rule in (
+            {'id': 'a', 'severity': 'warning', 'issue': {}, 'when': {'sometimes': True}},
+            {'id': 'b', 'severity': 'warning', 'issue': {}, 'when': {'empty': 'NoSuchField'}},
+            {'id': 'c', 'severity': 'compliant', 'issue': {}},
+            {'id': 'd', 'severity': 'warning', 'issue': {}, 'when': {'matches': {'field': 'NCTId'}}}
+        ):
+            with self.assertRaises(RulesetError):
+                compile_ruleset({'rules': [rule]})
+
+    def test_yaml_ruleset(self):
+        """Test YAML files compile to the same ruleset as JSON"""
+        yaml = __import__('yaml')
+        yaml_path = os.path.join(self.tmpdir.name, 'rules.yaml')
+        with open(yaml_path, 'w') as f:
+            yaml.safe_dump(CUSTOM_RULESET, f)
+
+        self.assertEqual(load_ruleset(yaml_path).fingerprint(), load_ruleset(self.path).fingerprint())
+
+    def test_default_ruleset_matches_builtin_rules(self):
+        """Test the shipped ruleset defines the seven standard rules"""
+        validator = HIPAAComplianceValidator()
+        self.assertEqual(list(validator.rules), [
+            'data_encryption', 'access_controls', 'audit_logging', 'data_minimization',
+            'consent_management', 'data_retention', 'breach_notification'
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
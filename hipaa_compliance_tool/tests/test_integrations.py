@@ -6,19 +6,50 @@ import sys
 import os
 from pathlib import Path
 import requests
+import time
+import json
+import tempfile
+import csv
+import gzip
+import importlib.util
+import itertools
+import threading
+from datetime import date, datetime
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.append(str(PROJECT_ROOT))
 
+from config import settings
+
+from src.api import clinical_trials_client
 from src.api.clinical_trials_client import fetch_clinical_trials
+from src.api.rate_limiter import TokenBucketLimiter
+from src.api.response_cache import ResponseCache
+from src.api.v2_adapter import adapt_v2_study
+from src.monitoring.metrics import metrics_collector
+from src.utils.state_manager import CampaignState, FetchProgress
 from src.email.sender import send_hipaa_alert
 from src.data.processor import extract_contact_info
+from src.data import bulk_import
+from src.data.result_sink import CsvResultSink, NdjsonResultSink, ParquetResultSink, open_result_sink
+from src.compliance.assessment import assess_study
+from src.compliance.validator import HIPAAComplianceValidator
+from src.data.study import Study
+from src.utils.pipeline import Pipeline
+from src.utils.lazy import LazyInstance
+from src.data.dates import parse_registry_date
 
 class TestClinicalTrialsIntegration(unittest.TestCase):
     """Test Clinical Trials API integration"""
+
+    def setUp(self):
+        # Exercise the network path; caching is covered by TestResponseCache
+        cache_patcher = patch.object(clinical_trials_client.client, 'cache', None)
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
     
-    @patch('src.api.clinical_trials_client.requests.get')
+    @patch('src.api.clinical_trials_client.requests.Session.get')
     def test_fetch_clinical_trials_success(self, mock_get):
         """Test successful API call"""
         # Mock successful response - the function makes multiple calls in batches
@@ -50,19 +81,21 @@ class TestClinicalTrialsIntegration(unittest.TestCase):
         self.assertIn('timeout', call_args.kwargs)
         self.assertEqual(call_args.kwargs['timeout'], 15)
     
-    @patch('src.api.clinical_trials_client.requests.get')
+    @patch('src.api.clinical_trials_client.requests.Session.get')
     def test_fetch_clinical_trials_api_error(self, mock_get):
         """Test API error handling"""
         # Mock API error
         mock_get.side_effect = requests.RequestException("API Error")
         
         # Test function
-        result = fetch_clinical_trials()
+        with patch.object(clinical_trials_client.client, 'rate_limiter', TokenBucketLimiter(1000, burst=100)), \
+                patch('src.api.clinical_trials_client.time.sleep'):
+            result = fetch_clinical_trials()
         
         # Should return empty list on error
         self.assertEqual(result, [])
     
-    @patch('src.api.clinical_trials_client.requests.get')
+    @patch('src.api.clinical_trials_client.requests.Session.get')
     def test_fetch_clinical_trials_rate_limiting(self, mock_get):
         """Test rate limiting behavior"""
         # Mock multiple successful responses
@@ -75,12 +108,491 @@ class TestClinicalTrialsIntegration(unittest.TestCase):
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
         
-        with patch('src.api.clinical_trials_client.time.sleep') as mock_sleep:
+        with patch('src.api.rate_limiter.time.sleep') as mock_sleep:
             result = fetch_clinical_trials()
             
             # Should have called sleep for rate limiting
             mock_sleep.assert_called()
 
+    @patch('src.api.clinical_trials_client.requests.Session.get')
+    def test_concurrent_fetch_preserves_rank_order(self, mock_get):
+        """Test pages fetched by the worker pool come back in rank order"""
+        def respond(url, params, **kwargs):
+            # Later windows answer first to shake out ordering bugs
+            time.sleep(0.001 * (100 - params['min_rnk']))
+            response = Mock(status_code=200)
+            response.json.return_value = {
+                'StudyFieldsResponse': {'StudyFields': [{'NCTId': [f"NCT{params['min_rnk']:05d}"]}]}
+            }
+            return response
+
+        mock_get.side_effect = respond
+
+        with patch.object(clinical_trials_client.client, 'rate_limiter', TokenBucketLimiter(1000, burst=100)):
+            concurrent = fetch_clinical_trials(workers=4)
+            sequential = fetch_clinical_trials(workers=1)
+
+        self.assertEqual(concurrent, sequential)
+        ids = [study['NCTId'][0] for study in concurrent]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(ids), len(range(1, settings.MAX_RESULTS + 1, settings.BATCH_SIZE)))
+
+    @patch('src.api.clinical_trials_client.requests.Session.get')
+    def test_throttled_response_backs_off_and_retries(self, mock_get):
+        """Test 429 responses slow the limiter down and the window is retried"""
+        throttled = Mock(status_code=429, headers={'Retry-After': '1'})
+        ok = Mock(status_code=200)
+        ok.json.return_value = {'StudyFieldsResponse': {'StudyFields': [{'NCTId': ['NCT1']}]}}
+        mock_get.side_effect = [throttled] + [ok] * 20
+
+        limiter = TokenBucketLimiter(1000, burst=100)
+        with patch.object(clinical_trials_client.client, 'rate_limiter', limiter), \
+                patch.object(limiter, 'backoff', wraps=limiter.backoff) as mock_backoff, \
+                patch('src.api.rate_limiter.time.sleep'):
+            result = fetch_clinical_trials(workers=1)
+
+        mock_backoff.assert_called_once_with(1.0)
+        self.assertEqual(mock_get.call_count, len(result) + 1)
+
+    def test_client_uses_pooled_session_settings(self):
+        """Test the shared session negotiates compression and honours settings"""
+        api_client = clinical_trials_client.ClinicalTrialsClient()
+        adapter = api_client.session.get_adapter(settings.CLINICAL_TRIALS_API['endpoint'])
+
+        self.assertIn('gzip', api_client.session.headers['Accept-Encoding'])
+        # Page-level retries own the retry budget; the adapter must not add its own
+        self.assertEqual(adapter.max_retries.total, 0)
+        self.assertGreaterEqual(adapter._pool_maxsize, settings.FETCH_WORKERS)
+        self.assertEqual(api_client.timeout, settings.CLINICAL_TRIALS_API['timeout'])
+        api_client.close()
+
+    def test_config_without_rate_limit_uses_defaults(self):
+        """Test custom configs need not carry a rate_limit section"""
+        config = {key: value for key, value in settings.CLINICAL_TRIALS_API.items() if key != 'rate_limit'}
+        api_client = clinical_trials_client.ClinicalTrialsClient(config)
+        self.addCleanup(api_client.close)
+
+        self.assertIsInstance(api_client.rate_limiter, TokenBucketLimiter)
+
+    @patch('src.api.clinical_trials_client.requests.Session.get')
+    def test_iter_clinical_trials_streams_pages_lazily(self, mock_get):
+        """Test the generator only fetches as far ahead as the prefetch depth"""
+        def respond(url, params, **kwargs):
+            response = Mock(status_code=200)
+            response.json.return_value = {
+                'StudyFieldsResponse': {'StudyFields': [{'NCTId': [f"NCT{params['min_rnk']}"]}]}
+            }
+            return response
+
+        mock_get.side_effect = respond
+
+        with patch.object(clinical_trials_client.client, 'rate_limiter', TokenBucketLimiter(1000, burst=100)):
+            studies = clinical_trials_client.iter_clinical_trials(workers=2, prefetch=2)
+            first = next(studies)
+            studies.close()
+
+        self.assertEqual(first['NCTId'], ['NCT1'])
+        self.assertLessEqual(mock_get.call_count, 3)
+
+    @patch('src.api.clinical_trials_client.requests.Session.get')
+    def test_failed_page_is_retried_then_skipped(self, mock_get):
+        """Test transient errors are retried and a dead page does not abort the run"""
+        def respond(url, params, **kwargs):
+            if params['min_rnk'] == 6:
+                raise requests.ConnectionError("connection reset")
+            response = Mock(status_code=200)
+            response.json.return_value = {
+                'StudyFieldsResponse': {'StudyFields': [{'NCTId': [f"NCT{params['min_rnk']}"]}]}
+            }
+            return response
+
+        mock_get.side_effect = respond
+        stats = clinical_trials_client.FetchStats()
+        checkpoints = []
+
+        with patch.object(clinical_trials_client.client, 'rate_limiter', TokenBucketLimiter(1000, burst=100)), \
+                patch('src.api.clinical_trials_client.time.sleep') as mock_sleep:
+            studies = list(clinical_trials_client.iter_clinical_trials(
+                workers=1, stats=stats, checkpoint=lambda rank, token: checkpoints.append(rank)))
+
+        max_retries = settings.CLINICAL_TRIALS_API['max_retries']
+        self.assertEqual(stats.pages_failed, 1)
+        self.assertEqual(stats.failed_windows, [(6, 10)])
+        self.assertEqual(sum(call.kwargs['params']['min_rnk'] == 6 for call in mock_get.call_args_list),
+                         max_retries + 1)
+        self.assertEqual(stats.retries, max_retries)
+        self.assertEqual(mock_sleep.call_count, max_retries)
+        self.assertEqual(len(studies), stats.pages_completed)
+        # The cursor stops at the last page before the gap
+        self.assertEqual(checkpoints, [5])
+        self.assertEqual(stats.last_completed_rank, 5)
+
+    @patch('src.api.clinical_trials_client.requests.Session.get')
+    def test_resume_starts_after_cursor(self, mock_get):
+        """Test a resumed fetch skips ranks already completed"""
+        response = Mock(status_code=200)
+        response.json.return_value = {'StudyFieldsResponse': {'StudyFields': [{'NCTId': ['NCT1']}]}}
+        mock_get.return_value = response
+
+        with patch.object(clinical_trials_client.client, 'rate_limiter', TokenBucketLimiter(1000, burst=100)):
+            list(clinical_trials_client.iter_clinical_trials(workers=1, start_rank=41))
+
+        min_ranks = [call.kwargs['params']['min_rnk'] for call in mock_get.call_args_list]
+        self.assertEqual(min_ranks, list(range(41, settings.MAX_RESULTS + 1, settings.BATCH_SIZE)))
+
+    def test_backoff_delay_grows_exponentially(self):
+        """Test retry delays double per attempt within the jitter band"""
+        api_client = clinical_trials_client.client
+        factor = settings.CLINICAL_TRIALS_API['retry_backoff_factor']
+        for attempt in range(3):
+            delay = api_client.backoff_delay(attempt)
+            self.assertGreaterEqual(delay, factor * 2 ** attempt / 2)
+            self.assertLessEqual(delay, factor * 2 ** attempt)
+
+class TestClinicalTrialsV2Backend(unittest.TestCase):
+    """Test the cursor-paginated v2 backend"""
+
+    V2_RECORD = {
+        'protocolSection': {
+            'identificationModule': {'nctId': 'NCT00000001', 'briefTitle': 'Study One'},
+            'statusModule': {
+                'overallStatus': 'RECRUITING',
+                'studyFirstSubmitDate': '2015-03-02',
+                'lastUpdatePostDateStruct': {'date': '2024-01-10', 'type': 'ACTUAL'}
+            },
+            'contactsLocationsModule': {
+                'centralContacts': [{'name': 'A', 'email': 'a@example.org'},
+                                    {'name': 'B', 'email': 'b@example.org'}],
+                'overallOfficials': [{'name': 'Dr. C', 'affiliation': 'Hospital'}],
+                'locations': [{'contacts': [{'phone': '555-0100'}]}, {'contacts': [{'phone': '555-0101'}]}]
+            }
+        }
+    }
+
+    def setUp(self):
+        config = {**settings.CLINICAL_TRIALS_API, 'backend': 'v2', 'v2_page_size': 2}
+        self.api_client = clinical_trials_client.ClinicalTrialsClient(config=config)
+        self.api_client.rate_limiter = TokenBucketLimiter(1000, burst=100)
+        self.addCleanup(self.api_client.close)
+
+    def test_adapter_maps_v2_record_to_classic_shape(self):
+        """Test nested v2 records become dict-of-lists keyed by classic names"""
+        study = adapt_v2_study(self.V2_RECORD, ['NCTId', 'CentralContactEMail', 'LocationContactPhone',
+                                                'OverallOfficialAffiliation', 'LastUpdatePostDate',
+                                                'CompletionDate'])
+
+        self.assertEqual(study['NCTId'], ['NCT00000001'])
+        self.assertEqual(study['CentralContactEMail'], ['a@example.org', 'b@example.org'])
+        self.assertEqual(study['LocationContactPhone'], ['555-0100', '555-0101'])
+        self.assertEqual(study['OverallOfficialAffiliation'], ['Hospital'])
+        self.assertEqual(study['LastUpdatePostDate'], ['2024-01-10'])
+        self.assertEqual(study['CompletionDate'], [])
+
+    @patch('src.api.clinical_trials_client.requests.Session.get')
+    def test_follows_page_tokens_up_to_max_results(self, mock_get):
+        """Test pageToken pagination, page sizing and checkpoint tokens"""
+        pages = {None: ('t2', 2), 't2': ('t3', 2), 't3': (None, 2)}
+
+        def respond(url, params, **kwargs):
+            next_token, count = pages[params.get('pageToken')]
+            response = Mock(status_code=200)
+            response.json.return_value = {'studies': [self.V2_RECORD] * count, 'nextPageToken': next_token}
+            return response
+
+        mock_get.side_effect = respond
+        checkpoints = []
+
+        studies = list(self.api_client.iter_clinical_trials(
+            max_results=5, checkpoint=lambda rank, token: checkpoints.append((rank, token))))
+
+        self.assertEqual(len(studies), 5)
+        self.assertEqual(studies[0]['NCTId'], ['NCT00000001'])
+        self.assertEqual(checkpoints, [(2, 't2'), (4, 't3'), (5, None)])
+        self.assertEqual(mock_get.call_args_list[-1].kwargs['params']['pageSize'], 1)
+        self.assertTrue(all(call.args[0] == settings.CLINICAL_TRIALS_API['v2_endpoint']
+                            for call in mock_get.call_args_list))
+
+    def test_incremental_filter_uses_iso_dates(self):
+        """Test the v2 backend filters on LastUpdatePostDate server side"""
+        params = self.api_client.query_params(date(2024, 3, 5))
+        self.assertEqual(params['filter.advanced'], 'AREA[LastUpdatePostDate]RANGE[2024-03-05,MAX]')
+        self.assertEqual(params['fields'], settings.CLINICAL_TRIALS_API['default_params']['fields'])
+
+class TestResponseCache(unittest.TestCase):
+    """Test on-disk caching of API responses"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache = ResponseCache(os.path.join(self.tmp_dir.name, 'responses.db'), ttl_seconds=3600)
+        self.addCleanup(self.cache.close)
+        self.api_client = clinical_trials_client.ClinicalTrialsClient(cache=self.cache)
+        self.api_client.rate_limiter = TokenBucketLimiter(1000, burst=100)
+        self.addCleanup(self.api_client.close)
+
+    def _page(self, nct_id, status_code=200, etag='"v1"'):
+        body = {'StudyFieldsResponse': {'StudyFields': [{'NCTId': [nct_id]}]}}
+        return Mock(status_code=status_code, content=json.dumps(body).encode(), headers={'ETag': etag})
+
+    def test_cache_key_normalizes_params(self):
+        """Test equivalent queries share a cache key"""
+        endpoint = settings.CLINICAL_TRIALS_API['endpoint']
+        key_a = ResponseCache.make_key(endpoint, {'expr': 'heart  failure', 'fields': 'NCTId,BriefTitle', 'min_rnk': 1})
+        key_b = ResponseCache.make_key(endpoint, {'min_rnk': '1', 'fields': 'BriefTitle, NCTId', 'expr': 'heart failure'})
+        key_c = ResponseCache.make_key(endpoint, {'expr': 'heart failure', 'fields': 'NCTId,BriefTitle', 'min_rnk': 6})
+
+        self.assertEqual(key_a, key_b)
+        self.assertNotEqual(key_a, key_c)
+
+    @patch('src.api.clinical_trials_client.requests.Session.get')
+    def test_warm_rerun_skips_network(self, mock_get):
+        """Test a second run is served entirely from cache"""
+        mock_get.side_effect = lambda url, params, **kwargs: self._page(f"NCT{params['min_rnk']}")
+
+        first = self.api_client.fetch_clinical_trials(workers=1)
+        calls = mock_get.call_count
+        second = self.api_client.fetch_clinical_trials(workers=1)
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_get.call_count, calls)
+        self.assertGreater(metrics_collector.counters['api_cache_hits'], 0)
+
+    @patch('src.api.clinical_trials_client.requests.Session.get')
+    def test_stale_entry_revalidates_with_etag(self, mock_get):
+        """Test expired entries are revalidated and reused on 304"""
+        mock_get.return_value = self._page('NCT1')
+        original = self.api_client.fetch_window(1, 5)
+
+        self.cache.ttl_seconds = 0
+        mock_get.return_value = Mock(status_code=304, headers={})
+        revalidated = self.api_client.fetch_window(1, 5)
+
+        self.assertEqual(original, revalidated)
+        self.assertEqual(mock_get.call_args.kwargs['headers']['If-None-Match'], '"v1"')
+
+    def test_lru_eviction_respects_size_budget(self):
+        """Test least recently used entries are dropped over max_bytes"""
+        self.cache.max_bytes = 250
+        for key in ('a', 'b', 'c'):
+            self.cache.put(key, b'x' * 100)
+            time.sleep(0.01)
+
+        self.assertIsNone(self.cache.get('a'))
+        self.assertIsNotNone(self.cache.get('c'))
+
+    def test_lookups_count_as_use_for_eviction(self):
+        """Test entries read since the last write are not evicted first"""
+        self.cache.max_bytes = 250
+        self.cache.put('a', b'x' * 100)
+        time.sleep(0.01)
+        self.cache.put('b', b'x' * 100)
+        time.sleep(0.01)
+        self.assertIsNotNone(self.cache.get('a'))
+        time.sleep(0.01)
+        self.cache.put('c', b'x' * 100)
+
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+
+class TestIncrementalSync(unittest.TestCase):
+    """Test watermark-based incremental fetching"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        state_patcher = patch.object(CampaignState, 'STATE_FILE',
+                                     os.path.join(self.tmp_dir.name, 'campaign_state.json'))
+        state_patcher.start()
+        self.addCleanup(state_patcher.stop)
+
+    def test_watermark_round_trip(self):
+        """Test a recorded run filters unchanged studies on the next run"""
+        state = CampaignState()
+        self.assertIsNone(state.updated_since())
+
+        state.record_assessed('NCT1', 'January 1, 2024')
+        state.record_run(datetime(2024, 3, 5, 12, 0))
+
+        reloaded = CampaignState()
+        self.assertEqual(reloaded.state['last_run'], '2024-03-05T12:00:00')
+        self.assertEqual(reloaded.updated_since(), date(2024, 3, 5))
+        self.assertFalse(reloaded.is_new_or_changed('NCT1', 'January 1, 2024'))
+        self.assertTrue(reloaded.is_new_or_changed('NCT1', 'March 5, 2024'))
+        self.assertTrue(reloaded.is_new_or_changed('NCT2', 'January 1, 2024'))
+
+    @patch('src.api.clinical_trials_client.requests.Session.get')
+    def test_truncated_fetch_keeps_watermark(self, mock_get):
+        """Test a fetch cut off at max_results does not advance the watermark date"""
+        total = {'studies': 100}
+
+        def respond(url, params, **kwargs):
+            ranks = range(params['min_rnk'], min(params['max_rnk'], total['studies']) + 1)
+            response = Mock(status_code=200)
+            response.json.return_value = {
+                'StudyFieldsResponse': {'StudyFields': [{'NCTId': [f"NCT{rank}"]} for rank in ranks]}
+            }
+            return response
+
+        mock_get.side_effect = respond
+        api_client = clinical_trials_client.ClinicalTrialsClient()
+        api_client.rate_limiter = TokenBucketLimiter(1000, burst=100)
+        self.addCleanup(api_client.close)
+
+        truncated = clinical_trials_client.FetchStats()
+        self.assertEqual(len(list(api_client.iter_clinical_trials(max_results=10, workers=1, stats=truncated))), 10)
+        self.assertFalse(truncated.exhausted)
+
+        state = CampaignState()
+        state.record_assessed('NCT1', 'January 1, 2024')
+        state.record_run(datetime(2024, 3, 5, 12, 0), complete=True, exhausted=truncated.exhausted)
+        reloaded = CampaignState()
+        self.assertIsNone(reloaded.updated_since())
+        self.assertFalse(reloaded.is_new_or_changed('NCT1', 'January 1, 2024'))
+
+        total['studies'] = 8
+        finished = clinical_trials_client.FetchStats()
+        self.assertEqual(len(list(api_client.iter_clinical_trials(max_results=10, workers=1, stats=finished))), 8)
+        self.assertTrue(finished.exhausted)
+
+        reloaded.record_run(datetime(2024, 3, 6, 12, 0), complete=True, exhausted=finished.exhausted)
+        self.assertEqual(CampaignState().updated_since(), date(2024, 3, 6))
+
+    def test_watermark_forgets_studies_before_previous_date(self):
+        """Test the per-study map is trimmed as the watermark date moves on"""
+        state = CampaignState()
+        state.record_assessed('NCT1', 'January 1, 2024')
+        state.record_assessed('NCT2', 'March 4, 2024')
+        state.record_run(datetime(2024, 3, 5, 12, 0))
+        state.record_assessed('NCT3', 'March 5, 2024')
+        state.record_run(datetime(2024, 3, 6, 12, 0), complete=False)
+        self.assertIn('NCT1', state.state['watermark']['studies'])
+
+        state.record_run(datetime(2024, 3, 7, 12, 0))
+
+        self.assertEqual(set(CampaignState().state['watermark']['studies']), {'NCT3'})
+
+    def test_fetch_cursor_is_scoped_to_query(self):
+        """Test a saved cursor only applies to the query that wrote it"""
+        state = CampaignState()
+        with patch.object(CampaignState, 'CURSOR_FILE', os.path.join(self.tmp_dir.name, 'cursor.json')):
+            state.save_fetch_cursor('query-a', 250, 'token-6')
+            cursor = state.get_fetch_cursor('query-a')
+            self.assertEqual(cursor['last_completed_rank'], 250)
+            self.assertEqual(cursor['page_token'], 'token-6')
+            self.assertIsNone(state.get_fetch_cursor('query-b'))
+            state.clear_fetch_cursor()
+            self.assertIsNone(state.get_fetch_cursor('query-a'))
+
+    def test_fetch_progress_waits_for_processed_records(self):
+        """Test pages read ahead are only checkpointed once their records are done"""
+        saved = []
+        progress = FetchProgress(lambda rank, token: saved.append((rank, token)))
+
+        def pages():
+            for last_rank in (5, 10, 15):
+                yield from range(last_rank - 4, last_rank + 1)
+                progress.page_read(last_rank, f"token-{last_rank}")
+
+        records = list(progress.tag(pages()))
+        self.assertEqual(records[:2], [(0, 1), (1, 2)])
+        self.assertEqual(saved, [])
+
+        progress.done_through(7)
+        self.assertEqual(saved, [(5, 'token-5')])
+        progress.done_through(9)
+        progress.finish()
+        self.assertEqual(saved, [(5, 'token-5'), (10, 'token-10'), (15, 'token-15')])
+
+    def test_fields_override_projection(self):
+        """Test callers can request exactly the fields they read"""
+        api_client = clinical_trials_client.client
+        params = api_client.query_params(fields=['NCTId', 'LargeDocHasICF'])
+
+        self.assertEqual(params['fields'], 'NCTId,LargeDocHasICF')
+        self.assertNotEqual(api_client.query_fingerprint(fields=['NCTId']),
+                            api_client.query_fingerprint(fields=['NCTId', 'BriefTitle']))
+
+    def test_updated_since_restricts_query(self):
+        """Test the fetch query is limited to recently updated studies"""
+        params = clinical_trials_client.client.query_params(date(2024, 3, 5))
+        self.assertIn('AREA[LastUpdatePostDate]RANGE[03/05/2024, MAX]', params['expr'])
+        self.assertNotIn('AREA', clinical_trials_client.client.query_params()['expr'])
+
+class TestPipeline(unittest.TestCase):
+    """Test the staged assessment pipeline engine"""
+
+    def test_stages_keep_order_and_count_drops(self):
+        """Test threaded stages preserve input order and report filtered items"""
+        collected = []
+        stats = Pipeline(queue_size=16, batch_size=4) \
+            .source('numbers', range(1000)) \
+            .stage('odd', lambda n: n if n % 2 else None, workers=3) \
+            .transform('square', lambda items: (n * n for n in items)) \
+            .sink('collect', collected.append) \
+            .run()
+
+        self.assertEqual(collected, [n * n for n in range(1000) if n % 2])
+        by_stage = {stage.name: stage for stage in stats}
+        self.assertEqual(by_stage['numbers'].items_out, 1000)
+        self.assertEqual(by_stage['odd'].dropped, 500)
+        self.assertEqual(by_stage['collect'].items_in, 500)
+        self.assertLessEqual(by_stage['numbers'].queue_depth_max, 16)
+
+    def test_backpressure_bounds_items_in_flight(self):
+        """Test a slow sink throttles the source instead of buffering everything"""
+        produced = []
+        in_flight = []
+
+        def source():
+            for n in range(2000):
+                produced.append(n)
+                yield n
+
+        def slow_sink(n):
+            in_flight.append(len(produced) - n)
+            time.sleep(0.0001)
+
+        Pipeline(queue_size=20, batch_size=5).source('source', source()) \
+            .stage('identity', lambda n: n).sink('slow', slow_sink).run()
+
+        # Two full queues of 20, plus the batches being built or consumed
+        self.assertLessEqual(max(in_flight), 2 * 20 + 5 * 5)
+
+    def test_source_ships_partial_batch_while_blocked(self):
+        """Test a source waiting on its next page does not hold back the last one"""
+        first_collected = threading.Event()
+
+        def paged_source():
+            yield from range(3)
+            # The next page only arrives once the first one was collected
+            self.assertTrue(first_collected.wait(timeout=5))
+            yield from range(3, 6)
+
+        collected = []
+
+        def collect(n):
+            collected.append(n)
+            first_collected.set()
+
+        Pipeline(queue_size=64, batch_size=64, batch_wait=0.01).source('pages', paged_source()) \
+            .stage('identity', lambda n: n).sink('collect', collect).run()
+
+        self.assertEqual(collected, list(range(6)))
+
+    def test_stage_error_cancels_pipeline(self):
+        """Test the first stage failure stops every stage and is re-raised"""
+        def explode(n):
+            if n == 100:
+                raise ValueError("bad record")
+            return n
+
+        pipeline = Pipeline(queue_size=10, batch_size=2) \
+            .source('endless', itertools.count()).stage('explode', explode).sink('drop', lambda n: None)
+
+        with self.assertRaises(ValueError):
+            pipeline.run()
+        self.assertLess(pipeline.stats[0].items_out, 1000)
+
 class TestEmailIntegration(unittest.TestCase):
     """Test email sending integration"""
     
@@ -198,20 +710,254 @@ class TestDataProcessorIntegration(unittest.TestCase):
             else:
                 self.assertNotIn(email, result['central_contacts'])
 
+class TestStudyRecord(unittest.TestCase):
+    """Test the normalized Study record"""
+
+    RECORD = {
+        'NCTId': ['NCT12345'],
+        'BriefTitle': ['Test Study'],
+        'OverallStatus': ['Recruiting'],
+        'CentralContactEMail': ['a@example.org', 'b@example.org'],
+        'OverallOfficialAffiliation': [],
+        'Rank': [1]
+    }
+
+    def test_from_record_flattens_single_values(self):
+        """Test scalar fields become strings and repeated fields tuples"""
+        study = Study.from_record(self.RECORD)
+
+        self.assertEqual(study.nct_id, 'NCT12345')
+        self.assertEqual(study.central_contact_emails, ('a@example.org', 'b@example.org'))
+        self.assertEqual(study.official_affiliations, ())
+        self.assertIsNone(study.last_update_date)
+        self.assertFalse(hasattr(study, '__dict__'))
+
+    def test_repeated_strings_are_interned(self):
+        """Test statuses decoded separately share one string object"""
+        first = Study.from_record(json.loads(json.dumps(self.RECORD)))
+        second = Study.from_record(json.loads(json.dumps(self.RECORD)))
+        self.assertIs(first.overall_status, second.overall_status)
+
+    def test_study_is_immutable(self):
+        """Test attributes cannot be reassigned"""
+        study = Study.from_record(self.RECORD)
+        with self.assertRaises(AttributeError):
+            study.nct_id = 'NCT99999'
+        self.assertEqual(study.replace(nct_id='NCT99999').nct_id, 'NCT99999')
+
+    def test_round_trip_to_record(self):
+        """Test conversion back to the registry shape drops empty fields"""
+        record = Study.from_record(self.RECORD).to_record()
+        self.assertEqual(record['CentralContactEMail'], self.RECORD['CentralContactEMail'])
+        self.assertNotIn('OverallOfficialAffiliation', record)
+
+    def test_dates_are_parsed_in_any_registry_format(self):
+        """Test classic, v2 and month-precision dates normalize to datetime.date"""
+        study = Study.from_record({
+            **self.RECORD,
+            'StudyFirstSubmitDate': ['March 2, 2010'],
+            'LastUpdatePostDate': ['2024-06-30'],
+            'CompletionDate': ['2026-01']
+        })
+
+        self.assertEqual(study.first_submit_day, date(2010, 3, 2))
+        self.assertEqual(study.last_update_day, date(2024, 6, 30))
+        self.assertEqual(study.completion_day, date(2026, 1, 1))
+        self.assertEqual(study.replace(first_submit_date='June 2011').first_submit_day, date(2011, 6, 1))
+
+    def test_unrecognized_dates_parse_to_none(self):
+        """Test malformed date strings leave the parsed date empty"""
+        for value in ('02/03/2010', 'Smarch 2, 2010', '2010-13-01', '10-03-02', ''):
+            study = Study.from_record({**self.RECORD, 'StudyFirstSubmitDate': [value]})
+            self.assertIsNone(study.first_submit_day, value)
+            self.assertIsNone(parse_registry_date(value), value)
+
+class TestBulkImport(unittest.TestCase):
+    """Test streaming import of local registry dumps"""
+
+    STUDIES = [
+        {'NCTId': [f'NCT{i:08d}'], 'BriefTitle': [f'Study {i} with a, comma and ] bracket']}
+        for i in range(50)
+    ]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def _write(self, name, text):
+        path = Path(self.tmp_dir.name) / name
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'wt', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_streams_json_array_across_chunks(self):
+        """Test a top-level array is parsed element by element"""
+        path = self._write('dump.json', json.dumps(self.STUDIES, indent=2))
+
+        with open(path, encoding='utf-8') as stream:
+            studies = list(bulk_import._iter_json_array(stream, chunk_size=17))
+
+        self.assertEqual(studies, self.STUDIES)
+
+    def test_reads_gzipped_ndjson(self):
+        """Test NDJSON dumps, including gzip-compressed ones"""
+        path = self._write('dump.ndjson.gz', '\n'.join(json.dumps(s) for s in self.STUDIES) + '\n')
+        self.assertEqual(list(bulk_import.iter_registry_dump(path)), self.STUDIES)
+
+    def test_maps_v2_export_records(self):
+        """Test v2 exports nested under 'studies' are adapted to classic shape"""
+        export = {'studies': [TestClinicalTrialsV2Backend.V2_RECORD] * 3, 'nextPageToken': None}
+        path = self._write('export.json', json.dumps(export))
+
+        studies = list(bulk_import.iter_registry_dump(path, fields=['NCTId', 'CentralContactEMail']))
+
+        self.assertEqual(len(studies), 3)
+        self.assertEqual(studies[0], {'NCTId': ['NCT00000001'],
+                                      'CentralContactEMail': ['a@example.org', 'b@example.org']})
+
+    def test_saved_classic_response_skips_field_list(self):
+        """Test StudyFields is found after the FieldList array of a classic response"""
+        response = {'StudyFieldsResponse': {'FieldList': ['NCTId'], 'StudyFields': self.STUDIES[:2]}}
+        path = self._write('classic.json', json.dumps(response))
+        self.assertEqual(list(bulk_import.iter_registry_dump(path)), self.STUDIES[:2])
+
+class TestResultSink(unittest.TestCase):
+    """Test streaming result files"""
+
+    ROWS = [
+        {'study_id': f'NCT{i:08d}', 'title': f'Study {i}, "quoted"', 'compliance_status': 'compliant',
+         'compliance_score': 90.0 - i, 'issues_count': i}
+        for i in range(25)
+    ]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_csv_rows_with_header(self):
+        """Test CSV output has a header and round-trips every row"""
+        path = Path(self.tmp_dir.name) / 'results.csv'
+        with CsvResultSink(str(path), flush_rows=10) as sink:
+            for row in self.ROWS:
+                sink.write(row)
+
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(sink.rows, 25)
+        self.assertEqual(rows[3], {key: str(value) for key, value in self.ROWS[3].items()})
+        self.assertEqual(len(rows), 25)
+
+    def test_gzipped_ndjson(self):
+        """Test NDJSON output with gzip, one object per line"""
+        path = Path(self.tmp_dir.name) / 'results.ndjson.gz'
+        with NdjsonResultSink(str(path)) as sink:
+            for row in self.ROWS:
+                sink.write(row)
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            self.assertEqual([json.loads(line) for line in f], self.ROWS)
+
+    def test_no_file_without_rows(self):
+        """Test an empty run does not create a results file"""
+        with open_result_sink('ndjson', compress=True, directory=self.tmp_dir.name) as sink:
+            pass
+        self.assertTrue(str(sink.path).endswith('.ndjson.gz'))
+        self.assertFalse(sink.path.exists())
+        with self.assertRaises(ValueError):
+            open_result_sink('xlsx')
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow not installed')
+    def test_parquet_results_and_issues(self):
+        """Test Parquet output is partitioned by run date, with issues and dictionary columns"""
+        import pyarrow.parquet as pq
+        validator = HIPAAComplianceValidator()
+        assessments = [assess_study(validator, Study.from_record({'NCTId': [f'NCT{i:08d}']}))
+                       for i in range(7)]
+
+        with open_result_sink('parquet', directory=self.tmp_dir.name, run_id=3,
+                              started_at=datetime(2024, 5, 6, 7, 8, 9), row_group_rows=3) as sink:
+            for result, report in assessments:
+                sink.write(result, report)
+
+        self.assertIsInstance(sink, ParquetResultSink)
+        self.assertEqual(sink.path.parent.name, 'run_date=2024-05-06')
+        results = pq.ParquetFile(sink.path)
+        self.assertEqual(results.metadata.num_rows, 7)
+        self.assertEqual(results.metadata.num_row_groups, 3)
+        table = pq.read_table(sink.path, columns=['study_id', 'compliance_status'])
+        self.assertEqual(table.column('study_id').to_pylist(), [r['study_id'] for r, _ in assessments])
+        self.assertEqual(str(table.schema.field('compliance_status').type.value_type), 'string')
+
+        issues = pq.read_table(sink.issues_path)
+        self.assertEqual(issues.num_rows, sum(len(report.issues) for _, report in assessments))
+        self.assertEqual(set(issues.column('run_id').to_pylist()), {3})
+
+class TestStartup(unittest.TestCase):
+    """Test CLI startup stays light and free of side effects"""
+
+    def test_cli_help_skips_heavy_imports(self):
+        """Test main.py --help imports no optional-path dependency and writes nothing"""
+        from scripts.bench_startup import measure_startup, HEAVY_MODULES
+
+        # Raises if the CLI wrote anything to its working directory
+        _, modules = measure_startup(['--help'])
+
+        self.assertIn('src.compliance.validator', modules)
+        self.assertEqual([name for name in HEAVY_MODULES if name in modules], [])
+
+    def test_lazy_instance_builds_once_on_first_use(self):
+        """Test the lazy singleton defers construction and forwards attributes"""
+        built = []
+
+        class Service:
+            def __init__(self):
+                built.append(self)
+                self.value = 1
+
+        service = LazyInstance(Service)
+        self.assertFalse(service.initialized)
+        self.assertEqual(built, [])
+
+        self.assertEqual(service.value, 1)
+        with patch.object(service, 'value', 2):
+            self.assertEqual(service.value, 2)
+        self.assertEqual(service.value, 1)
+        self.assertEqual(len(built), 1)
+
 class TestEndToEndIntegration(unittest.TestCase):
     """Test end-to-end integration"""
-    
-    @patch('src.api.clinical_trials_client.fetch_clinical_trials')
+
+    def setUp(self):
+        # Keep every file the run writes out of the project tree
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        tmp = self.tmp_dir.name
+
+        from src.users.models import UserManager
+        patchers = [
+            patch.dict(settings.RESULTS_STORE, path=os.path.join(tmp, 'results', 'results.db')),
+            patch.dict(settings.REPORT_CACHE, path=os.path.join(tmp, 'cache', 'reports.db')),
+            patch.dict(settings.RESULTS_OUTPUT, directory=tmp),
+            patch.object(CampaignState, 'STATE_FILE', os.path.join(tmp, 'campaign_state.json')),
+            patch.object(CampaignState, 'CURSOR_FILE', os.path.join(tmp, 'fetch_cursor.json')),
+            patch('scripts.main.UserManager', lambda: UserManager(os.path.join(tmp, 'users.json')))
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @patch('src.api.clinical_trials_client.iter_clinical_trials')
     def test_full_workflow(self, mock_fetch):
         """Test complete workflow integration"""
         # Mock API response
-        mock_fetch.return_value = [
+        mock_fetch.return_value = iter([
             {
                 'NCTId': ['NCT12345'],
                 'BriefTitle': ['Test Study'],
                 'CentralContactEMail': ['test@example.com']
             }
-        ]
+        ])
 
         # Import and run main function
         from scripts.main import main
@@ -225,5 +971,89 @@ class TestEndToEndIntegration(unittest.TestCase):
         # The new main function runs compliance assessment, not email sending
         # This is the correct, legitimate behavior
 
+    def _interrupt_after_collecting(self, count, **options):
+        """Run an API assessment whose collect stage fails after count studies
+
+        Returns the ids collected and the fetch cursor left behind.
+        """
+        def fetch(checkpoint=None, **kwargs):
+            # 40 pages of 5, read far ahead of the sink by the pipeline queues
+            for last_rank in range(5, 201, 5):
+                for rank in range(last_rank - 4, last_rank + 1):
+                    yield {'NCTId': [f"NCT{rank:08d}"], 'BriefTitle': ['Test Study']}
+                checkpoint(last_rank, None)
+
+        collected = []
+
+        def record_assessed(state, trial_id, last_update):
+            if len(collected) == count:
+                raise RuntimeError("interrupted")
+            collected.append(trial_id)
+
+        from scripts.main import HIPAAComplianceTool
+        tool = HIPAAComplianceTool()
+        with patch('src.api.clinical_trials_client.iter_clinical_trials', side_effect=fetch), \
+                patch.object(CampaignState, 'record_assessed', record_assessed), \
+                self.assertRaises(RuntimeError):
+            tool.run_compliance_assessment(**options)
+
+        with open(CampaignState.CURSOR_FILE) as f:
+            return collected, json.load(f)
+
+    def test_interrupted_run_resumes_after_collected_studies(self):
+        """Test the fetch cursor never passes studies that were not collected"""
+        collected, cursor = self._interrupt_after_collecting(12, use_report_cache=False)
+
+        # 12 studies were collected: only the first two pages are complete
+        self.assertEqual(collected[-1], 'NCT00000012')
+        self.assertEqual(cursor['last_completed_rank'], 10)
+
+    def test_assessor_read_ahead_is_not_counted_as_collected(self):
+        """Test studies read ahead in assessor chunks do not advance the cursor"""
+        with patch.object(settings, 'ASSESSMENT_CHUNK_SIZE', 64):
+            collected, cursor = self._interrupt_after_collecting(12, workers=2)
+
+        self.assertEqual(len(collected), 12)
+        self.assertEqual(cursor['last_completed_rank'], 10)
+
+    def test_failed_assessment_holds_watermark(self):
+        """Test a study that failed to assess is fetched again by the next incremental run"""
+        def fetch(stats=None, **kwargs):
+            stats.exhausted = True
+            yield {'NCTId': ['NCT00000001'], 'LastUpdatePostDate': ['March 1, 2024']}
+            yield {'NCTId': ['NCT00000002'], 'LastUpdatePostDate': ['March 1, 2024']}
+
+        from src.compliance import assessment
+        assess_study = assessment.assess_study
+
+        def flaky(validator, study, report=None):
+            return None if study.nct_id == 'NCT00000002' else assess_study(validator, study, report)
+
+        from scripts.main import HIPAAComplianceTool
+        with patch('src.api.clinical_trials_client.iter_clinical_trials', side_effect=fetch):
+            with patch('src.compliance.assessment.assess_study', flaky):
+                summary = HIPAAComplianceTool().run_compliance_assessment(incremental=True,
+                                                                          use_report_cache=False)
+            self.assertEqual(summary['failed_studies'], 1)
+            self.assertIsNone(CampaignState().updated_since())
+
+            summary = HIPAAComplianceTool().run_compliance_assessment(incremental=True,
+                                                                      use_report_cache=False)
+        self.assertEqual(summary['total_studies'], 1)
+        self.assertEqual(summary['failed_studies'], 0)
+        self.assertIsNotNone(CampaignState().updated_since())
+
+    @patch('src.api.clinical_trials_client.iter_clinical_trials')
+    def test_results_file_is_stamped_with_run_start(self, mock_fetch):
+        """Test the results file name uses the same (UTC) run start as the state"""
+        mock_fetch.return_value = iter([{'NCTId': ['NCT12345'], 'BriefTitle': ['Test Study']}])
+
+        from scripts.main import HIPAAComplianceTool
+        summary = HIPAAComplianceTool().run_compliance_assessment(use_report_cache=False)
+
+        run_started = datetime.fromisoformat(CampaignState().state['last_run'])
+        self.assertEqual(os.path.basename(summary['output_file']),
+                         f"compliance_assessment_{run_started.strftime('%Y%m%d_%H%M%S')}.csv")
+
 if __name__ == '__main__':
     unittest.main()